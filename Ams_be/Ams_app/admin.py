@@ -1,6 +1,8 @@
-from django.contrib import admin
+from collections import Counter
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Attendance, Holiday, Shift, LeaveRequest, UserShiftAssignment
+from .leaves import MAX_DECISION_BATCH, decide_leaves
+from .models import User, Attendance, Holiday, Shift, ShiftRotation, LeaveRequest, LeaveBalance, UserShiftAssignment, DailyAttendanceSummary, MonthlyAttendanceReport
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -10,7 +12,7 @@ class UserAdmin(BaseUserAdmin):
     ordering = ('email',)
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
-        ('Personal Info', {'fields': ('name', 'role', 'shift')}),
+        ('Personal Info', {'fields': ('name', 'role', 'shift', 'rotation')}),
         ('Permissions', {'fields': ('is_active', 'is_superuser', 'groups', 'user_permissions')}),  # Removed 'is_staff'
     )
     add_fieldsets = (
@@ -43,12 +45,44 @@ class LeaveRequestAdmin(admin.ModelAdmin):
     list_filter = ('leave_type', 'status')
     search_fields = ('employee__email', 'employee__name', 'reason')
     readonly_fields = ('applied_at',)
+    actions = ['approve_selected', 'reject_selected']
 
     def save_model(self, request, obj, form, change):
         if obj.status == 'Approved' and not obj.approved_by:
             obj.approved_by = request.user
         super().save_model(request, obj, form, change)
 
+    def _decide(self, request, queryset, status):
+        leave_ids = list(queryset.values_list('id', flat=True))
+        outcomes = {}
+        for first in range(0, len(leave_ids), MAX_DECISION_BATCH):
+            outcomes.update(decide_leaves(leave_ids[first:first + MAX_DECISION_BATCH], status, request.user))
+
+        counts = Counter(outcomes.values())
+        message = f"{counts.pop(status.lower(), 0)} leave requests {status.lower()}."
+        if counts:
+            message += " Skipped: " + ", ".join(
+                f"{count} {outcome.replace('_', ' ')}" for outcome, count in sorted(counts.items())
+            ) + "."
+        self.message_user(request, message, messages.WARNING if counts else messages.SUCCESS)
+
+    @admin.action(description="Approve selected pending leave requests")
+    def approve_selected(self, request, queryset):
+        self._decide(request, queryset, 'Approved')
+
+    @admin.action(description="Reject selected pending leave requests")
+    def reject_selected(self, request, queryset):
+        self._decide(request, queryset, 'Rejected')
+
+
+@admin.register(LeaveBalance)
+class LeaveBalanceAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'year', 'leave_type', 'used_days')
+    list_filter = ('year', 'leave_type')
+    search_fields = ('employee__email', 'employee__name')
+    # Kept by leave approvals and the rebuild_leave_balances command
+    readonly_fields = ('employee', 'year', 'leave_type', 'used_days')
+
 @admin.register(Holiday)
 class HolidayAdmin(admin.ModelAdmin):
     list_display = ('name', 'start_date', 'end_date', 'description')
@@ -64,8 +98,37 @@ class ShiftAdmin(admin.ModelAdmin):
     list_filter = ('is_active', 'start_time')
 
 
+@admin.register(ShiftRotation)
+class ShiftRotationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'anchor_date', 'cycle_days', 'is_active')
+    search_fields = ('name',)
+    list_filter = ('is_active',)
+
+    @admin.display(description='Cycle (days)')
+    def cycle_days(self, obj):
+        return len(obj.pattern)
+
+
 @admin.register(UserShiftAssignment)
 class UserShiftAssignmentAdmin(admin.ModelAdmin):
     list_display = ('user', 'shift', 'date')
     list_filter = ('shift', 'date')
     search_fields = ('user__email', 'user__name', 'shift__name')
+
+
+@admin.register(DailyAttendanceSummary)
+class DailyAttendanceSummaryAdmin(admin.ModelAdmin):
+    list_display = ('date', 'shift', 'present_count', 'absent_count', 'on_leave_count', 'holiday_count', 'worked_seconds', 'updated_at')
+    list_filter = ('shift', 'date')
+    ordering = ('-date',)
+    readonly_fields = (
+        'date', 'shift', 'present_count', 'absent_count', 'on_leave_count', 'holiday_count', 'worked_seconds', 'updated_at',
+    )
+
+
+@admin.register(MonthlyAttendanceReport)
+class MonthlyAttendanceReportAdmin(admin.ModelAdmin):
+    list_display = ('user', 'year', 'month', 'working_days', 'days_present', 'leave_days', 'worked_seconds', 'generated_at')
+    list_filter = ('year', 'month')
+    search_fields = ('user__email', 'user__name')
+    readonly_fields = ('generated_at',)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AmsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Ams_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,135 @@
+#  ----------------- async views for the check-in burst (served by ASGI) ---------------------
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from . import punch_buffer
+from .authentication import VERSION_CLAIM, atoken_version
+from .metrics import PUNCHES
+from .models import Attendance, User
+from .shifts import effective_shift, shift_times
+from .summaries import mark_dirty
+from .today import today_cache
+from .worktime import work_seconds
+
+_jwt = JWTAuthentication()
+
+
+async def _authenticate(request):
+    """
+    Same Bearer-token check as the DRF API, without DRF (which is sync only):
+    validate the JWT in-process, then check its claims against the cached
+    token version (or load the user, for tokens without claims). Returns
+    the user id, or None.
+    """
+    header = _jwt.get_header(request)
+    raw_token = _jwt.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        token = _jwt.get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return None
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if VERSION_CLAIM in token:
+        current = token.get('is_active') and token[VERSION_CLAIM] == await atoken_version(user_id)
+        return user_id if current else None
+    return await User.objects.filter(id=user_id, is_active=True).values_list('id', flat=True).afirst()
+
+
+def _unauthorized():
+    return JsonResponse({"detail": "Authentication credentials were not provided or are invalid."}, status=401)
+
+
+def _attendance_data(attendance):
+    return {
+        "date": attendance.date.isoformat(),
+        "check_in": attendance.check_in.isoformat() if attendance.check_in else None,
+        "check_out": attendance.check_out.isoformat() if attendance.check_out else None,
+        "status": attendance.status,
+    }
+
+
+async def _punch(user_id, moment):
+    """
+    Check in, or check out when there is an open check-in for today. Every
+    write is conditional, so concurrent taps settle on one row and one punch.
+    Returns the stored row, or None when the day is already complete.
+    """
+    today, punch_time = moment.date(), moment.time()
+    for _ in range(2):
+        try:
+            attendance = await Attendance.objects.aget(user_id=user_id, date=today)
+        except Attendance.DoesNotExist:
+            try:
+                attendance = await Attendance.objects.acreate(user_id=user_id, date=today, check_in=punch_time, status='Present')
+                PUNCHES.inc(direction='in')
+                await today_cache.aput(attendance)
+                return attendance
+            except IntegrityError:
+                continue  # Another tap created the row first; read it again
+
+        if attendance.check_in is None:
+            direction = 'in'
+            updated = await Attendance.objects.filter(pk=attendance.pk, check_in__isnull=True).aupdate(
+                check_in=punch_time, status='Present'
+            )
+        elif attendance.check_out is None:
+            direction = 'out'
+            shift = await sync_to_async(effective_shift)(user_id, today)
+            updated = await Attendance.objects.filter(pk=attendance.pk, check_out__isnull=True).aupdate(
+                check_out=punch_time, **work_seconds(attendance.check_in, punch_time, *shift_times(shift))
+            )
+        else:
+            return None
+        if updated:
+            attendance = await Attendance.objects.aget(pk=attendance.pk)
+            # update() skips the post_save signal that keeps summaries current
+            await sync_to_async(mark_dirty)([today])
+            PUNCHES.inc(direction=direction)
+            await today_cache.aput(attendance)
+            return attendance
+    return None
+
+
+@csrf_exempt
+@require_POST
+async def attendance_punch(request):
+    # POST /async/attendances/punch/  (Authorization: Bearer <access token>)
+    user_id = await _authenticate(request)
+    if user_id is None:
+        return _unauthorized()
+
+    if punch_buffer.ENABLED:
+        # Buffered punches must go through the buffer, which decides against its pending punches
+        attendance = await sync_to_async(punch_buffer.punch)(user_id, 'toggle', timezone.localtime())
+    else:
+        attendance = await _punch(user_id, timezone.localtime())
+    if attendance is None:
+        return JsonResponse({"error": "Attendance already recorded for today"}, status=400)
+    return JsonResponse({"message": "Attendance recorded successfully", **_attendance_data(attendance)}, status=201)
+
+
+@require_GET
+async def attendance_today(request):
+    # GET /async/attendances/today/
+    user_id = await _authenticate(request)
+    if user_id is None:
+        return _unauthorized()
+
+    today = timezone.localdate()
+    if punch_buffer.ENABLED:
+        # Includes punches still waiting in the buffer
+        attendance = await sync_to_async(punch_buffer.today_attendance)(user_id)
+    else:
+        attendance = await today_cache.aget(
+            user_id, today, lambda: Attendance.objects.filter(user_id=user_id, date=today).afirst()
+        )
+    if attendance is None:
+        return JsonResponse({"date": today.isoformat(), "check_in": None, "check_out": None, "status": None})
+    return JsonResponse(_attendance_data(attendance))
@@ -0,0 +1,117 @@
+# Ams_app/authentication.py
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from .models import User
+
+# Tokens carry the user's token_version; saving a user with a new role,
+# shift, active flag or password bumps it and every older token is refused.
+VERSION_CLAIM = 'ver'
+# How long a user's current version is cached. With a per-process cache (the
+# default LocMemCache) other processes may accept a revoked token for up to
+# this long; a shared cache (Redis/Memcached) makes revocation immediate.
+VERSION_CACHE_SECONDS = getattr(settings, 'AMS_TOKEN_VERSION_CACHE_SECONDS', 60)
+# Cached for users that are missing or inactive, so none of their tokens match
+REVOKED = -1
+
+
+def _version_key(user_id):
+    return f'ams:token-version:{user_id}'
+
+
+def token_version(user_id):
+    """Current token version of a user, from the cache or one small query."""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(id=user_id, is_active=True).values_list('token_version', flat=True).first()
+        version = REVOKED if version is None else version
+        cache.set(key, version, VERSION_CACHE_SECONDS)
+    return version
+
+
+async def atoken_version(user_id):
+    """token_version() for async views."""
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = await User.objects.filter(id=user_id, is_active=True).values_list('token_version', flat=True).afirst()
+        version = REVOKED if version is None else version
+        await cache.aset(key, version, VERSION_CACHE_SECONDS)
+    return version
+
+
+def forget_token_version(user_id):
+    cache.delete(_version_key(user_id))
+
+
+def add_claims(token, user):
+    """Embed what the API checks on every call, so it needn't load the user."""
+    token['role'] = user.role
+    token['shift'] = user.shift_id
+    token['is_active'] = user.is_active
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+def is_current(token):
+    """Whether a token with claims still matches its user's active flag and version."""
+    return bool(token.get('is_active')) and token[VERSION_CLAIM] == token_version(token[api_settings.USER_ID_CLAIM])
+
+
+class ClaimsUser(TokenUser):
+    """
+    request.user for stateless JWT requests: id, role, shift and active flag
+    come from the token. Not a model instance, so views filter by
+    ``request.user.id`` rather than by the user object.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+    @cached_property
+    def shift_id(self):
+        return self.token.get('shift')
+
+    @cached_property
+    def is_active(self):
+        return self.token.get('is_active', False)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request User query. Tokens are
+    checked against the cached token version instead. Tokens without claims
+    (issued before they were added, or built with RefreshToken.for_user) fall
+    back to loading the user.
+    """
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        if not is_current(validated_token):
+            raise AuthenticationFailed("Token has been revoked.", code='token_revoked')
+        return ClaimsUser(validated_token)
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_claims(super().get_token(user), user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    # The new access token copies the refresh token's claims, so a revoked
+    # refresh token must not be able to mint one
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if VERSION_CLAIM in refresh and not is_current(refresh):
+            raise AuthenticationFailed("Token has been revoked.", code='token_revoked')
+        return super().validate(attrs)
@@ -0,0 +1,97 @@
+# Ams_app/exports.py
+
+import csv
+import io
+import tempfile
+from itertools import islice
+from django.db.models import Exists, OuterRef, Q
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+from .models import Attendance, UserShiftAssignment
+from .shifts import ShiftResolver, shift_table
+
+HEADER = ['Employee', 'Email', 'Shift', 'Date', 'Check In', 'Check Out', 'Status']
+
+# Rows fetched per database round trip, and rows per chunk of CSV output
+CHUNK_SIZE = 2000
+# Excel caps a sheet at 1,048,576 rows; leave room for the header
+XLSX_ROWS_PER_SHEET = 1048575
+
+
+def export_rows(start_date, end_date, user_id=None, shift_id=None):
+    """
+    Attendance rows for an export as plain tuples, streamed from the
+    database. The shift is the one the user worked that day (assignment,
+    rotation or default shift), resolved with a ShiftResolver per chunk.
+    """
+    attendance = Attendance.objects.filter(date__range=(start_date, end_date))
+    if user_id:
+        attendance = attendance.filter(user_id=user_id)
+    if shift_id:
+        # Rows that may have worked the shift; the resolver below decides
+        attendance = attendance.filter(
+            Q(user__shift_id=shift_id) | Q(user__rotation__isnull=False) | Exists(
+                UserShiftAssignment.objects.filter(user_id=OuterRef('user_id'), date=OuterRef('date'), shift_id=shift_id)
+            )
+        )
+    rows = attendance.order_by('date', 'id').values_list(
+        'user_id', 'user__name', 'user__email', 'date', 'check_in', 'check_out', 'status'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            return
+        resolver = ShiftResolver({row[0] for row in chunk}, chunk[0][3], chunk[-1][3])
+        for row_user_id, name, email, day, check_in, check_out, status in chunk:
+            worked = resolver.shift_id(row_user_id, day)
+            if shift_id and worked != shift_id:
+                continue
+            shift = shift_table.get(worked)
+            yield name, email, shift.name if shift else None, day, check_in, check_out, status
+
+
+def _csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def csv_response(rows, filename):
+    """Stream rows as CSV; the first bytes go out before the query has finished."""
+    response = StreamingHttpResponse(_csv_chunks(rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def xlsx_response(rows, filename):
+    """
+    Write rows with openpyxl's write-only workbook into a temporary file and
+    stream that file back. Sheets roll over at Excel's row limit.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = None
+    for count, row in enumerate(rows):
+        if count % XLSX_ROWS_PER_SHEET == 0:
+            sheet = workbook.create_sheet(f'Attendance {count // XLSX_ROWS_PER_SHEET + 1}')
+            sheet.append(HEADER)
+        sheet.append(row)
+    if sheet is None:
+        workbook.create_sheet('Attendance 1').append(HEADER)
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
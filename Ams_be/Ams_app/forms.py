@@ -1,7 +1,9 @@
 from django import forms
 from django.forms import PasswordInput
 from .models import User, Attendance, LeaveRequest, Shift, Holiday
+from .rosters import MAX_ROSTER_ROWS
 from django.core.exceptions import ValidationError
+from django.db.models import Q
 from django.core.validators import EmailValidator
 from django.contrib.auth.password_validation import validate_password
 from datetime import date
@@ -91,6 +93,32 @@ class LeaveRequestForm(forms.ModelForm):
             raise ValidationError("End date cannot be earlier than start date.")
         return end_date
 
+# Filters for the leave list
+class LeaveFilterForm(forms.Form):
+    status = forms.ChoiceField(choices=(('', 'All statuses'),) + LeaveRequest.LEAVE_STATUS, required=False)
+    leave_type = forms.ChoiceField(choices=(('', 'All types'),) + LeaveRequest.LEAVE_TYPE, required=False)
+    employee = forms.CharField(required=False, max_length=255)
+    start = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def filter(self, leaves):
+        """Apply the submitted filters to a LeaveRequest queryset."""
+        data = self.cleaned_data
+        if data.get('status'):
+            leaves = leaves.filter(status=data['status'])
+        if data.get('leave_type'):
+            leaves = leaves.filter(leave_type=data['leave_type'])
+        if data.get('employee'):
+            leaves = leaves.filter(
+                Q(employee__name__icontains=data['employee']) | Q(employee__email__icontains=data['employee'])
+            )
+        # Leaves overlapping the [start, end] window
+        if data.get('start'):
+            leaves = leaves.filter(end_date__gte=data['start'])
+        if data.get('end'):
+            leaves = leaves.filter(start_date__lte=data['end'])
+        return leaves
+
 # Form for Shift
 class ShiftForm(forms.ModelForm):
     class Meta:
@@ -106,6 +134,31 @@ class ShiftForm(forms.ModelForm):
             raise ValidationError("End time must be later than start time.")
         return end_time
 
+# Form for a roster: one shift, or a rotation, for many users over a date range
+class RosterForm(forms.Form):
+    users = forms.ModelMultipleChoiceField(queryset=User.objects.filter(is_active=True).order_by('name'))
+    start_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    end_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    shifts = forms.ModelMultipleChoiceField(
+        queryset=Shift.objects.filter(is_active=True).order_by('start_time'),
+        help_text="Several shifts rotate in order of start time.",
+    )
+    days_per_shift = forms.IntegerField(min_value=1, initial=1)
+    working_days_only = forms.BooleanField(required=False, help_text="Skip weekends and holidays.")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        users = cleaned_data.get('users')
+
+        if start_date and end_date:
+            if end_date < start_date:
+                raise ValidationError("End date cannot be before the start date.")
+            if users and len(users) * ((end_date - start_date).days + 1) > MAX_ROSTER_ROWS:
+                raise ValidationError(f"A roster can contain at most {MAX_ROSTER_ROWS} assignments.")
+        return cleaned_data
+
 # Form for Holiday
 class HolidayForm(forms.ModelForm):
     class Meta:
@@ -132,6 +185,9 @@ class HolidayForm(forms.ModelForm):
         if end_date and start_date:  # Check if both dates exist
             if end_date < start_date:
                 raise forms.ValidationError("End date cannot be before the start date.")
+            overlapping = Holiday.objects.filter(start_date__lte=end_date, end_date__gte=start_date)
+            if overlapping.exclude(pk=self.instance.pk).exists():
+                raise forms.ValidationError("Holiday overlaps with an existing one.")
         
         return end_date
 
@@ -0,0 +1,217 @@
+# Ams_app/leaves.py
+
+from bisect import bisect_right
+from datetime import date
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from .models import LeaveBalance, LeaveRequest
+from .workdays import calendar
+
+# Working days of each leave type an employee may take per calendar year;
+# types left out (Lop) are unlimited
+LEAVE_ALLOWANCE = getattr(settings, 'AMS_LEAVE_ALLOWANCE', {'Casual': 12, 'Sick': 12})
+REBUILD_BATCH_SIZE = 5000
+# Most leave requests decided in one batch
+MAX_DECISION_BATCH = 1000
+
+
+def leave_days(start_date, end_date):
+    """{year: working days} of a leave, split at year boundaries; weekends and holidays don't count."""
+    days = {}
+    for year in range(start_date.year, end_date.year + 1):
+        taken = calendar.working_days_between(max(start_date, date(year, 1, 1)), min(end_date, date(year, 12, 31)))
+        if taken:
+            days[year] = taken
+    return days
+
+
+def _add(deltas, entry, sign):
+    employee_id, leave_type, start_date, end_date = entry
+    for year, taken in leave_days(start_date, end_date).items():
+        key = (employee_id, year, leave_type)
+        deltas[key] = deltas.get(key, 0) + sign * taken
+
+
+def apply_deltas(deltas):
+    """
+    Add {(employee id, year, leave type): working days} to the ledger:
+    one INSERT for rows that don't exist yet, then a single UPDATE for all
+    of them. Removing leave never creates rows.
+    """
+    deltas = {key: change for key, change in deltas.items() if change}
+    if not deltas:
+        return
+    new_rows = [
+        LeaveBalance(employee_id=employee_id, year=year, leave_type=leave_type)
+        for (employee_id, year, leave_type), change in deltas.items() if change > 0
+    ]
+    with transaction.atomic():
+        LeaveBalance.objects.bulk_create(new_rows, ignore_conflicts=True)
+        # Rows picked by the IN lists but not in deltas get + 0
+        LeaveBalance.objects.filter(
+            employee_id__in={key[0] for key in deltas},
+            year__in={key[1] for key in deltas},
+            leave_type__in={key[2] for key in deltas},
+        ).update(used_days=F('used_days') + Case(
+            *(
+                When(Q(employee_id=employee_id, year=year, leave_type=leave_type), then=Value(change))
+                for (employee_id, year, leave_type), change in deltas.items()
+            ),
+            default=Value(0),
+        ))
+
+
+def move_leave(before, after):
+    """
+    Update the ledger when a request changes: ``before`` and ``after`` are
+    LeaveRequest.ledger_entry() values (None while not approved), so an
+    approval only adds, a cancellation only removes and an edit to an
+    approved request does both.
+    """
+    deltas = {}
+    if before is not None:
+        _add(deltas, before, -1)
+    if after is not None:
+        _add(deltas, after, 1)
+    apply_deltas(deltas)
+
+
+def leave_balances(employee_id, year):
+    """
+    Used, allowed and remaining days of every leave type for one employee
+    and year, read from the ledger in one query. ``allowance`` and
+    ``remaining`` are None for unlimited types.
+    """
+    used = dict(LeaveBalance.objects.filter(employee_id=employee_id, year=year).values_list('leave_type', 'used_days'))
+    balances = []
+    for leave_type, _ in LeaveRequest.LEAVE_TYPE:
+        allowance = LEAVE_ALLOWANCE.get(leave_type)
+        used_days = used.get(leave_type, 0)
+        balances.append({
+            'leave_type': leave_type,
+            'year': year,
+            'used_days': used_days,
+            'allowance': allowance,
+            'remaining': None if allowance is None else allowance - used_days,
+        })
+    return balances
+
+
+def rebuild_leave_balances(year=None, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Recount the ledger from approved requests, for one year or all of them:
+    approved leave is read in batches, counted in memory and written back
+    with a bulk insert, replacing the existing rows in one transaction. Run
+    it after holidays change, since those change working-day counts.
+    Returns the number of ledger rows written.
+    """
+    leaves = LeaveRequest.objects.filter(status='Approved')
+    balances = LeaveBalance.objects.all()
+    if year is not None:
+        leaves = leaves.filter(start_date__lte=date(year, 12, 31), end_date__gte=date(year, 1, 1))
+        balances = balances.filter(year=year)
+
+    deltas = {}
+    for entry in leaves.order_by().values_list(
+        'employee_id', 'leave_type', 'start_date', 'end_date'
+    ).iterator(chunk_size=batch_size):
+        _add(deltas, entry, 1)
+
+    rows = [
+        LeaveBalance(employee_id=employee_id, year=balance_year, leave_type=leave_type, used_days=used_days)
+        for (employee_id, balance_year, leave_type), used_days in deltas.items()
+        if used_days and (year is None or balance_year == year)
+    ]
+    with transaction.atomic():
+        balances.delete()
+        LeaveBalance.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def _overlap_finder(intervals):
+    """
+    A function telling whether [start, end] overlaps any of the given
+    (start, end) intervals: starts are sorted with a running maximum of the
+    ends, so each check is one bisect.
+    """
+    intervals = sorted(intervals)
+    starts = [start for start, _ in intervals]
+    reach = []
+    for _, end in intervals:
+        reach.append(max(end, reach[-1]) if reach else end)
+
+    def overlaps(start, end):
+        index = bisect_right(starts, end)
+        return index > 0 and reach[index - 1] >= start
+    return overlaps
+
+
+def decide_leaves(leave_ids, status, approver):
+    """
+    Approve or reject many pending leave requests at once. Returns
+    {id: outcome}, the outcome being the new status in lower case, or why
+    the request was left alone: 'not_found', 'not_pending', 'own_request',
+    'forbidden' when the approver's role may not approve leave (see
+    LeaveRequest.APPROVER_ROLES), or 'overlap' when approving it would
+    overlap approved leave of the same employee (already approved, or
+    earlier in this batch). Every decision records the approver.
+
+    Everything happens in one transaction: one read of the requests, one
+    read of the employees' approved leave (approvals only), then a single
+    UPDATE for the decided requests plus the leave balance ledger.
+    """
+    if status not in ('Approved', 'Rejected'):
+        raise ValueError("Status must be Approved or Rejected.")
+    leave_ids = list(dict.fromkeys(leave_ids))
+    if len(leave_ids) > MAX_DECISION_BATCH:
+        raise ValueError(f"At most {MAX_DECISION_BATCH} leave requests can be decided at once.")
+
+    outcomes = dict.fromkeys(leave_ids, 'not_found')
+    with transaction.atomic():
+        requests = list(LeaveRequest.objects.select_for_update().filter(id__in=leave_ids).order_by().values_list(
+            'id', 'employee_id', 'leave_type', 'start_date', 'end_date', 'status'
+        ))
+        candidates = []
+        for leave_id, employee_id, leave_type, start_date, end_date, current in requests:
+            if current != 'Pending':
+                outcomes[leave_id] = 'not_pending'
+            elif employee_id == approver.id:
+                outcomes[leave_id] = 'own_request'
+            elif status == 'Approved' and approver.role not in LeaveRequest.APPROVER_ROLES:
+                outcomes[leave_id] = 'forbidden'
+            else:
+                candidates.append((leave_id, employee_id, leave_type, start_date, end_date))
+
+        decided = [candidate[0] for candidate in candidates]
+        if status == 'Approved' and candidates:
+            decided = []
+            approved = {}
+            for employee_id, start_date, end_date in LeaveRequest.objects.filter(
+                employee_id__in={candidate[1] for candidate in candidates}, status='Approved',
+                start_date__lte=max(candidate[4] for candidate in candidates),
+                end_date__gte=min(candidate[3] for candidate in candidates),
+            ).order_by().values_list('employee_id', 'start_date', 'end_date'):
+                approved.setdefault(employee_id, []).append((start_date, end_date))
+            finders = {employee_id: _overlap_finder(intervals) for employee_id, intervals in approved.items()}
+
+            # Sweep each employee's candidates by start date; the first of two overlapping requests wins
+            reach = {}
+            deltas = {}
+            for leave_id, employee_id, leave_type, start_date, end_date in sorted(
+                candidates, key=lambda candidate: (candidate[1], candidate[3], candidate[0])
+            ):
+                finder = finders.get(employee_id)
+                if (finder and finder(start_date, end_date)) or reach.get(employee_id, date.min) >= start_date:
+                    outcomes[leave_id] = 'overlap'
+                    continue
+                reach[employee_id] = max(end_date, reach.get(employee_id, date.min))
+                decided.append(leave_id)
+                _add(deltas, (employee_id, leave_type, start_date, end_date), 1)
+            apply_deltas(deltas)
+
+        if decided:
+            LeaveRequest.objects.filter(id__in=decided).update(status=status, approved_by_id=approver.id)
+        for leave_id in decided:
+            outcomes[leave_id] = status.lower()
+    return outcomes
@@ -0,0 +1,29 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from Ams_app.summaries import rebuild_daily_summaries
+from Ams_app.worktime import BACKFILL_BATCH_SIZE, backfill_work_seconds
+
+
+class Command(BaseCommand):
+    help = "Store worked/late/overtime seconds on complete attendance rows that don't have them (defaults to all dates)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help="First date to backfill (YYYY-MM-DD).")
+        parser.add_argument('--end', type=date.fromisoformat, help="Last date to backfill (YYYY-MM-DD).")
+        parser.add_argument('--recompute', action='store_true',
+                            help="Recompute rows that already have values (e.g. after correcting shift times).")
+        parser.add_argument('--batch-size', type=int, default=BACKFILL_BATCH_SIZE, help="Rows per read and update.")
+        parser.add_argument('--skip-summaries', action='store_true', help="Don't rebuild daily summaries afterwards.")
+
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+        if start and end and end < start:
+            raise CommandError("--end cannot be before --start.")
+
+        written = backfill_work_seconds(start, end, options['recompute'], options['batch_size'])
+        self.stdout.write(f"Stored worked seconds on {written} attendance rows.")
+        if written and not options['skip_summaries']:
+            # Daily summaries add up the stored values
+            rebuilt = rebuild_daily_summaries(start, end)
+            self.stdout.write(f"Rebuilt {rebuilt} daily summary rows.")
+        self.stdout.write(self.style.SUCCESS("Backfill complete."))
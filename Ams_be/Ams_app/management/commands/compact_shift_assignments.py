@@ -0,0 +1,24 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from Ams_app.shifts import COMPACT_BATCH_SIZE, compact_assignments
+
+
+class Command(BaseCommand):
+    help = "Delete shift assignments that repeat the user's rotation or default shift (defaults to all dates)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help="First date to compact (YYYY-MM-DD).")
+        parser.add_argument('--end', type=date.fromisoformat, help="Last date to compact (YYYY-MM-DD).")
+        parser.add_argument('--batch-size', type=int, default=COMPACT_BATCH_SIZE, help="Rows read per batch.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the redundant rows.")
+
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+        if start and end and end < start:
+            raise CommandError("--end cannot be before --start.")
+
+        redundant = compact_assignments(start, end, options['dry_run'], options['batch_size'])
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"{redundant} redundant shift assignments found."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Deleted {redundant} redundant shift assignments."))
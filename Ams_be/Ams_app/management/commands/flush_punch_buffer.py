@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from Ams_app.punch_buffer import PATH, PunchBuffer
+
+
+class Command(BaseCommand):
+    help = "Write every punch waiting in the write-behind buffer to Attendance (e.g. before a deploy or after a crash)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=PATH, help="Buffer file (default: AMS_PUNCH_BUFFER_PATH).")
+
+    def handle(self, *args, **options):
+        buffer = PunchBuffer(options['path'], autostart=False)
+        flushed = buffer.drain()
+        self.stdout.write(self.style.SUCCESS(
+            f"Flushed {flushed} punches; {buffer.size()} still claimed by a running flusher."
+        ))
@@ -0,0 +1,95 @@
+import os
+import time
+from argparse import ArgumentTypeError
+from datetime import date
+from multiprocessing import Pool
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from Ams_app.models import User
+from Ams_app.reports import build_monthly_reports
+
+
+def _month(value):
+    try:
+        year, month = (int(part) for part in value.split('-'))
+        date(year, month, 1)
+    except ValueError:
+        raise ArgumentTypeError(f"Invalid month '{value}', expected YYYY-MM.")
+    return year, month
+
+
+def _init_worker():
+    # Forked workers must not reuse the parent's sockets; under spawn the
+    # app registry isn't loaded yet. Either way each worker opens its own
+    # connection on first query.
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def _run_batch(args):
+    user_ids, year, month = args
+    try:
+        return build_monthly_reports(user_ids, year, month)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Generate per-employee monthly attendance reports (defaults to last month)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=_month, help="Month to close (YYYY-MM).")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes (default: CPU count). 1 runs in-process.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Employees per batch.")
+        parser.add_argument('--include-inactive', action='store_true', help="Also report on deactivated users.")
+
+    def handle(self, *args, **options):
+        if options['month']:
+            year, month = options['month']
+        else:
+            today = date.today()
+            year, month = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+        workers, batch_size = options['workers'], options['batch_size']
+        if workers < 1 or batch_size < 1:
+            raise CommandError("--workers and --batch-size must be at least 1.")
+
+        users = User.objects.order_by('id')
+        if not options['include_inactive']:
+            users = users.filter(is_active=True)
+        user_ids = list(users.values_list('id', flat=True))
+        batches = [(user_ids[i:i + batch_size], year, month) for i in range(0, len(user_ids), batch_size)]
+        if not batches:
+            self.stdout.write("No employees to report on.")
+            return
+
+        self.stdout.write(
+            f"Generating {year}-{month:02d} reports for {len(user_ids)} employees "
+            f"in {len(batches)} batches on {workers} worker(s)..."
+        )
+        started = time.perf_counter()
+
+        if workers == 1:
+            self._report_progress((build_monthly_reports(*batch) for batch in batches), len(batches), len(user_ids), started)
+        else:
+            # Children must open their own connections, not inherit ours
+            connections.close_all()
+            with Pool(processes=min(workers, len(batches)), initializer=_init_worker) as pool:
+                results = pool.imap_unordered(_run_batch, batches)
+                self._report_progress(results, len(batches), len(user_ids), started)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(user_ids)} reports in {elapsed:.1f}s ({len(user_ids) / max(elapsed, 1e-9):.0f} employees/s)."
+        ))
+
+    def _report_progress(self, results, batch_count, total, started):
+        done = 0
+        for batch_number, written in enumerate(results, start=1):
+            done += written
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"  batch {batch_number}/{batch_count}: {done}/{total} employees, "
+                f"{done / max(elapsed, 1e-9):.0f} employees/s"
+            )
@@ -0,0 +1,66 @@
+from argparse import ArgumentTypeError
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from Ams_app.leaves import rebuild_leave_balances
+from Ams_app.summaries import rebuild_daily_summaries
+from Ams_app.synthetic import DEFAULT_PASSWORD, generate
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ArgumentTypeError(f"Invalid date '{value}', expected YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic users, attendance, leaves, shift assignments and holidays for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--days', type=int, default=365, help="Days of history ending yesterday (or --end).")
+        parser.add_argument('--end', type=_date, help="Last day to generate (YYYY-MM-DD).")
+        parser.add_argument('--method', choices=['insert', 'bulk', 'copy'], default='insert',
+                            help="Multi-row INSERTs, bulk_create, or COPY FROM STDIN (PostgreSQL only).")
+        parser.add_argument('--chunk-users', type=int, default=500, help="Users generated per transaction.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per INSERT/COPY.")
+        parser.add_argument('--prefix', default='synthetic', help="Email prefix; reruns continue the numbering.")
+        parser.add_argument('--password', default=DEFAULT_PASSWORD)
+        parser.add_argument('--seed', type=int, help="Random seed for a reproducible dataset.")
+        parser.add_argument('--skip-summaries', action='store_true', help="Don't rebuild daily summaries and leave balances afterwards.")
+
+    def handle(self, *args, **options):
+        users, days = options['users'], options['days']
+        if users < 1 or days < 1 or options['chunk_users'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--users, --days, --chunk-users and --batch-size must be at least 1.")
+        if options['method'] == 'copy' and connection.vendor != 'postgresql':
+            raise CommandError("--method copy needs PostgreSQL; use --method insert.")
+        end = options['end'] or date.today() - timedelta(days=1)
+        start = end - timedelta(days=days - 1)
+
+        self.stdout.write(f"Generating {users} users from {start} to {end} with {options['method']}...")
+
+        def progress(written, elapsed):
+            rows = sum(written.values())
+            self.stdout.write(
+                f"  {written.get('User', 0)}/{users} users, {rows} rows, {rows / max(elapsed, 1e-9):.0f} rows/s"
+            )
+
+        written, elapsed = generate(
+            users, start, end, method=options['method'], chunk_users=options['chunk_users'],
+            batch_size=options['batch_size'], prefix=options['prefix'], password=options['password'],
+            rng_seed=options['seed'], progress=progress,
+        )
+        rows = sum(written.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s): "
+            + ", ".join(f"{name} {count}" for name, count in sorted(written.items()))
+        ))
+
+        if not options['skip_summaries']:
+            rebuild_daily_summaries(start, end)
+            self.stdout.write("Rebuilt daily summaries.")
+            # Leaves are written in bulk, past the ledger updates in LeaveRequest.save()
+            rebuild_leave_balances()
+            self.stdout.write("Rebuilt leave balances.")
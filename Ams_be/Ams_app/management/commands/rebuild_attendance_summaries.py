@@ -0,0 +1,25 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from Ams_app.summaries import rebuild_daily_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily attendance summaries from Attendance (defaults to yesterday)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help="First date to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--end', type=date.fromisoformat, help="Last date to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--all', action='store_true', help="Rebuild the whole history.")
+
+    def handle(self, *args, **options):
+        if options['all']:
+            start, end = None, None
+        else:
+            yesterday = date.today() - timedelta(days=1)
+            start = options['start'] or yesterday
+            end = options['end'] or start
+            if end < start:
+                raise CommandError("--end cannot be before --start.")
+
+        written = rebuild_daily_summaries(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} daily summary rows."))
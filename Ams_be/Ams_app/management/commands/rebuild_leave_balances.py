@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from Ams_app.leaves import REBUILD_BATCH_SIZE, rebuild_leave_balances
+
+
+class Command(BaseCommand):
+    help = "Recount leave balances from approved leave requests (defaults to every year)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help="Only rebuild this calendar year.")
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE, help="Leave requests read per batch.")
+
+    def handle(self, *args, **options):
+        year = options['year']
+        if year is not None and not 1 <= year <= 9999:
+            raise CommandError("--year must be between 1 and 9999.")
+
+        written = rebuild_leave_balances(year, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} leave balance rows."))
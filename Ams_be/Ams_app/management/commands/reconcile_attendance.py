@@ -0,0 +1,33 @@
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from Ams_app.reconcile import reconcile_day
+
+
+class Command(BaseCommand):
+    help = "Mark every active user Present, Absent, On Leave or Holiday for a day (defaults to yesterday)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help="First date to reconcile (YYYY-MM-DD).")
+        parser.add_argument('--end', type=date.fromisoformat, help="Last date to reconcile (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        start = options['start'] or date.today() - timedelta(days=1)
+        end = options['end'] or start
+        if end < start:
+            raise CommandError("--end cannot be before --start.")
+
+        day = start
+        while day <= end:
+            started = time.perf_counter()
+            result = reconcile_day(day)
+            elapsed = time.perf_counter() - started
+            if result['statuses']:
+                counts = ", ".join(f"{status} {count}" for status, count in sorted(result['statuses'].items()))
+                self.stdout.write(
+                    f"{day}: inserted {result['inserted']}, updated {result['updated']} ({counts}) in {elapsed:.2f}s"
+                )
+            else:
+                self.stdout.write(f"{day}: not a working day, skipped.")
+            day += timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS("Attendance reconciled."))
@@ -0,0 +1,271 @@
+# Ams_app/metrics.py
+
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+ENABLED = getattr(settings, 'AMS_METRICS', True)
+# Shared directory for multi-process servers (gunicorn workers): each process
+# writes its values to <dir>/<pid>.json and /metrics sums every file. Clear
+# the directory when the server (not a single worker) starts.
+MULTIPROCESS_DIR = getattr(settings, 'AMS_METRICS_DIR', None)
+# How often a process rewrites its file, in seconds
+WRITE_INTERVAL = getattr(settings, 'AMS_METRICS_WRITE_INTERVAL', 1.0)
+# Scrapers must send "Authorization: Bearer <token>". Without a token the
+# endpoint is only served with DEBUG on.
+SCRAPE_TOKEN = getattr(settings, 'AMS_METRICS_TOKEN', None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Registry:
+    """
+    In-process metrics. Values are kept as {labels tuple: value}; histograms
+    store per-bucket counts followed by sum and count, so snapshots of
+    several processes merge by plain addition.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._written_at = 0.0
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def register_collector(self, collector):
+        """collector() returns [(name, type, help, labelnames, {labels tuple: value})] at scrape time."""
+        self.collectors.append(collector)
+        return collector
+
+    def snapshot(self):
+        with self.lock:
+            families = {
+                metric.name: {
+                    'type': metric.type, 'help': metric.documentation, 'labelnames': list(metric.labelnames),
+                    'buckets': list(getattr(metric, 'buckets', ())),
+                    'values': [[list(key), value] for key, value in metric.values.items()],
+                }
+                for metric in self.metrics.values()
+            }
+        for collector in self.collectors:
+            for name, kind, documentation, labelnames, values in collector():
+                families[name] = {
+                    'type': kind, 'help': documentation, 'labelnames': list(labelnames), 'buckets': [],
+                    'values': [[list(key), value] for key, value in values.items()],
+                }
+        return families
+
+    def changed(self):
+        if MULTIPROCESS_DIR and time.monotonic() - self._written_at >= WRITE_INTERVAL:
+            self.write()
+
+    def write(self):
+        """Write this process's snapshot atomically into MULTIPROCESS_DIR."""
+        with self._write_lock:
+            self._written_at = time.monotonic()
+            path = os.path.join(MULTIPROCESS_DIR, f'{os.getpid()}.json')
+            with open(f'{path}.tmp', 'w') as output:
+                json.dump(self.snapshot(), output)
+            os.replace(f'{path}.tmp', path)
+
+    def collect(self):
+        """Snapshot of every process (multi-process mode) or of this one."""
+        if not MULTIPROCESS_DIR:
+            return self.snapshot()
+        self.write()
+        merged = {}
+        for path in glob.glob(os.path.join(MULTIPROCESS_DIR, '*.json')):
+            try:
+                with open(path) as source:
+                    families = json.load(source)
+            except (OSError, ValueError):
+                continue  # Being replaced right now; the next scrape has it
+            for name, family in families.items():
+                target = merged.setdefault(name, dict(family, values={}))
+                for key, value in family['values']:
+                    key = tuple(key)
+                    if key not in target['values']:
+                        target['values'][key] = value
+                    elif isinstance(value, list):
+                        target['values'][key] = [a + b for a, b in zip(target['values'][key], value)]
+                    else:
+                        target['values'][key] += value
+        for family in merged.values():
+            family['values'] = [[list(key), value] for key, value in family['values'].items()]
+        return merged
+
+
+REGISTRY = Registry()
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.values = {}
+        self.registry = registry
+        registry.register(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.changed()
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}
+        self.registry = registry
+        registry.register(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self.registry.lock:
+            # Per-bucket (non-cumulative) counts, then sum and count
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+        self.registry.changed()
+
+
+def _labels(labelnames, key, extra=()):
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def render(families):
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for name in sorted(families):
+        family = families[name]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        labelnames = family['labelnames']
+        for key, value in sorted(family['values']):
+            if family['type'] != 'histogram':
+                lines.append(f"{name}{_labels(labelnames, key)} {value}")
+                continue
+            cumulative = 0
+            bounds = [str(bound) for bound in family['buckets']] + ['+Inf']
+            for bound, count in zip(bounds, value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labelnames, key, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labelnames, key)} {value[-2]}")
+            lines.append(f"{name}_count{_labels(labelnames, key)} {value[-1]}")
+    return '\n'.join(lines) + '\n'
+
+
+# ----- Application metrics ----- #
+REQUEST_LATENCY = Histogram(
+    'ams_http_request_duration_seconds', "Request latency by URL name.", ['view', 'method', 'status'],
+)
+VIEW_QUERIES = Counter('ams_view_queries_total', "Database queries run by each URL name.", ['view'])
+PUNCHES = Counter('ams_punches_total', "Accepted check-ins and check-outs.", ['direction'])
+JWT_TOKENS = Counter('ams_jwt_tokens_total', "Access tokens issued by the simplejwt views.", ['kind'])
+
+# URL names of the simplejwt views (Ams_be/urls.py) and what a 200 from them means
+JWT_VIEWS = {'token_obtain_pair': 'issue', 'token_refresh': 'refresh'}
+
+
+@REGISTRY.register_collector
+def _cache_metrics():
+    # Read from the caches' own counters at scrape time, so lookups stay lock-free
+    from .today import today_cache
+    from .workdays import calendar
+    values = {
+        ('workday_calendar', 'hit'): calendar.lookups - calendar.loads,
+        ('workday_calendar', 'miss'): calendar.loads,
+        ('today_attendance', 'hit'): today_cache.hits,
+        ('today_attendance', 'shared_hit'): today_cache.shared_hits,
+        ('today_attendance', 'miss'): today_cache.misses,
+    }
+    return [('ams_cache_requests_total', 'counter', "Cache lookups by result.", ['cache', 'result'], values)]
+
+
+class MetricsMiddleware:
+    """
+    Latency per URL name, queries per URL name and JWT issue/refresh counts.
+
+    Sync and async capable, so the async check-in views keep running on the
+    event loop. Their queries run in executor threads and are not counted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count))
+            response = self.get_response(request)
+        self.record(request, response, started, queries[0])
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, started, None)
+        return response
+
+    def record(self, request, response, started, queries):
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else 'unmatched'
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - started, view=view, method=request.method, status=response.status_code,
+        )
+        if queries is not None:
+            VIEW_QUERIES.inc(queries, view=view)
+        if view in JWT_VIEWS and response.status_code == 200:
+            JWT_TOKENS.inc(kind=JWT_VIEWS[view])
+
+
+def metrics_view(request):
+    # GET /metrics (Prometheus scrape target)
+    if not SCRAPE_TOKEN:
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    elif request.headers.get('Authorization') != f'Bearer {SCRAPE_TOKEN}':
+        return HttpResponseForbidden()
+    return HttpResponse(render(REGISTRY.collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,5 +1,6 @@
 import pytz
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils.timezone import now
@@ -38,21 +39,73 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     shift = models.ForeignKey('Shift', null=True, blank=True, on_delete=models.SET_NULL, related_name='users')
+    # Overrides the default shift from the rotation's anchor date on (see shifts.py)
+    rotation = models.ForeignKey('ShiftRotation', null=True, blank=True, on_delete=models.SET_NULL, related_name='members')
+    # Bumped when a JWT claim (role, shift, active flag) or the password
+    # changes; tokens carrying an older version are refused
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name']
 
+    # Fields whose change revokes the user's tokens (a new password does too,
+    # see set_password())
+    TOKEN_FIELDS = ('role', 'shift_id', 'is_active')
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        if all(field in field_names for field in cls.TOKEN_FIELDS):
+            user._token_state = user._current_token_state()
+        return user
+
+    def _current_token_state(self):
+        return tuple(getattr(self, field) for field in self.TOKEN_FIELDS)
+
+    def set_password(self, raw_password):
+        super().set_password(raw_password)
+        # Not when check_password() only rehashes the same password on login
+        if not getattr(self, '_rehashing', False):
+            self._password_changed = True
+
+    def check_password(self, raw_password):
+        self._rehashing = True
+        try:
+            return super().check_password(raw_password)
+        finally:
+            self._rehashing = False
+
+    async def acheck_password(self, raw_password):
+        self._rehashing = True
+        try:
+            return await super().acheck_password(raw_password)
+        finally:
+            self._rehashing = False
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_token_state', None)
+        changed = loaded is not None and loaded != self._current_token_state()
+        if changed or (getattr(self, '_password_changed', False) and not self._state.adding):
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+        super().save(*args, **kwargs)
+        self._token_state = self._current_token_state()
+        self._password_changed = False
+
 
 class Attendance(models.Model):
     STATUS_CHOICES = [
         ('Present', 'Present'),
         ('Absent', 'Absent'),
         ('On Leave', 'On Leave'),
+        # Set by the nightly reconciliation for users who didn't punch on a Holiday
+        ('Holiday', 'Holiday'),
     ]
 
     user = models.ForeignKey('User', on_delete=models.CASCADE)
@@ -60,31 +113,71 @@ class Attendance(models.Model):
     check_in = models.TimeField(null=True, blank=True)
     check_out = models.TimeField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    # Filled in at check-out against the user's shift at that time (see
+    # worktime.py), so totals are a plain SUM; empty until both punches are in
+    worked_seconds = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    late_seconds = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    overtime_seconds = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
+    # Recomputed whenever the punches change
+    WORKTIME_FIELDS = ('worked_seconds', 'late_seconds', 'overtime_seconds')
 
     class Meta:
         unique_together = ('user', 'date')
         ordering = ['-date']
+        indexes = [
+            # Per-user history (list/report views), newest first, answered from the index alone
+            models.Index(fields=['user', '-date'], include=['status', 'check_in', 'check_out'], name='attendance_user_date_idx'),
+            # Daily head counts by status
+            models.Index(fields=['status', 'date'], name='attendance_status_date_idx'),
+            # Keyset pagination over all attendance, newest first
+            models.Index(fields=['-date', '-id'], name='attendance_date_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.date} - {self.status}"
-        
-        
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        attendance = super().from_db(db, field_names, values)
+        if 'check_in' in field_names and 'check_out' in field_names:
+            attendance._punches = (attendance.check_in, attendance.check_out)
+        return attendance
+
     def save(self, *args, **kwargs):
         self.clean()  # Ensure validation is called before saving
+        punches = (self.check_in, self.check_out)
+        complete = None not in punches
+        if punches != getattr(self, '_punches', None) or (complete and self.worked_seconds is None):
+            self.set_work_seconds()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], *self.WORKTIME_FIELDS}
         super().save(*args, **kwargs)
+        self._punches = punches
+
+    def set_work_seconds(self, shift=None):
+        """
+        Set worked/late/overtime seconds from the punches and a (start, end)
+        shift pair, by default the shift the user works on this row's date.
+        """
+        from .shifts import effective_shift, shift_times
+        from .worktime import work_seconds
+        if shift is None and self.check_in is not None and self.check_out is not None:
+            shift = shift_times(effective_shift(self.user_id, self.date))
+        for field, value in work_seconds(self.check_in, self.check_out, *(shift or ())).items():
+            setattr(self, field, value)
 
     def get_total_hours(self):
-        if self.check_in and self.check_out:
-            # Combine date and time, then localize to IST
-            check_in_dt = IST.localize(datetime.combine(self.date, self.check_in))
-            check_out_dt = IST.localize(datetime.combine(self.date, self.check_out))
-            
-            duration = check_out_dt - check_in_dt
-            hours = duration.seconds // 3600
-            minutes = (duration.seconds % 3600) // 60
-            seconds = duration.seconds % 60
-            return f"{hours} hours, {minutes} minutes, {seconds} seconds"
-        return "N/A"
+        seconds = self.worked_seconds
+        if seconds is None and self.check_in and self.check_out:
+            # Not backfilled yet; a check-out before the check-in is the next day
+            duration = datetime.combine(self.date, self.check_out) - datetime.combine(self.date, self.check_in)
+            seconds = duration.seconds
+        if seconds is None:
+            return "N/A"
+        hours = seconds // 3600
+        minutes = (seconds % 3600) // 60
+        return f"{hours} hours, {minutes} minutes, {seconds % 60} seconds"
 
 
     def mark_check_in(self):
@@ -105,6 +198,7 @@ class LeaveRequest(models.Model):
         ('Pending', 'Pending'),
         ('Approved', 'Approved'),
         ('Rejected', 'Rejected'),
+        ('Cancelled', 'Cancelled'),
     )
 
     LEAVE_TYPE = (
@@ -112,6 +206,8 @@ class LeaveRequest(models.Model):
         ('Casual', 'Casual'),
         ('Lop', 'Lop'),
     )
+    # Roles that may approve leave, matching the approve endpoints
+    APPROVER_ROLES = ('Admin', 'HR', 'Manager')
 
     employee = models.ForeignKey(User, on_delete=models.CASCADE)
     leave_type = models.CharField(max_length=20, choices=LEAVE_TYPE)
@@ -122,13 +218,21 @@ class LeaveRequest(models.Model):
     applied_at = models.DateTimeField(auto_now_add=True)
     approved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='approved_leaves')
 
+    class Meta:
+        indexes = [
+            # Overlap check in clean(): employee + status + date range
+            models.Index(fields=['employee', 'status', 'start_date', 'end_date'], name='leave_emp_status_dates_idx'),
+            # Approval queue: only pending requests are indexed
+            models.Index(fields=['start_date', 'end_date'], condition=Q(status='Pending'), name='leave_pending_dates_idx'),
+        ]
+
     def clean(self):
         if self.end_date < self.start_date:
             raise ValidationError("End date cannot be before start date.")
 
         if self.status == 'Approved' and self.approved_by:
-            if self.approved_by.role not in ['Admin', 'HR']:
-                raise ValidationError("Only Admin or HR can approve leave requests.")
+            if self.approved_by.role not in self.APPROVER_ROLES:
+                raise ValidationError("Only Admin, HR or Manager can approve leave requests.")
 
         overlapping_leaves = LeaveRequest.objects.filter(
             employee=self.employee,
@@ -140,11 +244,59 @@ class LeaveRequest(models.Model):
             raise ValidationError("Overlapping approved leave already exists.")
 
 
+    # What the leave balance ledger is keyed on (see leaves.py)
+    LEDGER_FIELDS = ('employee_id', 'leave_type', 'start_date', 'end_date', 'status')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        leave = super().from_db(db, field_names, values)
+        if all(field in field_names for field in cls.LEDGER_FIELDS):
+            leave._approved = leave.ledger_entry()
+        return leave
+
+    def ledger_entry(self):
+        """(employee id, leave type, start date, end date) while approved, otherwise None."""
+        if self.status != 'Approved':
+            return None
+        to_date = self._meta.get_field('start_date').to_python
+        return (self.employee_id, self.leave_type, to_date(self.start_date), to_date(self.end_date))
+
     def save(self, *args, **kwargs):
+        from .leaves import move_leave
         if self.status == 'Approved' and self.approved_by:
-            if self.approved_by.role not in ['Admin', 'HR']:
-                raise PermissionError("Only Admin or HR can approve leave requests.")
-        super().save(*args, **kwargs)
+            if self.approved_by.role not in self.APPROVER_ROLES:
+                raise PermissionError("Only Admin, HR or Manager can approve leave requests.")
+        if not hasattr(self, '_approved'):
+            stored = None if self._state.adding else LeaveRequest.objects.filter(pk=self.pk).first()
+            self._approved = stored.ledger_entry() if stored else None
+
+        approved = self.ledger_entry()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if approved != self._approved:
+                move_leave(self._approved, approved)
+        self._approved = approved
+
+
+class LeaveBalance(models.Model):
+    """
+    Approved leave per employee, calendar year and leave type, in working
+    days. Updated as requests are approved, rejected or cancelled (see
+    leaves.py) and rebuilt by the rebuild_leave_balances command.
+    """
+    employee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leave_balances')
+    year = models.PositiveSmallIntegerField()
+    leave_type = models.CharField(max_length=20, choices=LeaveRequest.LEAVE_TYPE)
+    used_days = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-year', 'employee', 'leave_type']
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'year', 'leave_type'], name='leave_balance_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee} - {self.year} {self.leave_type}: {self.used_days}"
 
 
 class Shift(models.Model):
@@ -156,6 +308,35 @@ class Shift(models.Model):
     def __str__(self):
         return self.name
 
+def validate_rotation_pattern(pattern):
+    if not isinstance(pattern, list) or not pattern:
+        raise ValidationError("Pattern must be a non-empty list of shift ids (null for a day off).")
+    shift_ids = {entry for entry in pattern if entry is not None}
+    if any(not isinstance(entry, int) or isinstance(entry, bool) for entry in shift_ids):
+        raise ValidationError("Pattern entries must be shift ids or null.")
+    if not shift_ids:
+        raise ValidationError("Pattern must contain at least one shift.")
+    missing = shift_ids - set(Shift.objects.filter(id__in=shift_ids).values_list('id', flat=True))
+    if missing:
+        raise ValidationError(f"Unknown shifts in pattern: {sorted(missing)}")
+
+
+class ShiftRotation(models.Model):
+    """
+    A repeating cycle of shifts for its members, one pattern entry per day
+    starting at anchor_date. Resolved on read (see shifts.py), so a
+    rotation takes one row however long it runs.
+    """
+    name = models.CharField(max_length=100)
+    # Shift id for each day of the cycle; null is a day off
+    pattern = models.JSONField(validators=[validate_rotation_pattern])
+    anchor_date = models.DateField()
+    is_active = models.BooleanField(default=True)
+
+    def __str__(self):
+        return f"{self.name} ({len(self.pattern)}-day cycle from {self.anchor_date})"
+
+
 class Holiday(models.Model):
     name = models.CharField(max_length=100)
     start_date = models.DateField(unique=True)
@@ -167,12 +348,66 @@ class Holiday(models.Model):
 
 
 class UserShiftAssignment(models.Model):
+    """An explicit shift for one user and day, overriding their rotation and default shift."""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     shift = models.ForeignKey(Shift, on_delete=models.CASCADE)
     date = models.DateField()
 
     class Meta:
         unique_together = ('user', 'date')
+        indexes = [
+            # Daily roster, optionally narrowed to one shift
+            models.Index(fields=['date', 'shift'], name='shift_assign_date_shift_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.name} → {self.shift.name} on {self.date}"
+
+
+class DailyAttendanceSummary(models.Model):
+    """Per-day attendance totals for each shift worked that day, kept in step with Attendance (see summaries.py)."""
+    date = models.DateField()
+    shift = models.ForeignKey(Shift, null=True, blank=True, on_delete=models.CASCADE, related_name='daily_summaries')
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    on_leave_count = models.PositiveIntegerField(default=0)
+    holiday_count = models.PositiveIntegerField(default=0)
+    worked_seconds = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'shift'], name='daily_summary_date_shift_uniq'),
+            # Users without a shift share one row per day
+            models.UniqueConstraint(fields=['date'], condition=Q(shift__isnull=True), name='daily_summary_date_noshift_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.shift or 'No shift'}"
+
+
+class MonthlyAttendanceReport(models.Model):
+    """Per-employee month-end close, written by the generate_monthly_reports command (see reports.py)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_reports')
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    working_days = models.PositiveSmallIntegerField(default=0)
+    holiday_days = models.PositiveSmallIntegerField(default=0)
+    days_present = models.PositiveSmallIntegerField(default=0)
+    # Approved leave in working days, keyed by LeaveRequest.leave_type
+    leave_days = models.JSONField(default=dict)
+    worked_seconds = models.BigIntegerField(default=0)
+    late_seconds = models.BigIntegerField(default=0)
+    early_leave_seconds = models.BigIntegerField(default=0)
+    overtime_seconds = models.BigIntegerField(default=0)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-year', '-month', 'user']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'year', 'month'], name='monthly_report_user_month_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.year}-{self.month:02d}"
@@ -0,0 +1,137 @@
+# Ams_app/pagination.py
+
+import base64
+import json
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+PAGE_SIZE = getattr(settings, 'AMS_PAGE_SIZE', 50)
+MAX_PAGE_SIZE = getattr(settings, 'AMS_MAX_PAGE_SIZE', 500)
+
+
+def get_page_size(params, default=PAGE_SIZE):
+    """Page size from the ?page_size= query param, capped at MAX_PAGE_SIZE."""
+    try:
+        size = int(params.get('page_size', default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+class KeysetPaginator:
+    """
+    Seek ("keyset") pagination over a queryset, newest first.
+
+    Rows are ordered descending by ``keyset`` (the last field must be unique,
+    e.g. ``('date', 'id')``) and each page continues from the key of the last
+    row of the previous one, so page N costs the same as page 1: there is no
+    OFFSET and no COUNT(*). Cursors are opaque URL-safe strings.
+    """
+
+    def __init__(self, queryset, keyset, page_size=PAGE_SIZE):
+        self.queryset = queryset
+        self.keyset = tuple(keyset)
+        self.page_size = page_size
+        self.fields = [queryset.model._meta.get_field(name) for name in self.keyset]
+
+    def _encode(self, direction, row):
+        values = [field.value_to_string(row) for field in self.fields]
+        return base64.urlsafe_b64encode(json.dumps([direction] + values).encode()).decode()
+
+    def _decode(self, cursor):
+        try:
+            direction, *values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if direction not in ('next', 'prev') or len(values) != len(self.fields):
+                raise ValueError
+            return direction, [field.to_python(value) for field, value in zip(self.fields, values)]
+        except Exception:
+            raise ValueError("Invalid cursor.")
+
+    def _seek(self, values, older):
+        # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y)
+        lookup = 'lt' if older else 'gt'
+        condition = Q()
+        for position, name in enumerate(self.keyset):
+            equal = {prefix: values[i] for i, prefix in enumerate(self.keyset[:position])}
+            condition |= Q(**equal, **{f'{name}__{lookup}': values[position]})
+        return condition
+
+    def page(self, cursor=None):
+        """
+        Return (rows, next_cursor, previous_cursor) for the page after/before
+        ``cursor`` (the first page when no cursor is given). Raises ValueError
+        for a malformed cursor.
+        """
+        newest_first = [f'-{name}' for name in self.keyset]
+        oldest_first = list(self.keyset)
+        direction, values = self._decode(cursor) if cursor else ('next', None)
+
+        if direction == 'next':
+            queryset = self.queryset.order_by(*newest_first)
+            if values is not None:
+                queryset = queryset.filter(self._seek(values, older=True))
+        else:
+            queryset = self.queryset.order_by(*oldest_first).filter(self._seek(values, older=False))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if direction == 'prev':
+            rows.reverse()
+
+        if not rows:
+            return rows, None, None
+        has_next = has_more if direction == 'next' else True
+        has_previous = values is not None if direction == 'next' else has_more
+        next_cursor = self._encode('next', rows[-1]) if has_next else None
+        previous_cursor = self._encode('prev', rows[0]) if has_previous else None
+        return rows, next_cursor, previous_cursor
+
+
+class KeysetPagination(BasePagination):
+    """DRF pagination on top of KeysetPaginator: ?cursor=...&page_size=..."""
+    keyset = ('id',)
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        paginator = KeysetPaginator(queryset, self.keyset, get_page_size(request.query_params))
+        try:
+            rows, self.next_cursor, self.previous_cursor = paginator.page(
+                request.query_params.get(self.cursor_query_param)
+            )
+        except ValueError as exc:
+            raise NotFound(str(exc))
+        return rows
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._link(self.next_cursor),
+            'previous': self._link(self.previous_cursor),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class AttendanceKeysetPagination(KeysetPagination):
+    keyset = ('date', 'id')
@@ -0,0 +1,108 @@
+# Ams_app/payroll.py
+
+import numpy as np
+from .models import Attendance
+from .shifts import ShiftResolver, shift_table
+from .worktime import DAY_SECONDS, signed_gap
+
+MISSING = -1
+
+TOTAL_FIELDS = ['days_present', 'worked_seconds', 'late_seconds', 'early_leave_seconds', 'overtime_seconds']
+
+
+def _seconds(value):
+    """Seconds since midnight for a time, or MISSING for None."""
+    if value is None:
+        return MISSING
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def load_attendance(start_date, end_date, user_ids=None):
+    """
+    Attendance between two dates (inclusive) as a dict of NumPy arrays, one
+    entry per row: user ids, date ordinals, check-in/check-out and the start/end
+    of the shift the user worked that day (assignment, rotation or default),
+    all times in seconds since midnight (MISSING when empty).
+    """
+    attendance = Attendance.objects.filter(date__range=(start_date, end_date))
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        attendance = attendance.filter(user_id__in=user_ids)
+    rows = list(attendance.order_by().values_list(
+        'user_id', 'date', 'check_in', 'check_out'
+    ).iterator(chunk_size=5000))
+
+    count = len(rows)
+    shifts = [None] * count
+    if rows:
+        resolver = ShiftResolver(user_ids, start_date, end_date)
+        shifts = [shift_table.get(resolver.shift_id(row[0], row[1])) for row in rows]
+    return {
+        'user': np.fromiter((row[0] for row in rows), dtype=np.int64, count=count),
+        'date': np.fromiter((row[1].toordinal() for row in rows), dtype=np.int64, count=count),
+        'month': np.fromiter((row[1].year * 12 + row[1].month - 1 for row in rows), dtype=np.int64, count=count),
+        'check_in': np.fromiter((_seconds(row[2]) for row in rows), dtype=np.int64, count=count),
+        'check_out': np.fromiter((_seconds(row[3]) for row in rows), dtype=np.int64, count=count),
+        'shift_start': np.fromiter((_seconds(shift and shift.start_time) for shift in shifts), dtype=np.int64, count=count),
+        'shift_end': np.fromiter((_seconds(shift and shift.end_time) for shift in shifts), dtype=np.int64, count=count),
+    }
+
+
+def compute_row_metrics(arrays):
+    """
+    Per-row worked, late, early-leave and overtime seconds in one vectorized
+    pass. A check-out earlier than the check-in is taken to be the next day,
+    as Attendance.get_total_hours does. Late/early/overtime are zero for rows
+    whose user has no shift.
+    """
+    check_in, check_out = arrays['check_in'], arrays['check_out']
+    shift_start, shift_end = arrays['shift_start'], arrays['shift_end']
+
+    punched_in = check_in != MISSING
+    complete = punched_in & (check_out != MISSING)
+    has_shift = shift_start != MISSING
+
+    worked = np.where(complete, (check_out - check_in) % DAY_SECONDS, 0)
+    late = np.where(punched_in & has_shift, np.maximum(signed_gap(check_in, shift_start), 0), 0)
+    early = np.where(complete & has_shift, np.maximum(signed_gap(shift_end, check_out), 0), 0)
+    shift_length = (shift_end - shift_start) % DAY_SECONDS
+    overtime = np.where(complete & has_shift, np.maximum(worked - shift_length, 0), 0)
+
+    return {
+        'days_present': punched_in.astype(np.int64),
+        'worked_seconds': worked,
+        'late_seconds': late,
+        'early_leave_seconds': early,
+        'overtime_seconds': overtime,
+    }
+
+
+def monthly_totals(arrays):
+    """
+    Sum the per-row metrics per (user, month). Returns a list of dicts with
+    user_id, year, month and the TOTAL_FIELDS, ordered by user then month.
+    """
+    if not len(arrays['user']):
+        return []
+    metrics = compute_row_metrics(arrays)
+
+    # One group id per distinct (user, month) pair, then one bincount per metric
+    keys = np.stack([arrays['user'], arrays['month']], axis=1)
+    groups, group_of_row = np.unique(keys, axis=0, return_inverse=True)
+    group_of_row = group_of_row.ravel()
+    sums = {
+        field: np.bincount(group_of_row, weights=values, minlength=len(groups)).astype(np.int64)
+        for field, values in metrics.items()
+    }
+
+    totals = []
+    for index, (user_id, month) in enumerate(groups.tolist()):
+        row = {'user_id': user_id, 'year': month // 12, 'month': month % 12 + 1}
+        row.update({field: int(sums[field][index]) for field in TOTAL_FIELDS})
+        totals.append(row)
+    return totals
+
+
+def payroll_totals(start_date, end_date, user_ids=None):
+    """Monthly worked/late/early-leave/overtime totals for users between two dates."""
+    return monthly_totals(load_attendance(start_date, end_date, user_ids))
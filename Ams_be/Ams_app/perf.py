@@ -0,0 +1,125 @@
+# Ams_app/perf.py
+
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+ENABLED = getattr(settings, 'AMS_PERF_MIDDLEWARE', False)
+# Requests slower than this log their slowest statements with EXPLAIN
+SLOW_REQUEST_MS = getattr(settings, 'AMS_PERF_SLOW_MS', 500)
+SLOW_QUERIES_LOGGED = getattr(settings, 'AMS_PERF_SLOW_QUERIES', 5)
+
+# Timings of the request being handled in this thread/task (None outside one)
+_current = ContextVar('ams_request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []  # (milliseconds, alias, sql, params)
+        self.template_ms = 0.0
+
+    @property
+    def db_ms(self):
+        return sum(query[0] for query in self.queries)
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.queries.append((elapsed, context['connection'].alias, sql, None if many else params))
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_ms += (time.perf_counter() - started) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with render time added to the current request's timings."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+def _explain(alias, sql, params):
+    connection = connections[alias]
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return "(not explained)"
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+    except Exception as exc:
+        return f"(EXPLAIN failed: {exc})"
+
+
+class PerformanceMiddleware:
+    """
+    Per-request wall time, DB time, query count and template render time,
+    sent back as a Server-Timing header. Requests over AMS_PERF_SLOW_MS log
+    their slowest statements with EXPLAIN output to the 'Ams_app.perf'
+    logger (a rotating file, see LOGGING in settings).
+
+    Off unless AMS_PERF_MIDDLEWARE is True. It is a sync middleware, so when
+    on, async views are run through Django's sync adapter; use it to
+    diagnose, not for the punch burst.
+    """
+
+    def __init__(self, get_response):
+        if not ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        total_ms = (time.perf_counter() - timings.started) * 1000
+        response['Server-Timing'] = ", ".join([
+            f"total;dur={total_ms:.1f}",
+            f'db;dur={timings.db_ms:.1f};desc="{len(timings.queries)} queries"',
+            f"tpl;dur={timings.template_ms:.1f}",
+        ])
+        if total_ms >= SLOW_REQUEST_MS:
+            self.log_slow_request(request, total_ms, timings)
+        return response
+
+    def log_slow_request(self, request, total_ms, timings):
+        slowest = sorted(timings.queries, key=lambda query: query[0], reverse=True)[:SLOW_QUERIES_LOGGED]
+        lines = [
+            f"{request.method} {request.get_full_path()} took {total_ms:.1f}ms "
+            f"(db {timings.db_ms:.1f}ms in {len(timings.queries)} queries, templates {timings.template_ms:.1f}ms)"
+        ]
+        for elapsed, alias, sql, params in slowest:
+            # Params stay out of the log (session keys, emails); EXPLAIN still uses them
+            lines.append(f"  {elapsed:.1f}ms [{alias}] {sql}")
+            lines.extend(f"    {line}" for line in _explain(alias, sql, params).splitlines())
+        logger.warning("\n".join(lines))
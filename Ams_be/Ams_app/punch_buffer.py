@@ -0,0 +1,296 @@
+# Ams_app/punch_buffer.py
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .metrics import PUNCHES
+from .models import Attendance
+from .punches import ingest_punches, record_punch
+from .today import today_cache
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: acknowledge punches once they are on local disk and write them to
+# Attendance in batches from a background thread
+ENABLED = getattr(settings, 'AMS_PUNCH_BUFFER', False)
+PATH = getattr(settings, 'AMS_PUNCH_BUFFER_PATH', os.path.join(settings.BASE_DIR, 'punch_buffer.sqlite3'))
+# Flush every N milliseconds, or sooner once M punches are waiting
+FLUSH_INTERVAL_MS = getattr(settings, 'AMS_PUNCH_BUFFER_FLUSH_MS', 200)
+FLUSH_BATCH = getattr(settings, 'AMS_PUNCH_BUFFER_BATCH', 500)
+# A batch claimed by a flusher that dies is picked up again after this long
+LEASE_SECONDS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS punches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    punched_at TEXT NOT NULL,
+    claimed_until REAL
+);
+CREATE INDEX IF NOT EXISTS punches_user_day ON punches (user_id, day);
+-- Bumped with every batch deleted after a flush
+CREATE TABLE IF NOT EXISTS flushes (id INTEGER PRIMARY KEY CHECK (id = 1), generation INTEGER NOT NULL);
+INSERT OR IGNORE INTO flushes (id, generation) VALUES (1, 0);
+"""
+
+
+class PunchBuffer:
+    """
+    Durable punch queue in a local SQLite file (WAL mode, fsync on commit).
+
+    Punches are appended and acknowledged right away. A flusher thread in
+    every process claims batches with a short lease, writes them with
+    ingest_punches() and deletes them once the write has committed. Rows
+    left behind by a crash (never claimed, or claimed by a dead flusher)
+    are claimed again on the next run, and ingest_punches() is idempotent,
+    so a batch written twice gives the same Attendance rows.
+    """
+
+    def __init__(self, path, autostart=True):
+        self.path = path
+        self.autostart = autostart
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._pid = None
+        self._since_flush = 0
+
+    # ----- Local queue ----- #
+    def _db(self):
+        # One connection per thread and per process (never across a fork)
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=FULL")
+            db.executescript(_SCHEMA)
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def pending(self, user_id, day):
+        """Buffered (direction, datetime) punches of a user for a day, oldest first."""
+        rows = self._db().execute(
+            "SELECT direction, punched_at FROM punches WHERE user_id = ? AND day = ? ORDER BY id",
+            (user_id, day.isoformat()),
+        )
+        return [(direction, parse_datetime(punched_at)) for direction, punched_at in rows]
+
+    def _generation(self):
+        return self._db().execute("SELECT generation FROM flushes").fetchone()[0]
+
+    def append(self, user_id, direction, when, load=None):
+        """
+        Queue a punch if it applies on top of the stored attendance (load()
+        returns today's Attendance row, or None) and the punches already
+        buffered for the day. 'toggle' resolves to 'in' or 'out' here.
+        Returns the resulting view of today's attendance, or None when the
+        punch does not apply.
+        """
+        db = self._db()
+        day = when.date()
+        # Read the stored row before taking the write lock, so no other tap
+        # or flusher waits on the database read
+        generation = self._generation()
+        stored = load() if load is not None else None
+        # IMMEDIATE takes the write lock up front, so concurrent taps from
+        # any process see each other's punches before deciding
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # A flusher deletes its batch only after ingest_punches() committed,
+            # and deleting needs this lock. If a batch was deleted since the
+            # read, its punches may be neither pending nor in the row read:
+            # read the row again, under the lock this time (rare)
+            if load is not None and self._generation() != generation:
+                stored = load()
+            current = overlay(stored, user_id, day, self.pending(user_id, day))
+            check_in = current.check_in if current else None
+            check_out = current.check_out if current else None
+            if direction == 'toggle':
+                direction = 'in' if check_in is None else 'out'
+            if (direction == 'in' and check_in is not None) or (
+                direction == 'out' and (check_in is None or check_out is not None)
+            ):
+                db.execute("ROLLBACK")
+                return None
+            db.execute(
+                "INSERT INTO punches (user_id, day, direction, punched_at) VALUES (?, ?, ?, ?)",
+                (user_id, day.isoformat(), direction, when.isoformat()),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+
+        PUNCHES.inc(direction=direction)
+        self._since_flush += 1
+        if self._since_flush >= FLUSH_BATCH:
+            self._wake.set()
+        return overlay(current, user_id, day, [(direction, when)])
+
+    def size(self):
+        return self._db().execute("SELECT COUNT(*) FROM punches").fetchone()[0]
+
+    # ----- Flushing ----- #
+    def _claim(self, limit):
+        db = self._db()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = db.execute(
+                "SELECT id, user_id, direction, punched_at FROM punches "
+                "WHERE claimed_until IS NULL OR claimed_until < ? ORDER BY id LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            db.executemany(
+                "UPDATE punches SET claimed_until = ? WHERE id = ?",
+                [(now + LEASE_SECONDS, row[0]) for row in rows],
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return rows
+
+    def flush(self, limit=FLUSH_BATCH):
+        """Write one batch of buffered punches to Attendance. Returns how many were flushed."""
+        rows = self._claim(limit)
+        if not rows:
+            return 0
+        ids = [(row[0],) for row in rows]
+        events = [
+            {'user': user_id, 'direction': direction, 'timestamp': punched_at}
+            for _, user_id, direction, punched_at in rows
+        ]
+        try:
+            results = ingest_punches(events)
+        except Exception:
+            # Leave the rows for the next attempt
+            self._db().executemany("UPDATE punches SET claimed_until = NULL WHERE id = ?", ids)
+            raise
+        for result in results:
+            if result['result'] == 'error':
+                logger.warning("Dropped buffered punch %s: %s", events[result['index']], result['error'])
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany("DELETE FROM punches WHERE id = ?", ids)
+            db.execute("UPDATE flushes SET generation = generation + 1")
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def drain(self):
+        """Flush until nothing claimable is left. Returns the number of punches flushed."""
+        total = 0
+        while True:
+            flushed = self.flush()
+            if not flushed:
+                return total
+            total += flushed
+
+    def _run(self):
+        while True:
+            self._wake.wait(FLUSH_INTERVAL_MS / 1000)
+            self._wake.clear()
+            self._since_flush = 0
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Punch buffer flush failed; retrying")
+                time.sleep(1)
+            finally:
+                close_old_connections()
+
+    def ensure_started(self):
+        """Start this process's flusher thread (again after a fork)."""
+        if not self.autostart or self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        waiting = self.size()
+        if waiting:
+            logger.info("Recovering %s buffered punches from %s", waiting, self.path)
+        threading.Thread(target=self._run, name='punch-buffer-flusher', daemon=True).start()
+
+
+def overlay(stored, user_id, day, punches):
+    """
+    Today's attendance as it will look once ``punches`` are flushed: the
+    earliest check-in and latest check-out win, as in ingest_punches().
+    Returns an unsaved copy (or ``stored`` itself when nothing is pending).
+    """
+    if not punches:
+        return stored
+    if stored is None:
+        result = Attendance(user_id=user_id, date=day)
+    else:
+        result = Attendance(
+            id=stored.id, user_id=stored.user_id, date=stored.date,
+            check_in=stored.check_in, check_out=stored.check_out, status=stored.status,
+        )
+    for direction, moment in punches:
+        punch_time = timezone.localtime(moment).time()
+        if direction == 'in':
+            result.check_in = punch_time if result.check_in is None else min(result.check_in, punch_time)
+        else:
+            result.check_out = punch_time if result.check_out is None else max(result.check_out, punch_time)
+    result.status = 'Present'
+    return result
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = PunchBuffer(PATH)
+    _buffer.ensure_started()
+    return _buffer
+
+
+def punch(user_id, direction='toggle', when=None):
+    """
+    Record a punch: straight to the database with record_punch(), or through
+    the write-behind buffer when AMS_PUNCH_BUFFER is on. Either way returns
+    today's attendance as the user should see it, or None when the punch
+    does not apply. The result is written through to the today cache.
+    """
+    if not ENABLED:
+        return record_punch(user_id, direction, when)
+    when = timezone.localtime(when)
+    attendance = get_buffer().append(
+        user_id, direction, when, lambda: Attendance.objects.filter(user_id=user_id, date=when.date()).first()
+    )
+    if attendance is not None:
+        today_cache.put(attendance)
+    return attendance
+
+
+def today_attendance(user_id):
+    """
+    Today's attendance for a user as a TodayState (None when there is none
+    yet), including punches still in the buffer. Served from the today
+    cache; only a miss reads the database.
+    """
+    today = timezone.localdate()
+
+    def load():
+        stored = Attendance.objects.filter(user_id=user_id, date=today).first()
+        if not ENABLED:
+            return stored
+        return overlay(stored, user_id, today, get_buffer().pending(user_id, today))
+
+    return today_cache.get(user_id, today, load)
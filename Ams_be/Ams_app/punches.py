@@ -0,0 +1,248 @@
+# Ams_app/punches.py
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .metrics import PUNCHES
+from .models import Attendance, User
+from .shifts import ShiftResolver, shift_table, shift_times
+from .summaries import mark_dirty
+from .today import today_cache
+
+DIRECTIONS = ('in', 'out')
+
+# Largest batch a device may send in one request, and how many rows go into
+# a single INSERT statement when writing it.
+MAX_BATCH_SIZE = getattr(settings, 'AMS_PUNCH_BATCH_LIMIT', 10000)
+WRITE_CHUNK_SIZE = 1000
+
+
+# Conditional part of the upsert for each kind of punch. 'toggle' checks in
+# when there is no check-in yet and checks out otherwise, like the API does.
+_CONFLICT_UPDATES = {
+    'in': (
+        "SET {check_in} = EXCLUDED.{check_in}, {status} = EXCLUDED.{status} "
+        "WHERE {table}.{check_in} IS NULL"
+    ),
+    'toggle': (
+        "SET {check_in} = COALESCE({table}.{check_in}, EXCLUDED.{check_in}), "
+        "{check_out} = CASE WHEN {table}.{check_in} IS NULL THEN NULL ELSE EXCLUDED.{check_in} END, "
+        "{status} = EXCLUDED.{status} "
+        "WHERE {table}.{check_out} IS NULL"
+    ),
+}
+
+
+def _punch_sql(direction):
+    quote = connection.ops.quote_name
+    names = {
+        'table': quote(Attendance._meta.db_table),
+        'id': quote('id'),
+        'user_id': quote('user_id'),
+        'date': quote('date'),
+        'check_in': quote('check_in'),
+        'check_out': quote('check_out'),
+        'status': quote('status'),
+        'worked_seconds': quote('worked_seconds'),
+        'late_seconds': quote('late_seconds'),
+        'overtime_seconds': quote('overtime_seconds'),
+    }
+    returning = (
+        "RETURNING {id}, {user_id}, {date}, {check_in}, {check_out}, {status}, "
+        "{worked_seconds}, {late_seconds}, {overtime_seconds}"
+    )
+    if direction == 'out':
+        # Checking out never creates a row: it needs an open check-in
+        sql = (
+            "UPDATE {table} SET {check_out} = %s "
+            "WHERE {user_id} = %s AND {date} = %s "
+            "AND {check_in} IS NOT NULL AND {check_out} IS NULL "
+        )
+    else:
+        sql = (
+            "INSERT INTO {table} ({user_id}, {date}, {check_in}, {status}) "
+            "VALUES (%s, %s, %s, %s) "
+            "ON CONFLICT ({user_id}, {date}) DO UPDATE " + _CONFLICT_UPDATES[direction] + " "
+        )
+    return (sql + returning).format(**names)
+
+
+def record_punch(user_id, direction='toggle', when=None):
+    """
+    Record a check-in ('in'), check-out ('out') or the next expected punch
+    ('toggle') for a user with a single conditional upsert statement.
+
+    Returns the attendance row as stored after the punch, or None when the
+    punch was not applicable (already checked in, no open check-in, or the
+    day is already complete). Concurrent punches are serialised by the
+    (user, date) unique key, so two taps can never create duplicate rows.
+    """
+    if direction not in DIRECTIONS + ('toggle',):
+        raise ValueError("Direction must be 'in', 'out' or 'toggle'.")
+
+    when = timezone.localtime(when)
+    punch_date = connection.ops.adapt_datefield_value(when.date())
+    punch_time = connection.ops.adapt_timefield_value(when.time())
+    if direction == 'out':
+        params = [punch_time, user_id, punch_date]
+    else:
+        params = [user_id, punch_date, punch_time, 'Present']
+
+    # The closing punch and its worked seconds commit together. No savepoint:
+    # inside a caller's transaction this only adds to it.
+    with transaction.atomic(savepoint=False):
+        rows = list(Attendance.objects.raw(_punch_sql(direction), params))
+        if not rows:
+            return None
+        if rows[0].check_out is not None:
+            # The punch closed the day: store its worked/late/overtime seconds
+            # against the shift worked that day (assignment, rotation or default)
+            rows[0].set_work_seconds()
+            Attendance.objects.filter(pk=rows[0].pk).update(
+                **{field: getattr(rows[0], field) for field in Attendance.WORKTIME_FIELDS}
+            )
+        # Recounted in the background, off the punch's path
+        mark_dirty([rows[0].date])
+        transaction.on_commit(lambda: today_cache.put(rows[0]))
+    # A toggle that went through either opened the day or closed it
+    PUNCHES.inc(direction='out' if direction == 'out' or rows[0].check_out else 'in')
+    return rows[0]
+
+
+def _parse_event(event):
+    """Return (user_id, local datetime, direction) or raise ValueError."""
+    if not isinstance(event, dict):
+        raise ValueError("Event must be an object.")
+
+    direction = event.get('direction')
+    if direction not in DIRECTIONS:
+        raise ValueError("Direction must be 'in' or 'out'.")
+
+    try:
+        user_id = int(event.get('user'))
+    except (TypeError, ValueError):
+        raise ValueError("User must be a user id.")
+
+    timestamp = event.get('timestamp')
+    moment = parse_datetime(timestamp) if isinstance(timestamp, str) else None
+    if moment is None:
+        raise ValueError("Timestamp must be an ISO 8601 datetime.")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+
+    return user_id, timezone.localtime(moment), direction
+
+
+def ingest_punches(events):
+    """
+    Record a batch of device punches with set-based writes.
+
+    Punches are grouped per (user, date): the earliest 'in' becomes the
+    check-in and the latest 'out' becomes the check-out, merged with whatever
+    is already stored. An 'out' for a day with no check-in, neither stored
+    nor in the batch, is an error, as in record_punch(). The batch is written with chunked upserts on the
+    (user, date) unique key inside one transaction.
+
+    Returns one result dict per event, in the order the events were given.
+    """
+    results = [None] * len(events)
+    parsed = []
+    for index, event in enumerate(events):
+        try:
+            parsed.append((index,) + _parse_event(event))
+        except ValueError as exc:
+            results[index] = {'index': index, 'result': 'error', 'error': str(exc)}
+
+    user_ids = {user_id for _, user_id, _, _ in parsed}
+    active = set(User.objects.filter(id__in=user_ids, is_active=True).values_list('id', flat=True))
+
+    # Earliest check-in and latest check-out per (user, date)
+    punches = {}
+    for index, user_id, moment, direction in parsed:
+        if user_id not in active:
+            results[index] = {'index': index, 'result': 'error', 'error': "Unknown or inactive user."}
+            continue
+        key = (user_id, moment.date())
+        check_in, check_out = punches.get(key, (None, None))
+        punch_time = moment.time()
+        if direction == 'in':
+            check_in = punch_time if check_in is None else min(check_in, punch_time)
+        else:
+            check_out = punch_time if check_out is None else max(check_out, punch_time)
+        punches[key] = (check_in, check_out)
+
+    outcomes = {}
+    final = {}
+    orphaned = set()
+    with transaction.atomic():
+        existing = {}
+        if punches:
+            punch_users = {user_id for user_id, _ in punches}
+            dates = [punch_date for _, punch_date in punches]
+            rows = Attendance.objects.select_for_update().filter(
+                user_id__in=punch_users, date__range=(min(dates), max(dates)),
+            ).order_by()
+            existing = {(row.user_id, row.date): row for row in rows}
+            # The shift each user works on each day, for the worked/late/overtime seconds
+            resolver = ShiftResolver(punch_users, min(dates), max(dates))
+
+        to_write = []
+        for key, (check_in, check_out) in punches.items():
+            row = existing.get(key)
+            if check_in is None and (row is None or row.check_in is None):
+                orphaned.add(key)
+                continue
+            if row is None:
+                row = Attendance(user_id=key[0], date=key[1], status='Present')
+                outcomes[key] = 'created'
+            else:
+                outcomes[key] = 'unchanged'
+
+            before = (row.check_in, row.check_out, row.status)
+            if check_in is not None:
+                row.check_in = check_in if row.check_in is None else min(row.check_in, check_in)
+            if check_out is not None:
+                row.check_out = check_out if row.check_out is None else max(row.check_out, check_out)
+            row.status = 'Present'
+
+            if outcomes[key] == 'unchanged' and before != (row.check_in, row.check_out, row.status):
+                outcomes[key] = 'updated'
+            if outcomes[key] != 'unchanged':
+                row.set_work_seconds(shift_times(shift_table.get(resolver.shift_id(*key))))
+                to_write.append(row)
+            final[key] = row
+
+        Attendance.objects.bulk_create(
+            to_write,
+            batch_size=WRITE_CHUNK_SIZE,
+            update_conflicts=True,
+            unique_fields=['user', 'date'],
+            update_fields=['check_in', 'check_out', 'status', *Attendance.WORKTIME_FIELDS],
+        )
+        mark_dirty(row.date for row in to_write)
+
+        # Like the summaries, the cache only hears about the batch once it is committed
+        def write_through():
+            for row in to_write:
+                today_cache.put(row)
+        transaction.on_commit(write_through)
+
+    for index, user_id, moment, direction in parsed:
+        if results[index] is not None:
+            continue
+        key = (user_id, moment.date())
+        if key in orphaned:
+            results[index] = {'index': index, 'result': 'error', 'error': "No check-in to check out from."}
+            continue
+        row = final[key]
+        stored = row.check_in if direction == 'in' else row.check_out
+        outcome = outcomes[key] if stored == moment.time() else 'ignored'
+        results[index] = {
+            'index': index,
+            'user': user_id,
+            'date': key[1].isoformat(),
+            'direction': direction,
+            'result': outcome,
+        }
+    return results
@@ -0,0 +1,92 @@
+# Ams_app/reconcile.py
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from .models import Attendance, LeaveRequest, User
+from .summaries import rebuild_daily_summaries
+from .today import today_cache
+from .workdays import calendar
+
+
+def _insert_missing_sql():
+    # One row for every active user without attendance on the day: On Leave
+    # when an approved leave covers it, the fallback status otherwise
+    quote = connection.ops.quote_name
+    names = {
+        'attendance': quote(Attendance._meta.db_table),
+        'users': quote(User._meta.db_table),
+        'leaves': quote(LeaveRequest._meta.db_table),
+        'id': quote('id'),
+        'user_id': quote('user_id'),
+        'employee_id': quote('employee_id'),
+        'date': quote('date'),
+        'status': quote('status'),
+        'start_date': quote('start_date'),
+        'end_date': quote('end_date'),
+        'is_active': quote('is_active'),
+    }
+    return (
+        "INSERT INTO {attendance} ({user_id}, {date}, {status}) "
+        "SELECT {users}.{id}, %s, CASE WHEN EXISTS ("
+        "SELECT 1 FROM {leaves} WHERE {leaves}.{employee_id} = {users}.{id} AND {leaves}.{status} = %s "
+        "AND {leaves}.{start_date} <= %s AND {leaves}.{end_date} >= %s"
+        ") THEN %s ELSE %s END "
+        "FROM {users} WHERE {users}.{is_active} = %s AND NOT EXISTS ("
+        "SELECT 1 FROM {attendance} WHERE {attendance}.{user_id} = {users}.{id} AND {attendance}.{date} = %s"
+        ") "
+        "ON CONFLICT ({user_id}, {date}) DO NOTHING"
+    ).format(**names)
+
+
+def reconcile_day(day):
+    """
+    Give every active user a final Attendance status for ``day``. Rows with
+    a check-in stay Present. Days without a check-in become:
+
+    - Holiday on a Holiday;
+    - On Leave on a working day covered by an approved LeaveRequest;
+    - Absent on any other working day.
+
+    Weekends get no new rows. Everything runs as a few set-based statements
+    in one transaction, then the day's summaries are rebuilt. Returns
+    {'inserted': n, 'updated': n, 'statuses': {status: count}}.
+    """
+    holiday = calendar.is_holiday(day)
+    if not holiday and not calendar.is_working_day(day):
+        return {'inserted': 0, 'updated': 0, 'statuses': {}}
+
+    adapt = connection.ops.adapt_datefield_value
+    unpunched = Attendance.objects.filter(date=day, check_in__isnull=True)
+    on_leave = LeaveRequest.objects.filter(
+        status='Approved', start_date__lte=day, end_date__gte=day
+    ).values('employee_id')
+
+    with transaction.atomic():
+        if holiday:
+            updated = unpunched.filter(status__in=['Present', 'Absent']).update(status='Holiday')
+            on_leave_status = fallback = 'Holiday'
+        else:
+            # Rows opened without a punch, or marked before the leave was approved
+            updated = unpunched.filter(user_id__in=on_leave).exclude(status='On Leave').update(status='On Leave')
+            updated += unpunched.filter(status__in=['Present', 'Holiday']).exclude(
+                user_id__in=on_leave
+            ).update(status='Absent')
+            on_leave_status, fallback = 'On Leave', 'Absent'
+
+        with connection.cursor() as cursor:
+            cursor.execute(_insert_missing_sql(), [
+                adapt(day), 'Approved', adapt(day), adapt(day), on_leave_status, fallback, True, adapt(day),
+            ])
+            inserted = cursor.rowcount
+
+        rebuild_daily_summaries(day, day)
+
+    if day == timezone.localdate():
+        # The updates above skip the write-through signals
+        today_cache.clear()
+
+    statuses = dict(
+        Attendance.objects.filter(date=day).values_list('status').annotate(count=Count('id')).order_by()
+    )
+    return {'inserted': inserted, 'updated': updated, 'statuses': statuses}
@@ -0,0 +1,71 @@
+# Ams_app/reports.py
+
+from calendar import monthrange
+from datetime import date, timedelta
+from django.db import transaction
+from django.utils import timezone
+from .models import LeaveRequest, MonthlyAttendanceReport
+from .payroll import TOTAL_FIELDS, payroll_totals
+from .workdays import WEEKEND_DAYS, calendar
+
+REPORT_FIELDS = ['working_days', 'holiday_days', 'leave_days', 'generated_at'] + TOTAL_FIELDS
+
+
+def month_bounds(year, month):
+    """First and last day of a month."""
+    return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+
+
+def _leave_days(user_ids, start, end):
+    """Approved leave per user and leave type, counted in working days inside [start, end]."""
+    leaves = LeaveRequest.objects.filter(
+        employee_id__in=user_ids, status='Approved', start_date__lte=end, end_date__gte=start,
+    ).values_list('employee_id', 'leave_type', 'start_date', 'end_date')
+
+    days = {}
+    for user_id, leave_type, leave_start, leave_end in leaves.iterator(chunk_size=2000):
+        taken = calendar.working_days_between(max(leave_start, start), min(leave_end, end))
+        per_type = days.setdefault(user_id, {})
+        per_type[leave_type] = per_type.get(leave_type, 0) + taken
+    return days
+
+
+def build_monthly_reports(user_ids, year, month):
+    """
+    Build and upsert the MonthlyAttendanceReport rows of one batch of users
+    for a month: four queries to read (attendance, the users' shifts and
+    shift assignments, leave) and one bulk upsert to write. The holiday
+    calendar and the Shift table are cached per process, so they are read
+    once, not per batch. Returns the number of rows written.
+    """
+    start, end = month_bounds(year, month)
+    working_days = calendar.working_days_between(start, end)
+    weekdays = sum(
+        1 for offset in range((end - start).days + 1)
+        if (start + timedelta(days=offset)).weekday() not in WEEKEND_DAYS
+    )
+
+    totals = {row['user_id']: row for row in payroll_totals(start, end, user_ids)}
+    leave_days = _leave_days(user_ids, start, end)
+    generated_at = timezone.now()
+
+    reports = []
+    for user_id in user_ids:
+        values = totals.get(user_id, {})
+        reports.append(MonthlyAttendanceReport(
+            user_id=user_id, year=year, month=month,
+            working_days=working_days,
+            holiday_days=weekdays - working_days,
+            leave_days=leave_days.get(user_id, {}),
+            generated_at=generated_at,
+            **{field: values.get(field, 0) for field in TOTAL_FIELDS},
+        ))
+
+    with transaction.atomic():
+        MonthlyAttendanceReport.objects.bulk_create(
+            reports,
+            update_conflicts=True,
+            unique_fields=['user', 'year', 'month'],
+            update_fields=REPORT_FIELDS,
+        )
+    return len(reports)
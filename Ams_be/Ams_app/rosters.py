@@ -0,0 +1,84 @@
+# Ams_app/rosters.py
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from .models import UserShiftAssignment
+from .workdays import calendar
+
+# Largest roster (users x days) accepted in one request, and how many rows go
+# into a single INSERT statement when writing it
+MAX_ROSTER_ROWS = getattr(settings, 'AMS_ROSTER_LIMIT', 200000)
+WRITE_CHUNK_SIZE = 1000
+
+
+def roster_days(start_date, end_date, working_days_only=False):
+    """Dates between two dates (inclusive), optionally only working days."""
+    days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    if working_days_only:
+        days = [day for day in days if calendar.is_working_day(day)]
+    return days
+
+
+def plan_roster(user_ids, days, shift_ids, days_per_shift=1):
+    """
+    {(user id, date): shift id} for every user on every day. With several
+    shift ids the roster rotates through them in order, moving to the next
+    shift every ``days_per_shift`` calendar days counted from the first day.
+    """
+    if not days:
+        return {}
+    first = days[0]
+    shift_of_day = {
+        day: shift_ids[(day - first).days // days_per_shift % len(shift_ids)] for day in days
+    }
+    return {(user_id, day): shift_of_day[day] for user_id in user_ids for day in days}
+
+
+def assign_roster(user_ids, start_date, end_date, shift_ids, days_per_shift=1, working_days_only=False):
+    """
+    Assign shifts to a set of users over a date range in one transaction:
+    one read of the existing assignments, then chunked upserts on the
+    (user, date) unique key for the rows that are new or change shift.
+
+    Returns {'created': n, 'updated': n, 'unchanged': n}.
+    """
+    if not shift_ids:
+        raise ValueError("Give at least one shift.")
+    if days_per_shift < 1:
+        raise ValueError("Days per shift must be at least 1.")
+    if end_date < start_date:
+        raise ValueError("End date cannot be before start date.")
+
+    user_ids = sorted(set(user_ids))
+    days = roster_days(start_date, end_date, working_days_only)
+    if len(user_ids) * len(days) > MAX_ROSTER_ROWS:
+        raise ValueError(f"A roster can contain at most {MAX_ROSTER_ROWS} assignments.")
+    planned = plan_roster(user_ids, days, shift_ids, days_per_shift)
+
+    counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+    with transaction.atomic():
+        existing = {
+            (user_id, day): shift_id
+            for user_id, day, shift_id in UserShiftAssignment.objects.select_for_update().filter(
+                user_id__in=user_ids, date__range=(start_date, end_date)
+            ).order_by().values_list('user_id', 'date', 'shift_id').iterator(chunk_size=5000)
+        }
+
+        to_write = []
+        for (user_id, day), shift_id in planned.items():
+            current = existing.get((user_id, day))
+            if current == shift_id:
+                counts['unchanged'] += 1
+                continue
+            counts['created' if current is None else 'updated'] += 1
+            to_write.append(UserShiftAssignment(user_id=user_id, date=day, shift_id=shift_id))
+
+        UserShiftAssignment.objects.bulk_create(
+            to_write,
+            batch_size=WRITE_CHUNK_SIZE,
+            update_conflicts=True,
+            unique_fields=['user', 'date'],
+            update_fields=['shift'],
+        )
+    return counts
@@ -1,7 +1,8 @@
 # Ams_app/serializers.py
 
 from rest_framework import serializers
-from .models import Attendance, Shift, Holiday, LeaveRequest, User, UserShiftAssignment
+from .leaves import MAX_DECISION_BATCH
+from .models import Attendance, Shift, ShiftRotation, Holiday, LeaveRequest, User, UserShiftAssignment, DailyAttendanceSummary
 
 # ---------- User Serializer ----------
 
@@ -33,6 +34,17 @@ class AttendanceReportSerializer(serializers.ModelSerializer):
         fields = ['date', 'check_in', 'check_out', 'status']
 
 
+class DailyAttendanceSummarySerializer(serializers.ModelSerializer):
+    shift_name = serializers.CharField(source='shift.name', read_only=True, default=None)
+
+    class Meta:
+        model = DailyAttendanceSummary
+        fields = [
+            'date', 'shift', 'shift_name', 'present_count', 'absent_count', 'on_leave_count', 'holiday_count',
+            'worked_seconds',
+        ]
+
+
 # ---------- Leave Request Serializer ----------
 
 class LeaveRequestSerializer(serializers.ModelSerializer):
@@ -53,11 +65,17 @@ class LeaveRequestApproveSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         request = self.context.get('request')
         if validated_data.get('status') == 'Approved':
-            if instance.employee == request.user:
+            if instance.employee_id == request.user.id:
                 raise serializers.ValidationError("Employees can't approve their own leave.")
-            instance.approved_by = request.user
+            instance.approved_by_id = request.user.id
         return super().update(instance, validated_data)
 
+
+class LeaveDecisionSerializer(serializers.Serializer):
+    """Many pending leave requests to approve or reject in one call."""
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=MAX_DECISION_BATCH)
+    status = serializers.ChoiceField(choices=['Approved', 'Rejected'])
+
 # ---------- Shift Serializer ----------
 
 class ShiftSerializer(serializers.ModelSerializer):
@@ -75,7 +93,58 @@ class UserShiftAssignmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserShiftAssignment
         fields = ['id', 'user', 'date', 'shift', 'shift_id']
-        read_only_fields = ['user']
+
+
+class RosterSerializer(serializers.Serializer):
+    """A shift, or a rotation of shifts, for a set of users over a date range."""
+    users = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    # Rotated in the order given; one id assigns the same shift every day
+    shifts = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    days_per_shift = serializers.IntegerField(min_value=1, default=1)
+    working_days_only = serializers.BooleanField(default=False)
+
+    # Ids are checked with one query each, not one per id as PrimaryKeyRelatedField would
+    def validate_users(self, value):
+        found = set(User.objects.filter(id__in=value, is_active=True).values_list('id', flat=True))
+        missing = sorted(set(value) - found)
+        if missing:
+            raise serializers.ValidationError(f"Unknown or inactive users: {missing[:20]}")
+        return value
+
+    def validate_shifts(self, value):
+        found = set(Shift.objects.filter(id__in=value, is_active=True).values_list('id', flat=True))
+        missing = sorted(set(value) - found)
+        if missing:
+            raise serializers.ValidationError(f"Unknown or inactive shifts: {missing}")
+        return value
+
+    def validate(self, data):
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError("End date cannot be before start date.")
+        return data
+
+# ---------- Shift Rotation Serializers ----------
+
+class ShiftRotationSerializer(serializers.ModelSerializer):
+    member_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = ShiftRotation
+        fields = ['id', 'name', 'pattern', 'anchor_date', 'is_active', 'member_count']
+
+
+class RotationMembersSerializer(serializers.Serializer):
+    # Replaces the rotation's members; an empty list clears it
+    users = serializers.ListField(child=serializers.IntegerField())
+
+    def validate_users(self, value):
+        found = set(User.objects.filter(id__in=value).values_list('id', flat=True))
+        missing = sorted(set(value) - found)
+        if missing:
+            raise serializers.ValidationError(f"Unknown users: {missing[:20]}")
+        return value
 
 # ---------- Holiday Serializer ----------
 
@@ -0,0 +1,222 @@
+# Ams_app/shifts.py
+
+import threading
+import time
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from .models import Shift, ShiftRotation, User, UserShiftAssignment
+
+COMPACT_BATCH_SIZE = 5000
+# Seconds before the Shift table is re-read, so workers that missed a Shift
+# signal (other processes) catch up on their own
+RELOAD_AFTER = getattr(settings, 'AMS_SHIFT_CACHE_TTL', 300)
+
+
+class ShiftTable:
+    """
+    In-process copy of the Shift table, read with one query when first
+    needed and then answered from memory. Shift signals call invalidate() on
+    changes. The cached Shift instances are shared, so treat them as
+    read-only.
+    """
+
+    def __init__(self):
+        self._shifts = None
+        self._missing = set()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._shifts = None
+            self._missing = set()
+
+    def all(self):
+        """{shift id: Shift} for every shift."""
+        shifts = self._shifts
+        if shifts is not None and time.monotonic() - self._loaded_at < RELOAD_AFTER:
+            return shifts
+        return self._load()
+
+    def get(self, shift_id):
+        """The Shift with this id, or None (also for a None id)."""
+        if shift_id is None:
+            return None
+        shift = self.all().get(shift_id)
+        if shift is None and shift_id not in self._missing:
+            # Maybe created by another process since the last load. Ids still
+            # unknown after reloading (deleted shifts) are remembered until
+            # the next load, so they cost one query, not one per lookup.
+            shift = self._load().get(shift_id)
+            if shift is None:
+                self._missing.add(shift_id)
+        return shift
+
+    def _load(self):
+        shifts = {shift.id: shift for shift in Shift.objects.all()}
+        with self._lock:
+            self._shifts, self._missing, self._loaded_at = shifts, set(), time.monotonic()
+            self.loads += 1
+        return shifts
+
+
+shift_table = ShiftTable()
+
+
+def planned_shift_id(default_shift_id, rotation, day):
+    """
+    The shift a user works on a day without an explicit assignment: their
+    active rotation from its anchor date on (None on a day off), otherwise
+    their default shift. ``rotation`` is a (pattern, anchor date, is active)
+    tuple or None. Constant time, whatever the date.
+    """
+    if rotation is not None:
+        pattern, anchor_date, is_active = rotation
+        if is_active and day >= anchor_date:
+            return pattern[(day - anchor_date).days % len(pattern)]
+    return default_shift_id
+
+
+def effective_shift_id(user_id, day):
+    """
+    The shift id a user works on a day, or None: an explicit
+    UserShiftAssignment wins over the rotation, which wins over the user's
+    default shift. One query.
+    """
+    override = UserShiftAssignment.objects.filter(user_id=OuterRef('id'), date=day).values('shift_id')[:1]
+    row = User.objects.filter(id=user_id).annotate(override=Subquery(override)).values_list(
+        'override', 'shift_id', 'rotation__pattern', 'rotation__anchor_date', 'rotation__is_active'
+    ).first()
+    if row is None:
+        return None
+    override, default_shift_id, pattern, anchor_date, is_active = row
+    if override is not None:
+        return override
+    rotation = (pattern, anchor_date, is_active) if pattern else None
+    return planned_shift_id(default_shift_id, rotation, day)
+
+
+def effective_shift(user_id, day):
+    """The Shift a user works on a day, or None."""
+    return shift_table.get(effective_shift_id(user_id, day))
+
+
+def shift_times(shift):
+    """(start time, end time) of a Shift, or (None, None) without one."""
+    if shift is None:
+        return None, None
+    return shift.start_time, shift.end_time
+
+
+class ShiftResolver:
+    """
+    Effective shift ids for a set of users over a date range, following the
+    same precedence as effective_shift_id(). Two queries up front, the
+    users' default shift and rotation, and the explicit assignments in the
+    range, then every lookup is answered from memory. ``user_ids`` None
+    means every user.
+    """
+
+    def __init__(self, user_ids, start_date, end_date):
+        users = User.objects.all()
+        assignments = UserShiftAssignment.objects.filter(date__range=(start_date, end_date))
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            users = users.filter(id__in=user_ids)
+            assignments = assignments.filter(user_id__in=user_ids)
+
+        self._users = {
+            user_id: (default_shift_id, (pattern, anchor_date, is_active) if pattern else None)
+            for user_id, default_shift_id, pattern, anchor_date, is_active in users.order_by().values_list(
+                'id', 'shift_id', 'rotation__pattern', 'rotation__anchor_date', 'rotation__is_active'
+            )
+        }
+        self._overrides = {
+            (user_id, day): shift_id
+            for user_id, day, shift_id in assignments.order_by().values_list('user_id', 'date', 'shift_id')
+        }
+
+    def shift_id(self, user_id, day):
+        """The shift id a user works on a day, or None (also for unknown users)."""
+        override = self._overrides.get((user_id, day))
+        if override is not None:
+            return override
+        user = self._users.get(user_id)
+        if user is None:
+            return None
+        return planned_shift_id(user[0], user[1], day)
+
+
+def resolve_shifts(user_ids, dates):
+    """
+    {(user id, date): Shift or None} for every user on every date, with a
+    fixed number of queries however many pairs are asked for: the
+    resolver's two, plus at most one reload of the Shift table for ids it
+    doesn't know.
+    """
+    user_ids, dates = list(user_ids), sorted(set(dates))
+    if not user_ids or not dates:
+        return {}
+    resolver = ShiftResolver(user_ids, dates[0], dates[-1])
+    return {
+        (user_id, day): shift_table.get(resolver.shift_id(user_id, day)) for user_id in user_ids for day in dates
+    }
+
+
+def drop_shift_from_rotations(shift_id):
+    """
+    Turn a deleted shift's days into days off in every rotation pattern. A
+    rotation left without any shift is switched off, so its members go back
+    to their default shift. Returns the number of rotations changed.
+    """
+    changed = []
+    for rotation in ShiftRotation.objects.only('id', 'pattern', 'is_active'):
+        if shift_id in rotation.pattern:
+            rotation.pattern = [None if entry == shift_id else entry for entry in rotation.pattern]
+            if not any(entry is not None for entry in rotation.pattern):
+                rotation.is_active = False
+            changed.append(rotation)
+    ShiftRotation.objects.bulk_update(changed, ['pattern', 'is_active'])
+    return len(changed)
+
+
+def compact_assignments(start_date=None, end_date=None, dry_run=False, batch_size=COMPACT_BATCH_SIZE):
+    """
+    Delete UserShiftAssignment rows between two dates (either bound may be
+    omitted) that only repeat what the user's rotation or default shift
+    already gives, so that explicit rows are left for real exceptions.
+    Compacted days then follow later edits to the rotation or default
+    shift. Returns the number of redundant rows (deleted unless dry_run).
+    """
+    rotations = {
+        rotation_id: (pattern, anchor_date, is_active)
+        for rotation_id, pattern, anchor_date, is_active in ShiftRotation.objects.values_list(
+            'id', 'pattern', 'anchor_date', 'is_active'
+        )
+    }
+    assignments = UserShiftAssignment.objects.all()
+    if start_date:
+        assignments = assignments.filter(date__gte=start_date)
+    if end_date:
+        assignments = assignments.filter(date__lte=end_date)
+
+    redundant, last_id = 0, 0
+    while True:
+        rows = list(
+            assignments.filter(id__gt=last_id).order_by('id').values_list(
+                'id', 'date', 'shift_id', 'user__shift_id', 'user__rotation_id'
+            )[:batch_size]
+        )
+        if not rows:
+            return redundant
+        last_id = rows[-1][0]
+        to_delete = [
+            row_id for row_id, day, shift_id, default_shift_id, rotation_id in rows
+            if shift_id == planned_shift_id(default_shift_id, rotations.get(rotation_id), day)
+        ]
+        redundant += len(to_delete)
+        if to_delete and not dry_run:
+            with transaction.atomic():
+                UserShiftAssignment.objects.filter(id__in=to_delete).delete()
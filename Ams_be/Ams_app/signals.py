@@ -0,0 +1,68 @@
+# Ams_app/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import forget_token_version
+from .leaves import move_leave
+from .models import Attendance, Holiday, LeaveRequest, Shift, User
+from .shifts import drop_shift_from_rotations, shift_table
+from .summaries import mark_dirty
+from .today import today_cache
+from .workdays import calendar
+
+
+# ----- Daily attendance summaries ----- #
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def recount_attendance_day(sender, instance, **kwargs):
+    mark_dirty([instance.date])
+
+
+# ----- Today's attendance cache ----- #
+# Only committed rows reach the cache: a rolled back write never does
+@receiver(post_save, sender=Attendance)
+def write_through_today_cache(sender, instance, **kwargs):
+    transaction.on_commit(lambda: today_cache.put(instance))
+
+
+@receiver(post_delete, sender=Attendance)
+def discard_today_cache(sender, instance, **kwargs):
+    transaction.on_commit(lambda: today_cache.discard(instance.user_id, instance.date))
+
+
+# ----- Working-day calendar ----- #
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def invalidate_workday_calendar(sender, instance, **kwargs):
+    calendar.invalidate()
+    # Again after commit, in case the calendar was reloaded mid-transaction
+    transaction.on_commit(calendar.invalidate)
+
+
+# ----- Shift table cache ----- #
+@receiver(post_save, sender=Shift)
+@receiver(post_delete, sender=Shift)
+def invalidate_shift_table(sender, instance, **kwargs):
+    shift_table.invalidate()
+    transaction.on_commit(shift_table.invalidate)
+
+
+@receiver(post_delete, sender=Shift)
+def clear_deleted_shift_from_rotations(sender, instance, **kwargs):
+    drop_shift_from_rotations(instance.pk)
+
+
+# ----- Leave balances ----- #
+@receiver(post_delete, sender=LeaveRequest)
+def release_leave_balance(sender, instance, **kwargs):
+    # Saves update the ledger in LeaveRequest.save()
+    move_leave(getattr(instance, '_approved', instance.ledger_entry()), None)
+
+
+# ----- JWT token versions ----- #
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_token_version(sender, instance, **kwargs):
+    forget_token_version(instance.pk)
+    transaction.on_commit(lambda: forget_token_version(instance.pk))
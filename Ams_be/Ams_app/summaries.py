@@ -0,0 +1,201 @@
+# Ams_app/summaries.py
+
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from .models import Attendance, DailyAttendanceSummary
+from .shifts import ShiftResolver
+
+logger = logging.getLogger(__name__)
+
+# Set to False to keep summaries up to date only through the nightly rebuild
+LIVE_UPDATES = getattr(settings, 'AMS_DAILY_SUMMARY_LIVE', True)
+# How often each process recounts the days marked since its last flush
+FLUSH_INTERVAL_MS = getattr(settings, 'AMS_DAILY_SUMMARY_FLUSH_MS', 1000)
+
+SUMMARY_FIELDS = ['present_count', 'absent_count', 'on_leave_count', 'holiday_count', 'worked_seconds']
+# The counter each Attendance status adds to
+STATUS_FIELDS = {
+    'Present': 'present_count',
+    'Absent': 'absent_count',
+    'On Leave': 'on_leave_count',
+    'Holiday': 'holiday_count',
+}
+WRITE_CHUNK_SIZE = 1000
+REBUILD_BATCH_SIZE = 5000
+
+
+def _add(totals, key, status, worked):
+    """Add one Attendance row's status and worked seconds to the totals of a key."""
+    values = totals.setdefault(key, dict.fromkeys(SUMMARY_FIELDS, 0))
+    field = STATUS_FIELDS.get(status)
+    if field:
+        values[field] += 1
+    values['worked_seconds'] += worked or 0
+
+
+def _count(attendance, start_date, end_date, batch_size=REBUILD_BATCH_SIZE):
+    """
+    {(date, shift id): totals} for the Attendance rows of a queryset dated
+    between two dates. Each row counts under the shift its user works that
+    day (see ShiftResolver).
+    """
+    totals = {}
+    resolver = ShiftResolver(None, start_date, end_date)
+    for user_id, day, status, worked in attendance.order_by().values_list(
+        'user_id', 'date', 'status', 'worked_seconds'
+    ).iterator(chunk_size=batch_size):
+        _add(totals, (day, resolver.shift_id(user_id, day)), status, worked)
+    return totals
+
+
+def refresh_daily_summaries(day):
+    """
+    Recount one day's summaries from Attendance, writing only the rows whose
+    totals changed. The day's summary rows are locked before counting, so
+    concurrent refreshes of the same day take turns and the last one to
+    write has counted last; two refreshes creating the same missing row
+    collide on the unique constraint and the loser starts over.
+    """
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                stored = {
+                    summary.shift_id: summary
+                    for summary in DailyAttendanceSummary.objects.select_for_update().filter(date=day).order_by()
+                }
+                totals = _count(Attendance.objects.filter(date=day), day, day)
+                now = timezone.now()
+                changed, created = [], []
+                for (_, shift_id), values in totals.items():
+                    summary = stored.pop(shift_id, None)
+                    if summary is None:
+                        created.append(DailyAttendanceSummary(date=day, shift_id=shift_id, **values))
+                    elif any(getattr(summary, field) != value for field, value in values.items()):
+                        for field, value in values.items():
+                            setattr(summary, field, value)
+                        summary.updated_at = now
+                        changed.append(summary)
+                DailyAttendanceSummary.objects.bulk_create(created)
+                DailyAttendanceSummary.objects.bulk_update(changed, SUMMARY_FIELDS + ['updated_at'])
+                if stored:
+                    # Shifts nobody on the day counts under any more
+                    DailyAttendanceSummary.objects.filter(pk__in=[s.pk for s in stored.values()]).delete()
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+
+
+class SummaryQueue:
+    """
+    Days whose summaries need recounting. Writers only mark a day once their
+    transaction has committed, which costs no queries on the request path;
+    a flusher thread in every process recounts the marked days every
+    AMS_DAILY_SUMMARY_FLUSH_MS, so a burst of punches on one day is counted
+    once. Days marked when a process exits are left to the nightly rebuild.
+    """
+
+    def __init__(self, autostart=True):
+        self.autostart = autostart
+        self._days = set()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def add(self, days):
+        with self._lock:
+            self._days.update(days)
+        self.ensure_started()
+
+    def pending(self):
+        with self._lock:
+            return set(self._days)
+
+    def flush(self):
+        """Recount every marked day. Returns how many days were recounted."""
+        with self._lock:
+            days, self._days = self._days, set()
+        for index, day in enumerate(sorted(days)):
+            try:
+                refresh_daily_summaries(day)
+            except Exception:
+                # Keep the days not recounted yet for the next attempt
+                self.add(sorted(days)[index:])
+                raise
+        return len(days)
+
+    def _run(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL_MS / 1000)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Daily summary refresh failed; retrying")
+            finally:
+                close_old_connections()
+
+    def ensure_started(self):
+        """Start this process's flusher thread (again after a fork)."""
+        if not self.autostart or self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='daily-summary-flusher', daemon=True).start()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = SummaryQueue()
+    return _queue
+
+
+def mark_dirty(days):
+    """Have the summaries of these days recounted once the current transaction commits."""
+    if not LIVE_UPDATES:
+        return
+    days = set(days)
+    if days:
+        transaction.on_commit(lambda: get_queue().add(days))
+
+
+def rebuild_daily_summaries(start_date=None, end_date=None, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Rebuild every summary row between two dates (inclusive) from Attendance.
+    Either bound may be omitted. Rows are read in batches and counted under
+    each user's shift of the day (see ShiftResolver), which also corrects
+    live totals after shifts were reassigned for past days. Returns the
+    number of summary rows written.
+    """
+    attendance = Attendance.objects.all()
+    summaries = DailyAttendanceSummary.objects.all()
+    if start_date:
+        attendance = attendance.filter(date__gte=start_date)
+        summaries = summaries.filter(date__gte=start_date)
+    if end_date:
+        attendance = attendance.filter(date__lte=end_date)
+        summaries = summaries.filter(date__lte=end_date)
+
+    totals = {}
+    bounds = attendance.aggregate(first=Min('date'), last=Max('date'))
+    if bounds['first'] is not None:
+        totals = _count(attendance, bounds['first'], bounds['last'], batch_size)
+
+    with transaction.atomic():
+        summaries.delete()
+        rows = [
+            DailyAttendanceSummary(date=day, shift_id=shift_id, **values)
+            for (day, shift_id), values in totals.items()
+        ]
+        DailyAttendanceSummary.objects.bulk_create(rows, batch_size=WRITE_CHUNK_SIZE)
+    return len(rows)
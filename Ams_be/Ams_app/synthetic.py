@@ -0,0 +1,284 @@
+# Ams_app/synthetic.py
+
+import io
+import random
+from datetime import date, datetime, time, timedelta
+from time import perf_counter
+from django.contrib.auth.hashers import make_password
+from django.db import connection, models, transaction
+from django.utils import timezone
+from .models import Attendance, Holiday, LeaveRequest, Shift, ShiftRotation, User, UserShiftAssignment
+from .worktime import work_seconds
+
+DEFAULT_PASSWORD = 'synthetic-pass-123'
+
+# Fixed-date public holidays (month, day, name)
+PUBLIC_HOLIDAYS = [(1, 26, "Republic Day"), (8, 15, "Independence Day"), (10, 2, "Gandhi Jayanti"), (12, 25, "Christmas")]
+DEFAULT_SHIFTS = [('Morning', '09:00', '17:00'), ('Evening', '14:00', '22:00'), ('Night', '22:00', '06:00')]
+
+# Relative chance of starting a leave in each month (festivals, year end, monsoon)
+LEAVE_SEASON = {1: 1.2, 2: 0.8, 3: 0.9, 4: 1.0, 5: 1.4, 6: 1.1, 7: 1.0, 8: 1.1, 9: 0.9, 10: 1.6, 11: 1.3, 12: 1.8}
+# Sick leave peaks in the monsoon and in winter
+SICK_SEASON = {7: 0.55, 8: 0.55, 9: 0.5, 12: 0.45, 1: 0.45}
+LEAVES_PER_YEAR = 8
+ROTATING_SHARE = 0.3
+# Chance that a working day is swapped to another shift (an explicit assignment)
+SWAP_CHANCE = 0.01
+
+# Columns written for each table, in row-tuple order. bulk_create overwrites
+# applied_at (auto_now_add); COPY keeps the generated value.
+USER_FIELDS = (
+    'email', 'name', 'password', 'role', 'shift_id', 'rotation_id', 'is_active', 'is_staff', 'is_superuser', 'token_version',
+)
+ATTENDANCE_FIELDS = ('user_id', 'date', 'check_in', 'check_out', 'status', 'worked_seconds', 'late_seconds', 'overtime_seconds')
+ASSIGNMENT_FIELDS = ('user_id', 'shift_id', 'date')
+LEAVE_FIELDS = ('employee_id', 'leave_type', 'start_date', 'end_date', 'reason', 'status', 'applied_at')
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+class Writer:
+    """
+    Buffers rows per table and writes them in batches, so memory stays
+    bounded by the batch size. Methods:
+
+    - 'insert': multi-row INSERTs of the row tuples, skipping model
+      instances (the bulk_create SQL without the per-object ORM work);
+    - 'bulk': plain bulk_create, slower but goes through the model layer;
+    - 'copy': COPY FROM STDIN, PostgreSQL only and the fastest.
+    """
+
+    def __init__(self, method='insert', batch_size=5000):
+        if method == 'copy' and connection.vendor != 'postgresql':
+            raise ValueError("COPY is only available on PostgreSQL.")
+        self.method = method
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.written = {}
+
+    def add(self, model, fields, rows):
+        buffer = self.buffers.setdefault((model, fields), [])
+        buffer.extend(rows)
+        if len(buffer) >= self.batch_size:
+            self.flush(model, fields)
+
+    def flush(self, model=None, fields=None):
+        keys = [(model, fields)] if model else list(self.buffers)
+        for key in keys:
+            rows = self.buffers.get(key)
+            if rows:
+                self._write(key[0], key[1], rows)
+                self.written[key[0].__name__] = self.written.get(key[0].__name__, 0) + len(rows)
+                self.buffers[key] = []
+
+    def _write(self, model, fields, rows):
+        if self.method == 'bulk':
+            model.objects.bulk_create([model(**dict(zip(fields, row))) for row in rows], batch_size=self.batch_size)
+            return
+        qn = connection.ops.quote_name
+        model_fields = [model._meta.get_field(field) for field in fields]
+        table = qn(model._meta.db_table)
+        columns = ', '.join(qn(field.column) for field in model_fields)
+        with connection.cursor() as cursor:
+            if self.method == 'copy':
+                data = io.StringIO(''.join('\t'.join(_copy_value(value) for value in row) + '\n' for row in rows))
+                cursor.copy_expert(f'COPY {table} ({columns}) FROM STDIN', data)
+                return
+            adapters = [_adapter(field) for field in model_fields]
+            row_sql = '(' + ', '.join(['%s'] * len(fields)) + ')'
+            size = connection.ops.bulk_batch_size(model_fields, rows)
+            for offset in range(0, len(rows), size):
+                batch = rows[offset:offset + size]
+                cursor.execute(
+                    f'INSERT INTO {table} ({columns}) VALUES ' + ', '.join([row_sql] * len(batch)),
+                    [adapt(value) if adapt else value for row in batch for adapt, value in zip(adapters, row)],
+                )
+
+
+def _adapter(field):
+    # What bulk_create's get_db_prep_save() would do for the types we write
+    if isinstance(field, models.DateTimeField):
+        return connection.ops.adapt_datetimefield_value
+    if isinstance(field, models.DateField):
+        return connection.ops.adapt_datefield_value
+    if isinstance(field, models.TimeField):
+        return connection.ops.adapt_timefield_value
+    return None
+
+
+def _seconds(moment):
+    return moment.hour * 3600 + moment.minute * 60 + moment.second
+
+
+def _clock(seconds):
+    seconds = int(seconds) % 86400
+    return time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def _arrival_offset(rng):
+    """Seconds relative to shift start: mostly on time, some late, a few very late."""
+    roll = rng.random()
+    if roll < 0.80:
+        return rng.uniform(-900, 300)
+    if roll < 0.95:
+        return rng.uniform(300, 1800)
+    return rng.uniform(1800, 7200)
+
+
+def _departure_offset(rng):
+    """Seconds relative to shift end: usually a little overtime, sometimes early leave."""
+    if rng.random() < 0.08:
+        return rng.uniform(-5400, -600)
+    return rng.uniform(-600, 3600)
+
+
+def ensure_holidays(start, end):
+    """
+    Create the public holidays between two dates that don't exist yet.
+    Returns (number created, every holiday date in the range).
+    """
+    existing = set(Holiday.objects.values_list('start_date', flat=True)) | set(
+        Holiday.objects.values_list('end_date', flat=True)
+    )
+    holidays = []
+    for year in range(start.year, end.year + 1):
+        for month, day, name in PUBLIC_HOLIDAYS:
+            when = date(year, month, day)
+            if start <= when <= end and when not in existing:
+                holidays.append(Holiday(name=name, start_date=when, end_date=when, description="Public holiday"))
+    Holiday.objects.bulk_create(holidays)
+    return len(holidays), {
+        start_date + timedelta(days=offset)
+        for start_date, end_date in Holiday.objects.filter(start_date__lte=end, end_date__gte=start).values_list('start_date', 'end_date')
+        for offset in range((end_date - start_date).days + 1)
+    }
+
+
+def ensure_rotations(shifts, anchor_date):
+    """
+    One weekly rotation per shift, starting on that shift and moving to the
+    next one every week from ``anchor_date``. Returns (number created,
+    rotations in the order of ``shifts``).
+    """
+    created, rotations = 0, []
+    for first in range(len(shifts)):
+        pattern = [shifts[(first + week) % len(shifts)].id for week in range(len(shifts)) for _ in range(7)]
+        rotation, new = ShiftRotation.objects.get_or_create(
+            name=f"Weekly from {shifts[first].name}", pattern=pattern, anchor_date=anchor_date,
+        )
+        created += new
+        rotations.append(rotation)
+    return created, rotations
+
+
+def _user_rows(rng, user_id, base, rotating, shifts, working_days, weeks):
+    """
+    Attendance, shift assignment and leave rows for one user. The user works
+    their default shift, or their weekly rotation, except on the odd swapped
+    day, which is the only one that gets an explicit assignment.
+    """
+    attendance, assignments, leaves = [], [], []
+    leave_chance = LEAVES_PER_YEAR / 250
+    on_leave_until, leave_approved = None, False
+
+    for index, day in enumerate(working_days):
+        # Rotating users move to the next shift every week
+        planned = (base + weeks[index]) % len(shifts) if rotating else base
+        if rng.random() < SWAP_CHANCE:
+            planned = (planned + rng.randrange(1, len(shifts))) % len(shifts)
+            assignments.append((user_id, shifts[planned][0], day))
+        shift_id, shift_start, shift_end = shifts[planned]
+
+        if on_leave_until is None and rng.random() < leave_chance * LEAVE_SEASON[day.month]:
+            length = min(rng.choice((1, 1, 1, 2, 2, 3, 5)), len(working_days) - index)
+            last = working_days[index + length - 1]
+            sick = rng.random() < SICK_SEASON.get(day.month, 0.3)
+            leave_type = 'Sick' if sick else rng.choice(('Casual', 'Casual', 'Lop'))
+            status = rng.choices(('Approved', 'Rejected', 'Pending'), (80, 10, 10))[0]
+            applied = timezone.make_aware(
+                datetime.combine(day - timedelta(days=rng.randrange(1, 15)), _clock(shift_start))
+            )
+            leaves.append((user_id, leave_type, day, last, "Synthetic leave", status, applied))
+            on_leave_until, leave_approved = last, status == 'Approved'
+
+        if on_leave_until is not None and leave_approved:
+            attendance.append((user_id, day, None, None, 'On Leave', None, None, None))
+        elif rng.random() < 0.02:
+            attendance.append((user_id, day, None, None, 'Absent', None, None, None))
+        else:
+            check_in = _clock(shift_start + _arrival_offset(rng))
+            check_out = _clock(shift_end + _departure_offset(rng))
+            seconds = work_seconds(check_in, check_out, _clock(shift_start), _clock(shift_end))
+            attendance.append((user_id, day, check_in, check_out, 'Present', *seconds.values()))
+
+        if on_leave_until is not None and day >= on_leave_until:
+            on_leave_until = None
+    return attendance, assignments, leaves
+
+
+def generate(users, start, end, method='insert', chunk_users=500, batch_size=5000, prefix='synthetic',
+             password=DEFAULT_PASSWORD, rng_seed=None, progress=None):
+    """
+    Generate ``users`` employees on a default shift or a weekly rotation,
+    with attendance, leave requests and the odd swapped shift for every
+    working day between two dates, plus public holidays.
+    Users are generated ``chunk_users`` at a time and rows are written in
+    batches, so memory does not grow with the dataset. Returns
+    ({model name: rows written}, seconds).
+    """
+    rng = random.Random(rng_seed)
+    started = perf_counter()
+    shifts = list(Shift.objects.filter(is_active=True).order_by('id'))
+    if not shifts:
+        shifts = Shift.objects.bulk_create([
+            Shift(name=name, start_time=start_time, end_time=end_time) for name, start_time, end_time in DEFAULT_SHIFTS
+        ])
+        shifts = list(Shift.objects.filter(id__in=[shift.id for shift in shifts]).order_by('id'))
+
+    created, closed = ensure_holidays(start, end)
+    working_days = [
+        start + timedelta(days=offset) for offset in range((end - start).days + 1)
+        if (start + timedelta(days=offset)).weekday() < 5 and start + timedelta(days=offset) not in closed
+    ]
+    # Rotations are anchored on the Monday of the first week
+    anchor_date = start - timedelta(days=start.weekday())
+    weeks = [(day - anchor_date).days // 7 for day in working_days]
+    rotations_created, rotations = ensure_rotations(shifts, anchor_date)
+    shift_times = [(shift.id, _seconds(shift.start_time), _seconds(shift.end_time)) for shift in shifts]
+    # One hash for everyone; hashing per user would dominate the run
+    password_hash = make_password(password)
+    first_index = User.objects.filter(email__startswith=prefix).count()
+    writer = Writer(method, batch_size)
+    writer.written['Holiday'] = created
+    writer.written['ShiftRotation'] = rotations_created
+
+    for chunk_start in range(first_index, first_index + users, chunk_users):
+        indexes = range(chunk_start, min(chunk_start + chunk_users, first_index + users))
+        emails = [f'{prefix}{index}@example.com' for index in indexes]
+        # (default shift index, rotating) per user
+        plans = {email: (rng.randrange(len(shifts)), rng.random() < ROTATING_SHARE) for email in emails}
+        with transaction.atomic():
+            writer.add(User, USER_FIELDS, [
+                (email, f'Synthetic User {index}', password_hash, 'Manager' if index % 100 == 0 else 'Employee',
+                 shifts[plans[email][0]].id, rotations[plans[email][0]].id if plans[email][1] else None,
+                 True, False, False, 0)
+                for index, email in zip(indexes, emails)
+            ])
+            writer.flush(User, USER_FIELDS)
+            user_ids = User.objects.filter(email__in=emails).order_by('id').values_list('id', 'email')
+
+            for user_id, email in user_ids:
+                attendance, assignments, leaves = _user_rows(
+                    rng, user_id, *plans[email], shift_times, working_days, weeks
+                )
+                writer.add(Attendance, ATTENDANCE_FIELDS, attendance)
+                writer.add(UserShiftAssignment, ASSIGNMENT_FIELDS, assignments)
+                writer.add(LeaveRequest, LEAVE_FIELDS, leaves)
+            writer.flush()
+        if progress:
+            progress(writer.written, perf_counter() - started)
+    return writer.written, perf_counter() - started
@@ -0,0 +1,87 @@
+import os
+import tempfile
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+from Ams_app import punch_buffer
+from Ams_app.models import Attendance
+from Ams_app.punch_buffer import PunchBuffer
+from Ams_app.today import today_cache
+
+User = get_user_model()
+
+
+class AsyncAttendanceTests(TestCase):
+    def setUp(self):
+        today_cache.clear()
+        self.user = User.objects.create_user(email='emp@example.com', name='Employee', password='pass12345')
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {'headers': {'Authorization': f'Bearer {token}'}}
+
+    async def test_punch_checks_in_then_out_then_refuses(self):
+        url = reverse('async_attendance_punch')
+
+        response = await self.async_client.post(url, **self.auth)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['status'], 'Present')
+        self.assertIsNone(response.json()['check_out'])
+
+        response = await self.async_client.post(url, **self.auth)
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(response.json()['check_out'])
+
+        response = await self.async_client.post(url, **self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(await Attendance.objects.filter(user=self.user).acount(), 1)
+
+    async def test_today_status(self):
+        url = reverse('async_attendance_today')
+        response = await self.async_client.get(url, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['check_in'])
+
+        await self.async_client.post(reverse('async_attendance_punch'), **self.auth)
+        response = await self.async_client.get(url, **self.auth)
+        self.assertIsNotNone(response.json()['check_in'])
+
+    async def test_requires_valid_token(self):
+        response = await self.async_client.post(reverse('async_attendance_punch'))
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(reverse('async_attendance_today'), headers={'Authorization': 'Bearer nonsense'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_get_not_allowed_on_punch(self):
+        response = await self.async_client.get(reverse('async_attendance_punch'), **self.auth)
+        self.assertEqual(response.status_code, 405)
+
+
+class AsyncBufferedPunchTests(TestCase):
+    def setUp(self):
+        today_cache.clear()
+        self.user = User.objects.create_user(email='emp@example.com', name='Employee', password='pass12345')
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {'headers': {'Authorization': f'Bearer {token}'}}
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.buffer = PunchBuffer(os.path.join(directory.name, 'punches.sqlite3'), autostart=False)
+        for patch in (
+            mock.patch.object(punch_buffer, 'ENABLED', True),
+            mock.patch.object(punch_buffer, '_buffer', self.buffer),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def test_punches_go_through_the_buffer(self):
+        url = reverse('async_attendance_punch')
+        self.assertEqual((await self.async_client.post(url, **self.auth)).status_code, 201)
+        self.assertFalse(await Attendance.objects.aexists())
+
+        # Both endpoints see the buffered check-in, so the next tap checks out
+        response = await self.async_client.get(reverse('async_attendance_today'), **self.auth)
+        self.assertIsNotNone(response.json()['check_in'])
+        response = await self.async_client.post(url, **self.auth)
+        self.assertIsNotNone(response.json()['check_out'])
+        self.assertEqual((await self.async_client.post(url, **self.auth)).status_code, 400)
+        self.assertEqual(self.buffer.size(), 2)
@@ -0,0 +1,63 @@
+from datetime import date, time
+from io import BytesIO
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from openpyxl import load_workbook
+from Ams_app.models import Attendance, Shift, UserShiftAssignment
+
+User = get_user_model()
+
+
+class AttendanceExportTests(TestCase):
+    def setUp(self):
+        self.shift = Shift.objects.create(name="Morning", start_time="09:00", end_time="17:00")
+        self.admin = User.objects.create_user(email='admin@example.com', name='Admin', role='Admin', password='pass12345')
+        self.employee = User.objects.create_user(
+            email='employee@example.com', name='Employee', password='pass12345', shift=self.shift
+        )
+        Attendance.objects.bulk_create([
+            Attendance(user=self.employee, date=date(2025, 5, day), check_in=time(9), check_out=time(17), status='Present')
+            for day in range(1, 11)
+        ])
+        self.client.force_login(self.admin)
+
+    def test_csv_export_streams_filtered_rows(self):
+        response = self.client.get('/attendance/export/', {'start': '2025-05-03', 'end': '2025-05-05'})
+
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Employee,Email,Shift,Date,Check In,Check Out,Status')
+        self.assertEqual(lines[1], 'Employee,employee@example.com,Morning,2025-05-03,09:00:00,17:00:00,Present')
+        self.assertEqual(len(lines), 4)
+
+    def test_xlsx_export(self):
+        response = self.client.get('/attendance/export/', {
+            'start': '2025-05-01', 'end': '2025-05-31', 'shift': self.shift.id, 'output': 'xlsx',
+        })
+
+        workbook = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        rows = list(workbook.worksheets[0].iter_rows(values_only=True))
+        self.assertEqual(rows[0][0], 'Employee')
+        self.assertEqual(len(rows), 11)
+
+    def test_rows_show_and_filter_the_shift_worked_that_day(self):
+        night = Shift.objects.create(name="Night", start_time="22:00", end_time="06:00")
+        UserShiftAssignment.objects.create(user=self.employee, date=date(2025, 5, 4), shift=night)
+        params = {'start': '2025-05-03', 'end': '2025-05-05'}
+
+        lines = b''.join(self.client.get('/attendance/export/', params).streaming_content).decode().splitlines()
+        self.assertEqual([line.split(',')[2] for line in lines[1:]], ['Morning', 'Night', 'Morning'])
+
+        for shift, dates in ((night, ['2025-05-04']), (self.shift, ['2025-05-03', '2025-05-05'])):
+            response = self.client.get('/attendance/export/', dict(params, shift=shift.id))
+            lines = b''.join(response.streaming_content).decode().splitlines()
+            self.assertEqual([line.split(',')[3] for line in lines[1:]], dates)
+
+    def test_invalid_range_is_rejected(self):
+        response = self.client.get('/attendance/export/', {'start': '2025-05-05', 'end': '2025-05-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_employees_cannot_export(self):
+        self.client.force_login(self.employee)
+        response = self.client.get('/attendance/export/')
+        self.assertEqual(response.status_code, 403)
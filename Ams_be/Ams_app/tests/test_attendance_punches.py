@@ -0,0 +1,186 @@
+from datetime import date, time, datetime
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from Ams_app import summaries
+from Ams_app.models import Attendance
+from Ams_app.punches import ingest_punches, record_punch
+from Ams_app.today import today_cache
+
+User = get_user_model()
+
+
+def local_iso(day, at):
+    return timezone.make_aware(datetime.combine(day, at)).isoformat()
+
+
+class BulkPunchTests(APITestCase):
+    def setUp(self):
+        today_cache.clear()
+        self.device = User.objects.create_user(
+            email='kiosk@example.com', name='Front Door Kiosk', role='Manager', password='kioskpassword'
+        )
+        self.employee = User.objects.create_user(
+            email='employee@example.com', name='Employee One', password='strongpassword'
+        )
+        self.day = date(2025, 5, 5)
+        self.url = '/attendances/bulk/'
+        token = str(RefreshToken.for_user(self.device).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_bulk_creates_attendance_from_first_in_and_last_out(self):
+        events = [
+            {'user': self.employee.id, 'timestamp': local_iso(self.day, time(9, 5)), 'direction': 'in'},
+            {'user': self.employee.id, 'timestamp': local_iso(self.day, time(8, 55)), 'direction': 'in'},
+            {'user': self.employee.id, 'timestamp': local_iso(self.day, time(17, 30)), 'direction': 'out'},
+        ]
+        response = self.client.post(self.url, {'events': events}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['result'] for r in response.data['results']], ['ignored', 'created', 'created'])
+        attendance = Attendance.objects.get(user=self.employee, date=self.day)
+        self.assertEqual(attendance.check_in, time(8, 55))
+        self.assertEqual(attendance.check_out, time(17, 30))
+        self.assertEqual(attendance.status, 'Present')
+
+    def test_bulk_merges_with_existing_attendance(self):
+        Attendance.objects.create(user=self.employee, date=self.day, check_in=time(9, 0), status='Present')
+        events = [
+            {'user': self.employee.id, 'timestamp': local_iso(self.day, time(9, 30)), 'direction': 'in'},
+            {'user': self.employee.id, 'timestamp': local_iso(self.day, time(18, 0)), 'direction': 'out'},
+        ]
+        response = self.client.post(self.url, {'events': events}, format='json')
+
+        self.assertEqual([r['result'] for r in response.data['results']], ['ignored', 'updated'])
+        attendance = Attendance.objects.get(user=self.employee, date=self.day)
+        self.assertEqual(attendance.check_in, time(9, 0))
+        self.assertEqual(attendance.check_out, time(18, 0))
+
+    def test_bulk_reports_invalid_events_without_failing_the_batch(self):
+        events = [
+            {'user': self.employee.id, 'timestamp': 'yesterday', 'direction': 'in'},
+            {'user': 999999, 'timestamp': local_iso(self.day, time(9, 0)), 'direction': 'in'},
+            {'user': self.employee.id, 'timestamp': local_iso(self.day, time(9, 0)), 'direction': 'sideways'},
+            {'user': self.employee.id, 'timestamp': local_iso(self.day, time(9, 0)), 'direction': 'in'},
+        ]
+        response = self.client.post(self.url, {'events': events}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['totals'], {'error': 3, 'created': 1})
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_bulk_rejects_check_out_without_check_in(self):
+        other_day = date(2025, 5, 6)
+        Attendance.objects.create(user=self.employee, date=other_day, status='Absent')
+        events = [
+            {'user': self.employee.id, 'timestamp': local_iso(self.day, time(17, 0)), 'direction': 'out'},
+            {'user': self.employee.id, 'timestamp': local_iso(self.day, time(18, 0)), 'direction': 'out'},
+            {'user': self.employee.id, 'timestamp': local_iso(other_day, time(18, 0)), 'direction': 'out'},
+        ]
+        response = self.client.post(self.url, {'events': events}, format='json')
+
+        self.assertEqual(response.data['totals'], {'error': 3})
+        self.assertEqual(response.data['results'][0]['error'], "No check-in to check out from.")
+        self.assertFalse(Attendance.objects.filter(date=self.day).exists())
+        self.assertIsNone(Attendance.objects.get(date=other_day).check_out)
+
+    def test_bulk_query_count_does_not_grow_with_batch_size(self):
+        users = User.objects.bulk_create([
+            User(email=f'user{i}@example.com', name=f'User {i}') for i in range(100)
+        ])
+
+        def post_for(batch, day):
+            events = [
+                {'user': user.id, 'timestamp': local_iso(day, time(9, 0)), 'direction': 'in'}
+                for user in batch
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, {'events': events}, format='json')
+            self.assertEqual(response.data['totals'], {'created': len(batch)})
+            return len(queries)
+
+        self.assertEqual(post_for(users[:10], date(2025, 5, 6)), post_for(users, date(2025, 5, 7)))
+
+    def test_bulk_writes_the_today_cache_after_commit(self):
+        day = timezone.localdate()
+        events = [{'user': self.employee.id, 'timestamp': local_iso(day, time(9, 0)), 'direction': 'in'}]
+        with self.captureOnCommitCallbacks() as callbacks:
+            ingest_punches(events)
+        self.assertIsNone(today_cache.get(self.employee.id, day, lambda: None))
+
+        for callback in callbacks:
+            callback()
+        state = today_cache.get(self.employee.id, day, lambda: self.fail("should be cached"))
+        self.assertEqual(state.check_in, time(9, 0))
+
+    def test_employee_cannot_post_bulk_punches(self):
+        token = str(RefreshToken.for_user(self.employee).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.post(self.url, {'events': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class RecordPunchTests(APITestCase):
+    def setUp(self):
+        today_cache.clear()
+        self.employee = User.objects.create_user(
+            email='employee@example.com', name='Employee One', password='strongpassword'
+        )
+        self.morning = timezone.make_aware(datetime(2025, 5, 5, 9, 0))
+        self.evening = timezone.make_aware(datetime(2025, 5, 5, 18, 0))
+        self.queue = summaries.SummaryQueue(autostart=False)
+        patcher = mock.patch.object(summaries, '_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_toggle_checks_in_then_out_then_refuses(self):
+        # Everything a punch costs, including what runs once it commits: the
+        # upsert alone, the summaries only mark the day for a background recount
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):
+            attendance = record_punch(self.employee.id, when=self.morning)
+        self.assertEqual(attendance.check_in, time(9, 0))
+        self.assertIsNone(attendance.check_out)
+        self.assertEqual(attendance.status, 'Present')
+
+        # Closing the day also resolves the shift worked that day and stores the worked seconds
+        with self.assertNumQueries(3), self.captureOnCommitCallbacks(execute=True):
+            attendance = record_punch(self.employee.id, when=self.evening)
+        self.assertEqual(self.queue.pending(), {self.morning.date()})
+        self.assertEqual(attendance.check_in, time(9, 0))
+        self.assertEqual(attendance.check_out, time(18, 0))
+        self.assertEqual(Attendance.objects.get(pk=attendance.pk).worked_seconds, 9 * 3600)
+
+        self.assertIsNone(record_punch(self.employee.id, when=self.evening))
+        self.assertEqual(Attendance.objects.filter(user=self.employee).count(), 1)
+
+    def test_check_in_is_not_overwritten(self):
+        record_punch(self.employee.id, 'in', when=self.morning)
+        self.assertIsNone(record_punch(self.employee.id, 'in', when=self.evening))
+        self.assertEqual(Attendance.objects.get(user=self.employee).check_in, time(9, 0))
+
+    def test_check_out_requires_open_check_in(self):
+        self.assertIsNone(record_punch(self.employee.id, 'out', when=self.evening))
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_api_create_toggles_attendance(self):
+        token = str(RefreshToken.for_user(self.employee).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        self.assertEqual(self.client.post('/attendances/').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.post('/attendances/').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.post('/attendances/').status_code, status.HTTP_400_BAD_REQUEST)
+        attendance = Attendance.objects.get(user=self.employee, date=timezone.localdate())
+        self.assertIsNotNone(attendance.check_out)
+
+    def test_attendance_check_page_does_not_create_rows_on_get(self):
+        self.client.force_login(self.employee)
+        self.client.get('/attendance/check/')
+        self.assertFalse(Attendance.objects.exists())
+
+        self.client.post('/attendance/check/', {'action': 'checkin'})
+        self.assertEqual(Attendance.objects.get(user=self.employee).status, 'Present')
@@ -0,0 +1,147 @@
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from Ams_app import summaries
+from Ams_app.models import Attendance, DailyAttendanceSummary, Shift, ShiftRotation, UserShiftAssignment
+from Ams_app.punches import ingest_punches, record_punch
+
+User = get_user_model()
+
+
+class DailyAttendanceSummaryTests(TestCase):
+    def setUp(self):
+        self.morning = Shift.objects.create(name="Morning", start_time="09:00", end_time="17:00")
+        self.alice = User.objects.create_user(email='alice@example.com', name='Alice', password='pass12345', shift=self.morning)
+        self.bob = User.objects.create_user(email='bob@example.com', name='Bob', password='pass12345', shift=self.morning)
+        self.carol = User.objects.create_user(email='carol@example.com', name='Carol', password='pass12345')
+        self.day = date(2025, 5, 5)
+        # Recount marked days only when the test flushes
+        self.queue = summaries.SummaryQueue(autostart=False)
+        patcher = mock.patch.object(summaries, '_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_summary_follows_attendance_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(user=self.alice, date=self.day, check_in=time(9), check_out=time(17), status='Present')
+            Attendance.objects.create(user=self.bob, date=self.day, status='Absent')
+        self.queue.flush()
+
+        summary = DailyAttendanceSummary.objects.get(date=self.day, shift=self.morning)
+        self.assertEqual((summary.present_count, summary.absent_count, summary.on_leave_count), (1, 1, 0))
+        self.assertEqual(summary.worked_seconds, 8 * 3600)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bob = Attendance.objects.get(user=self.bob, date=self.day)
+            bob.status = 'On Leave'
+            bob.save()
+        self.queue.flush()
+
+        summary.refresh_from_db()
+        self.assertEqual((summary.present_count, summary.absent_count, summary.on_leave_count), (1, 0, 1))
+
+    def counts(self, shift):
+        summary = DailyAttendanceSummary.objects.get(date=self.day, shift=shift)
+        return summary.present_count, summary.absent_count, summary.on_leave_count, summary.holiday_count
+
+    def test_holidays_and_deletions_are_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(user=self.alice, date=self.day, status='Holiday')
+            bob = Attendance.objects.create(user=self.bob, date=self.day, status='Absent')
+        self.queue.flush()
+        self.assertEqual(self.counts(self.morning), (0, 1, 0, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.get(pk=bob.pk).delete()
+        self.queue.flush()
+        self.assertEqual(self.counts(self.morning), (0, 0, 0, 1))
+
+    def test_counted_under_the_shift_worked_that_day(self):
+        evening = Shift.objects.create(name="Evening", start_time="14:00", end_time="22:00")
+        rotation = ShiftRotation.objects.create(name="Swing", pattern=[evening.id], anchor_date=self.day)
+        self.alice.rotation = rotation
+        self.alice.save()
+        UserShiftAssignment.objects.create(user=self.carol, date=self.day, shift=evening)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            record_punch(self.alice.id, 'in', when=timezone.make_aware(datetime.combine(self.day, time(14))))
+            ingest_punches([{'user': self.carol.id, 'timestamp': f'{self.day}T14:05:00+05:30', 'direction': 'in'}])
+            Attendance.objects.create(user=self.bob, date=self.day, status='On Leave')
+        self.queue.flush()
+        self.assertEqual(self.counts(evening), (2, 0, 0, 0))
+        self.assertEqual(self.counts(self.morning), (0, 0, 1, 0))
+
+        # The rebuild agrees with the live counts
+        call_command('rebuild_attendance_summaries', start=self.day, end=self.day, stdout=StringIO())
+        self.assertEqual(self.counts(evening), (2, 0, 0, 0))
+        self.assertEqual(self.counts(self.morning), (0, 0, 1, 0))
+
+    def test_punches_are_recounted_in_the_background(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(user=self.alice, date=self.day, status='Absent')
+        when = timezone.make_aware(datetime.combine(self.day, time(9)))
+
+        # Committing punches only marks the day; no summary query on the punch's path
+        with self.captureOnCommitCallbacks(execute=True):
+            record_punch(self.alice.id, 'in', when=when)
+            record_punch(self.bob.id, 'in', when=when)
+        self.assertEqual(self.queue.pending(), {self.day})
+        self.assertFalse(DailyAttendanceSummary.objects.exists())
+
+        # The burst is recounted once: lock the day's summaries, the attendance
+        # and the two ShiftResolver reads, one INSERT, plus a savepoint
+        # (SAVEPOINT and RELEASE)
+        with self.assertNumQueries(7):
+            self.assertEqual(self.queue.flush(), 1)
+        self.assertEqual(self.counts(self.morning), (2, 0, 0, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            record_punch(self.alice.id, 'out', when=when + timedelta(hours=8))
+        self.queue.flush()
+        summary = DailyAttendanceSummary.objects.get(date=self.day, shift=self.morning)
+        self.assertEqual((summary.present_count, summary.worked_seconds), (2, 8 * 3600))
+
+        # A day nobody counts under a shift for any more loses its summary row
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.filter(user__in=[self.alice, self.bob]).delete()
+        self.queue.flush()
+        self.assertFalse(DailyAttendanceSummary.objects.exists())
+
+    def test_punches_update_summary_for_users_without_shift(self):
+        when = timezone.make_aware(datetime.combine(self.day, time(9, 30)))
+        with self.captureOnCommitCallbacks(execute=True):
+            record_punch(self.carol.id, 'in', when=when)
+        self.queue.flush()
+
+        summary = DailyAttendanceSummary.objects.get(date=self.day, shift__isnull=True)
+        self.assertEqual(summary.present_count, 1)
+
+    def test_rebuild_command_recreates_summaries(self):
+        Attendance.objects.bulk_create([
+            Attendance(user=self.alice, date=self.day, check_in=time(9), check_out=time(13), status='Present', worked_seconds=4 * 3600),
+            Attendance(user=self.carol, date=self.day, status='Absent'),
+        ])
+        call_command('rebuild_attendance_summaries', start=self.day, stdout=StringIO())
+
+        morning = DailyAttendanceSummary.objects.get(date=self.day, shift=self.morning)
+        no_shift = DailyAttendanceSummary.objects.get(date=self.day, shift__isnull=True)
+        self.assertEqual((morning.present_count, morning.worked_seconds), (1, 4 * 3600))
+        self.assertEqual(no_shift.absent_count, 1)
+
+
+class AttendanceSummaryAPITests(APITestCase):
+    def setUp(self):
+        manager = User.objects.create_user(email='manager@example.com', name='Manager', role='Manager', password='pass12345')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(manager).access_token}')
+
+    def test_shift_filter_must_be_a_number(self):
+        response = self.client.get('/attendances-summary/', {'shift': 'night'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/attendances-summary/', {'shift': 1}).status_code, status.HTTP_200_OK)
@@ -0,0 +1,151 @@
+from datetime import date
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from Ams_app.leaves import leave_balances
+from Ams_app.models import Holiday, LeaveBalance, LeaveRequest
+from Ams_app.workdays import calendar
+
+User = get_user_model()
+
+# Monday to Sunday, with a holiday on the Wednesday: 4 working days
+MONDAY, SUNDAY = date(2025, 5, 5), date(2025, 5, 11)
+
+
+def used(employee, year=2025, leave_type='Casual'):
+    return LeaveBalance.objects.filter(employee=employee, year=year, leave_type=leave_type).values_list(
+        'used_days', flat=True
+    ).first()
+
+
+class LeaveLedgerTests(TestCase):
+    def setUp(self):
+        calendar.invalidate()
+        Holiday.objects.create(name="Mid-week", start_date=date(2025, 5, 7), end_date=date(2025, 5, 7), description="")
+        self.admin = User.objects.create_user(email='admin@example.com', name='Admin', role='Admin', password='pass12345')
+        self.employee = User.objects.create_user(email='emp@example.com', name='Emp', password='pass12345')
+
+    def leave(self, start=MONDAY, end=SUNDAY, status='Pending', leave_type='Casual'):
+        return LeaveRequest.objects.create(
+            employee=self.employee, leave_type=leave_type, start_date=start, end_date=end, reason="Trip", status=status
+        )
+
+    def test_approve_cancel_and_edit(self):
+        leave = self.leave()
+        self.assertIsNone(used(self.employee))
+
+        leave.status = 'Approved'
+        leave.save()
+        self.assertEqual(used(self.employee), 4)
+
+        # Moving an approved leave re-counts it
+        leave = LeaveRequest.objects.get(pk=leave.pk)
+        leave.end_date = date(2025, 5, 6)
+        leave.save()
+        self.assertEqual(used(self.employee), 2)
+
+        leave.status = 'Cancelled'
+        leave.save()
+        self.assertEqual(used(self.employee), 0)
+
+    def test_rejected_and_deleted_leave(self):
+        self.leave(status='Rejected')
+        self.assertIsNone(used(self.employee))
+
+        approved = self.leave(leave_type='Sick', status='Approved')
+        self.assertEqual(used(self.employee, leave_type='Sick'), 4)
+        LeaveRequest.objects.filter(pk=approved.pk).delete()
+        self.assertEqual(used(self.employee, leave_type='Sick'), 0)
+
+    def test_leave_across_new_year_is_split(self):
+        self.leave(start=date(2025, 12, 29), end=date(2026, 1, 2), status='Approved')
+        self.assertEqual((used(self.employee, 2025), used(self.employee, 2026)), (3, 2))
+
+    def test_balance_is_one_query(self):
+        self.leave(status='Approved')
+        with self.assertNumQueries(1):
+            balances = {row['leave_type']: row for row in leave_balances(self.employee.id, 2025)}
+        self.assertEqual(balances['Casual']['remaining'], 12 - 4)
+        self.assertEqual(balances['Sick']['used_days'], 0)
+        self.assertIsNone(balances['Lop']['remaining'])
+
+    def test_rebuild_command(self):
+        LeaveRequest.objects.bulk_create([
+            LeaveRequest(employee=self.employee, leave_type='Casual', start_date=MONDAY, end_date=SUNDAY,
+                         reason="Trip", status='Approved'),
+            LeaveRequest(employee=self.employee, leave_type='Sick', start_date=date(2024, 12, 30),
+                         end_date=date(2025, 1, 1), reason="Flu", status='Approved'),
+            LeaveRequest(employee=self.employee, leave_type='Sick', start_date=MONDAY, end_date=SUNDAY,
+                         reason="Flu", status='Rejected'),
+        ])
+        LeaveBalance.objects.create(employee=self.employee, year=2025, leave_type='Lop', used_days=9)
+        output = StringIO()
+
+        call_command('rebuild_leave_balances', year=2025, stdout=output)
+        self.assertIn("Rebuilt 2 leave balance rows.", output.getvalue())
+        self.assertEqual(
+            set(LeaveBalance.objects.values_list('year', 'leave_type', 'used_days')),
+            {(2025, 'Casual', 4), (2025, 'Sick', 1)},
+        )
+
+        call_command('rebuild_leave_balances', stdout=output)
+        self.assertEqual(used(self.employee, 2024, 'Sick'), 2)
+
+    def test_cancel_from_leave_list(self):
+        leave = self.leave(status='Approved')
+        self.client.force_login(self.employee)
+        self.client.post(reverse('cancel_leave', args=[leave.id]))
+
+        leave.refresh_from_db()
+        self.assertEqual(leave.status, 'Cancelled')
+        self.assertEqual(used(self.employee), 0)
+
+
+class LeaveBalanceAPITests(APITestCase):
+    def setUp(self):
+        calendar.invalidate()
+        self.admin = User.objects.create_user(email='admin@example.com', name='Admin', role='Admin', password='pass12345')
+        self.employee = User.objects.create_user(email='emp@example.com', name='Emp', password='pass12345')
+        self.other = User.objects.create_user(email='other@example.com', name='Other', password='pass12345')
+        self.leave = LeaveRequest.objects.create(
+            employee=self.employee, leave_type='Sick', start_date=MONDAY, end_date=SUNDAY, reason="Flu"
+        )
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+    def sick_days(self, user, **params):
+        self.authenticate(user)
+        response = self.client.get('/leave-requests/balance/', {'year': 2025, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {row['leave_type']: row['used_days'] for row in response.data}['Sick']
+
+    def test_approve_and_cancel(self):
+        self.authenticate(self.admin)
+        self.client.post(f'/leave-requests/{self.leave.id}/approve/')
+        self.assertEqual(self.sick_days(self.employee), 5)
+
+        self.authenticate(self.employee)
+        response = self.client.post(f'/leave-requests/{self.leave.id}/cancel/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'Cancelled')
+        self.assertEqual(self.sick_days(self.employee), 0)
+
+        response = self.client.post(f'/leave-requests/{self.leave.id}/cancel/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_only_own_requests_and_balances(self):
+        self.authenticate(self.admin)
+        self.client.post(f'/leave-requests/{self.leave.id}/approve/')
+
+        self.authenticate(self.other)
+        response = self.client.post(f'/leave-requests/{self.leave.id}/cancel/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        # The employee filter is for Admins and Managers
+        self.assertEqual(self.sick_days(self.other, employee=self.employee.id), 0)
+        self.assertEqual(self.sick_days(self.admin, employee=self.employee.id), 5)
@@ -0,0 +1,140 @@
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from Ams_app.leaves import decide_leaves
+from Ams_app.models import LeaveBalance, LeaveRequest
+from Ams_app.workdays import calendar
+
+User = get_user_model()
+
+MONDAY = date(2025, 5, 5)
+
+
+def request_leave(employee, start, days=1, status='Pending'):
+    return LeaveRequest.objects.create(
+        employee=employee, leave_type='Casual', start_date=start, end_date=start + timedelta(days=days - 1),
+        reason="Trip", status=status,
+    )
+
+
+class DecideLeavesTests(TestCase):
+    def setUp(self):
+        calendar.invalidate()
+        self.admin = User.objects.create_user(email='admin@example.com', name='Admin', role='Admin', password='pass12345')
+        self.alice = User.objects.create_user(email='alice@example.com', name='Alice', password='pass12345')
+        self.bob = User.objects.create_user(email='bob@example.com', name='Bob', password='pass12345')
+
+    def test_outcomes_per_id(self):
+        request_leave(self.alice, MONDAY, days=2, status='Approved')
+        clashes_with_approved = request_leave(self.alice, MONDAY + timedelta(days=1))
+        first = request_leave(self.bob, MONDAY, days=3)
+        clashes_with_first = request_leave(self.bob, MONDAY + timedelta(days=2))
+        later = request_leave(self.bob, MONDAY + timedelta(days=3))
+        done = request_leave(self.alice, MONDAY + timedelta(days=7), status='Rejected')
+        own = request_leave(self.admin, MONDAY)
+
+        ids = [clashes_with_approved.id, clashes_with_first.id, first.id, later.id, done.id, own.id, 0]
+        outcomes = decide_leaves(ids, 'Approved', self.admin)
+
+        self.assertEqual(list(outcomes), ids)
+        self.assertEqual(outcomes, {
+            clashes_with_approved.id: 'overlap',
+            first.id: 'approved',
+            clashes_with_first.id: 'overlap',
+            later.id: 'approved',
+            done.id: 'not_pending',
+            own.id: 'own_request',
+            0: 'not_found',
+        })
+        self.assertEqual(
+            set(LeaveRequest.objects.filter(status='Approved', employee=self.bob).values_list('id', 'approved_by')),
+            {(first.id, self.admin.id), (later.id, self.admin.id)},
+        )
+        # The ledger follows: Bob has Monday to Thursday
+        self.assertEqual(LeaveBalance.objects.get(employee=self.bob).used_days, 4)
+
+    def test_reject(self):
+        leaves = [request_leave(self.alice, MONDAY), request_leave(self.alice, MONDAY)]
+        outcomes = decide_leaves([leave.id for leave in leaves], 'Rejected', self.admin)
+        self.assertEqual(set(outcomes.values()), {'rejected'})
+        self.assertFalse(LeaveBalance.objects.exists())
+        with self.assertRaises(ValueError):
+            decide_leaves([leaves[0].id], 'Cancelled', self.admin)
+
+    def test_constant_query_count(self):
+        employees = User.objects.bulk_create([
+            User(email=f'emp{i}@example.com', name=f'Emp {i}') for i in range(40)
+        ])
+        leaves = LeaveRequest.objects.bulk_create([
+            LeaveRequest(employee=employee, leave_type='Casual', reason="Trip",
+                         start_date=MONDAY + timedelta(days=7 * week), end_date=MONDAY + timedelta(days=7 * week + 1))
+            for employee in employees for week in range(5)
+        ])
+        calendar.working_days_between(MONDAY, MONDAY)
+        # Read requests, read approved leave, ledger insert and update, one UPDATE,
+        # plus two savepoints (SAVEPOINT and RELEASE each)
+        with self.assertNumQueries(9):
+            outcomes = decide_leaves([leave.id for leave in leaves], 'Approved', self.admin)
+        self.assertEqual(set(outcomes.values()), {'approved'})
+        self.assertEqual(LeaveRequest.objects.filter(status='Approved').count(), 200)
+
+    def test_admin_action(self):
+        superuser = User.objects.create_superuser(email='root@example.com', name='Root', password='pass12345')
+        leaves = [request_leave(self.alice, MONDAY), request_leave(self.alice, MONDAY)]
+        self.client.force_login(superuser)
+
+        response = self.client.post(reverse('admin:Ams_app_leaverequest_changelist'), {
+            'action': 'approve_selected', '_selected_action': [leave.id for leave in leaves],
+        }, follow=True)
+        self.assertContains(response, "1 leave requests approved. Skipped: 1 overlap.")
+
+
+class DecideLeavesAPITests(APITestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(email='manager@example.com', name='Manager', role='Manager', password='pass12345')
+        self.employee = User.objects.create_user(email='emp@example.com', name='Emp', password='pass12345')
+        self.leave = request_leave(self.employee, MONDAY)
+
+    def post(self, user, data):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return self.client.post('/leave-requests/decide/', data, format='json')
+
+    def test_manager_rejects_in_bulk(self):
+        response = self.post(self.manager, {'ids': [self.leave.id, 0], 'status': 'Rejected'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [
+            {'id': self.leave.id, 'outcome': 'rejected'}, {'id': 0, 'outcome': 'not_found'},
+        ])
+        self.leave.refresh_from_db()
+        self.assertEqual((self.leave.status, self.leave.approved_by), ('Rejected', self.manager))
+
+    def test_manager_approves_in_bulk(self):
+        response = self.post(self.manager, {'ids': [self.leave.id], 'status': 'Approved'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': self.leave.id, 'outcome': 'approved'}])
+        self.leave.refresh_from_db()
+        self.assertEqual((self.leave.status, self.leave.approved_by), ('Approved', self.manager))
+        self.assertTrue(LeaveBalance.objects.filter(employee=self.employee).exists())
+
+        # The row stays valid for later saves, as one approved through the single action
+        self.leave.reason = 'Family visit'
+        self.leave.save()
+
+    def test_employee_approver_is_forbidden(self):
+        other = User.objects.create_user(email='other@example.com', name='Other', password='pass12345')
+        self.assertEqual(decide_leaves([self.leave.id], 'Approved', other), {self.leave.id: 'forbidden'})
+        self.leave.refresh_from_db()
+        self.assertEqual((self.leave.status, self.leave.approved_by), ('Pending', None))
+        self.assertFalse(LeaveBalance.objects.exists())
+
+    def test_validation_and_permissions(self):
+        self.assertEqual(self.post(self.employee, {'ids': [self.leave.id], 'status': 'Approved'}).status_code,
+                         status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.post(self.manager, {'ids': [self.leave.id], 'status': 'Cancelled'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.post(self.manager, {'ids': [], 'status': 'Approved'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
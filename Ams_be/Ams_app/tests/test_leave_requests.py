@@ -1,9 +1,12 @@
 from rest_framework.test import APITestCase
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from django.urls import reverse
 from rest_framework_simplejwt.tokens import RefreshToken
 from Ams_app.models import User, LeaveRequest
-from datetime import datetime
+from datetime import date, datetime
 
 class LeaveRequestTests(APITestCase):
     
@@ -109,3 +112,46 @@ class LeaveRequestTests(APITestCase):
             HTTP_AUTHORIZATION=f"Bearer {self.employee_token}",
         )
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class LeaveListPageTests(TestCase):
+
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            email="manager@test.com", name="Manager User", role="Manager", password="password123"
+        )
+        self.employees = User.objects.bulk_create([
+            User(email=f"staff{i}@test.com", name=f"Staff {i}") for i in range(4)
+        ])
+        self.client.force_login(self.manager)
+
+    def create_leaves(self, count, **kwargs):
+        fields = {'leave_type': 'Casual', 'reason': 'Family', 'start_date': date(2025, 7, 1), 'end_date': date(2025, 7, 2)}
+        fields.update(kwargs)
+        LeaveRequest.objects.bulk_create([
+            LeaveRequest(employee=self.employees[n % len(self.employees)], **fields) for n in range(count)
+        ])
+
+    def test_query_count_does_not_depend_on_rows(self):
+        self.create_leaves(3)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse('leave_list'))
+        self.create_leaves(40)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse('leave_list'), {'page_size': 25})
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(len(response.context['leave_requests']), 25)
+        self.assertIsNotNone(response.context['next_cursor'])
+
+    def test_filters_are_applied(self):
+        self.create_leaves(4)
+        self.create_leaves(2, leave_type='Sick', status='Approved', start_date=date(2025, 8, 10), end_date=date(2025, 8, 12))
+
+        response = self.client.get(reverse('leave_list'), {'status': 'Approved', 'leave_type': 'Sick'})
+        self.assertEqual(len(response.context['leave_requests']), 2)
+
+        response = self.client.get(reverse('leave_list'), {'start': '2025-08-12', 'end': '2025-08-31'})
+        self.assertEqual(len(response.context['leave_requests']), 2)
+
+        response = self.client.get(reverse('leave_list'), {'employee': 'staff1@'})
+        self.assertTrue(all(leave.employee_id == self.employees[1].id for leave in response.context['leave_requests']))
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+from Ams_app import metrics
+from Ams_app.metrics import Counter, Histogram, Registry, render
+
+User = get_user_model()
+
+
+def sample(text, line_start):
+    """Value of the first exposition line starting with line_start."""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+class RegistryTests(TestCase):
+    def test_text_format(self):
+        registry = Registry()
+        requests = Counter('requests_total', "Requests.", ['view'], registry=registry)
+        latency = Histogram('latency_seconds', "Latency.", buckets=(0.1, 1.0), registry=registry)
+        requests.inc(view='home')
+        requests.inc(2, view='home')
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(3)
+
+        text = render(registry.collect())
+        self.assertIn('# TYPE requests_total counter', text)
+        self.assertIn('requests_total{view="home"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn('latency_seconds_count 3', text)
+
+    def test_multiprocess_files_are_summed(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        registry = Registry()
+        requests = Counter('requests_total', "Requests.", ['view'], registry=registry)
+        latency = Histogram('latency_seconds', "Latency.", buckets=(0.1,), registry=registry)
+        requests.inc(view='home')
+        latency.observe(0.05)
+        # Another worker's file
+        with open(os.path.join(directory.name, '99999.json'), 'w') as other:
+            json.dump({
+                'requests_total': {'type': 'counter', 'help': "Requests.", 'labelnames': ['view'], 'buckets': [],
+                                   'values': [[['home'], 4], [['list'], 1]]},
+                'latency_seconds': {'type': 'histogram', 'help': "Latency.", 'labelnames': [], 'buckets': [0.1],
+                                    'values': [[[], [0, 2, 5.0, 2]]]},
+            }, other)
+
+        with mock.patch.object(metrics, 'MULTIPROCESS_DIR', directory.name):
+            text = render(registry.collect())
+        self.assertIn('requests_total{view="home"} 5', text)
+        self.assertIn('requests_total{view="list"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_count 3', text)
+        self.assertTrue(os.path.exists(os.path.join(directory.name, f'{os.getpid()}.json')))
+
+
+@mock.patch.object(metrics, 'SCRAPE_TOKEN', 'secret')
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        self.employee = User.objects.create_user(email='emp@example.com', name='Employee', password='pass12345')
+        token = RefreshToken.for_user(self.employee).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_views_punches_and_jwt_are_counted(self):
+        before = self.scrape()
+        self.client.post('/attendances/', **self.auth)
+        self.client.post(reverse('token_obtain_pair'), {'email': 'emp@example.com', 'password': 'pass12345'})
+        after = self.scrape()
+
+        def delta(line_start):
+            return (sample(after, line_start) or 0) - (sample(before, line_start) or 0)
+
+        self.assertEqual(delta('ams_http_request_duration_seconds_count{view="attendance-list",method="POST",status="201"}'), 1)
+        self.assertGreaterEqual(delta('ams_view_queries_total{view="attendance-list"}'), 1)
+        self.assertEqual(delta('ams_punches_total{direction="in"}'), 1)
+        self.assertEqual(delta('ams_jwt_tokens_total{kind="issue"}'), 1)
+        self.assertIn('ams_cache_requests_total{cache="workday_calendar",result="hit"}', after)
+
+    def test_scrape_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), **self.auth).status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    def test_without_a_token_only_debug_is_served(self):
+        with mock.patch.object(metrics, 'SCRAPE_TOKEN', None):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+            with self.settings(DEBUG=True):
+                self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
@@ -0,0 +1,66 @@
+from datetime import date, time
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from Ams_app.models import Attendance, Holiday, LeaveRequest, MonthlyAttendanceReport, Shift
+from Ams_app.reports import build_monthly_reports
+from Ams_app.workdays import calendar
+
+User = get_user_model()
+
+
+class MonthlyReportCommandTests(TestCase):
+    def setUp(self):
+        calendar.invalidate()
+        shift = Shift.objects.create(name="Day", start_time="09:00", end_time="17:00")
+        self.alice = User.objects.create_user(email='alice@example.com', name='Alice', password='pass12345', shift=shift)
+        self.bob = User.objects.create_user(email='bob@example.com', name='Bob', password='pass12345', shift=shift)
+        self.gone = User.objects.create_user(email='gone@example.com', name='Gone', password='pass12345')
+        self.gone.is_active = False
+        self.gone.save()
+
+        # May 2025: 22 weekdays, one of them a holiday
+        Holiday.objects.create(name="May Day", start_date=date(2025, 5, 1), end_date=date(2025, 5, 1), description="")
+        Attendance.objects.bulk_create([
+            Attendance(user=self.alice, date=date(2025, 5, 5), check_in=time(9, 10), check_out=time(18), status='Present'),
+            Attendance(user=self.alice, date=date(2025, 5, 6), check_in=time(9), check_out=time(17), status='Present'),
+        ])
+        # Fri 9 - Tue 13 May is three working days; Wed 28 May - Mon 2 Jun has three in May
+        LeaveRequest.objects.bulk_create([
+            LeaveRequest(employee=self.alice, leave_type='Sick', start_date=date(2025, 5, 9), end_date=date(2025, 5, 13), reason="Flu", status='Approved'),
+            LeaveRequest(employee=self.alice, leave_type='Casual', start_date=date(2025, 5, 28), end_date=date(2025, 6, 2), reason="Trip", status='Approved'),
+            LeaveRequest(employee=self.alice, leave_type='Lop', start_date=date(2025, 5, 20), end_date=date(2025, 5, 20), reason="Pending", status='Pending'),
+        ])
+
+    def test_generates_reports_for_active_employees(self):
+        output = StringIO()
+        call_command('generate_monthly_reports', month=(2025, 5), workers=1, batch_size=1, stdout=output)
+
+        self.assertEqual(
+            set(MonthlyAttendanceReport.objects.values_list('user_id', flat=True)), {self.alice.id, self.bob.id}
+        )
+        alice = MonthlyAttendanceReport.objects.get(user=self.alice, year=2025, month=5)
+        self.assertEqual((alice.working_days, alice.holiday_days, alice.days_present), (21, 1, 2))
+        self.assertEqual(alice.leave_days, {'Sick': 3, 'Casual': 3})
+        self.assertEqual(alice.worked_seconds, (8 * 60 + 50) * 60 + 8 * 3600)
+        self.assertEqual((alice.late_seconds, alice.overtime_seconds), (10 * 60, 50 * 60))
+
+        bob = MonthlyAttendanceReport.objects.get(user=self.bob)
+        self.assertEqual((bob.days_present, bob.worked_seconds, bob.leave_days), (0, 0, {}))
+        self.assertIn("batch 2/2", output.getvalue())
+
+    def test_rerun_updates_existing_rows(self):
+        call_command('generate_monthly_reports', month=(2025, 5), workers=1, stdout=StringIO())
+        Attendance.objects.create(user=self.bob, date=date(2025, 5, 7), check_in=time(9), check_out=time(17), status='Present')
+        call_command('generate_monthly_reports', month=(2025, 5), workers=1, stdout=StringIO())
+
+        self.assertEqual(MonthlyAttendanceReport.objects.count(), 2)
+        self.assertEqual(MonthlyAttendanceReport.objects.get(user=self.bob).days_present, 1)
+
+    def test_batch_query_count(self):
+        build_monthly_reports([self.alice.id], 2025, 5)  # Loads the holiday calendar and the Shift table
+        # Attendance, shifts, shift assignments, leave; the upsert inside a
+        # savepoint (SAVEPOINT and RELEASE)
+        with self.assertNumQueries(7):
+            self.assertEqual(build_monthly_reports([self.alice.id, self.bob.id], 2025, 5), 2)
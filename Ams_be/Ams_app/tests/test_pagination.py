@@ -0,0 +1,101 @@
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from Ams_app.models import Attendance, LeaveRequest
+from Ams_app.pagination import KeysetPaginator
+
+User = get_user_model()
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        users = User.objects.bulk_create([User(email=f'user{i}@example.com', name=f'User {i}') for i in range(5)])
+        # Five rows share each date, so the id tie-breaker matters
+        Attendance.objects.bulk_create([
+            Attendance(user=user, date=date(2025, 5, 1) + timedelta(days=day), status='Present')
+            for day in range(7) for user in users
+        ])
+
+    def walk(self, page_size):
+        paginator = KeysetPaginator(Attendance.objects.all(), ('date', 'id'), page_size)
+        seen, cursor, pages = [], None, 0
+        while True:
+            rows, cursor, _ = paginator.page(cursor)
+            seen.extend((row.date, row.id) for row in rows)
+            pages += 1
+            if cursor is None:
+                return seen, pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        seen, pages = self.walk(page_size=4)
+        self.assertEqual(pages, 9)
+        self.assertEqual(len(seen), 35)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_previous_cursor_returns_the_earlier_page(self):
+        paginator = KeysetPaginator(Attendance.objects.all(), ('date', 'id'), 6)
+        first, next_cursor, previous_cursor = paginator.page()
+        self.assertIsNone(previous_cursor)
+        second, _, previous_cursor = paginator.page(next_cursor)
+        again, _, _ = paginator.page(previous_cursor)
+        self.assertEqual([row.id for row in again], [row.id for row in first])
+        self.assertNotEqual(second[0].id, first[0].id)
+
+    def test_deep_pages_cost_the_same_queries_as_the_first(self):
+        paginator = KeysetPaginator(Attendance.objects.all(), ('date', 'id'), 5)
+        with CaptureQueriesContext(connection) as first_page:
+            _, cursor, _ = paginator.page()
+        for _ in range(4):
+            _, cursor, _ = paginator.page(cursor)
+        with CaptureQueriesContext(connection) as deep_page:
+            paginator.page(cursor)
+        self.assertEqual(len(first_page), len(deep_page))
+        self.assertNotIn('OFFSET', deep_page[0]['sql'])
+        self.assertNotIn('COUNT', deep_page[0]['sql'])
+
+    def test_invalid_cursor_is_rejected(self):
+        paginator = KeysetPaginator(Attendance.objects.all(), ('date', 'id'), 5)
+        with self.assertRaises(ValueError):
+            paginator.page('not-a-cursor')
+
+
+class PaginatedEndpointTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', name='Admin', role='Admin', password='pass12345')
+        LeaveRequest.objects.bulk_create([
+            LeaveRequest(employee=self.admin, leave_type='Casual', reason='Trip',
+                         start_date=date(2025, 6, 1) + timedelta(days=3 * n), end_date=date(2025, 6, 2) + timedelta(days=3 * n))
+            for n in range(12)
+        ])
+        token = str(RefreshToken.for_user(self.admin).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_leave_requests_api_is_paginated(self):
+        response = self.client.get('/leave-requests/', {'page_size': 5})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['previous'])
+
+        ids = [leave['id'] for leave in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ids.extend(leave['id'] for leave in response.data['results'])
+        self.assertEqual(len(ids), 12)
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+    def test_attendance_list_page_uses_cursors(self):
+        Attendance.objects.bulk_create([
+            Attendance(user=self.admin, date=date(2025, 5, 1) + timedelta(days=day), status='Present')
+            for day in range(15)
+        ])
+        self.client.force_login(self.admin)
+        response = self.client.get('/attendance/list', {'page_size': 10})
+        self.assertEqual(len(response.context['attendance_records']), 10)
+        self.assertIsNotNone(response.context['next_cursor'])
+
+        response = self.client.get('/attendance/list', {'cursor': response.context['next_cursor'], 'page_size': 10})
+        self.assertEqual(len(response.context['attendance_records']), 5)
+        self.assertIsNone(response.context['next_cursor'])
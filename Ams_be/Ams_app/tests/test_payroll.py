@@ -0,0 +1,70 @@
+from datetime import date, time
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from Ams_app.models import Attendance, Shift
+from Ams_app.payroll import load_attendance, monthly_totals, payroll_totals
+
+User = get_user_model()
+
+
+class PayrollTotalsTests(TestCase):
+    def setUp(self):
+        self.day_shift = Shift.objects.create(name="Day", start_time="09:00", end_time="17:00")
+        self.night_shift = Shift.objects.create(name="Night", start_time="22:00", end_time="06:00")
+        self.alice = User.objects.create_user(email='alice@example.com', name='Alice', password='pass12345', shift=self.day_shift)
+        self.bob = User.objects.create_user(email='bob@example.com', name='Bob', password='pass12345', shift=self.night_shift)
+        self.carol = User.objects.create_user(email='carol@example.com', name='Carol', password='pass12345')
+
+    def totals_for(self, user, year, month, totals):
+        return next(row for row in totals if (row['user_id'], row['year'], row['month']) == (user.id, year, month))
+
+    def test_day_shift_totals_per_month(self):
+        Attendance.objects.bulk_create([
+            # 15 minutes late, leaves 30 minutes early
+            Attendance(user=self.alice, date=date(2025, 5, 5), check_in=time(9, 15), check_out=time(16, 30), status='Present'),
+            # Early in, one hour of overtime
+            Attendance(user=self.alice, date=date(2025, 5, 6), check_in=time(8, 30), check_out=time(17, 30), status='Present'),
+            # Still checked in: counts as present and late, nothing worked yet
+            Attendance(user=self.alice, date=date(2025, 5, 7), check_in=time(10), status='Present'),
+            Attendance(user=self.alice, date=date(2025, 5, 8), status='Absent'),
+            Attendance(user=self.alice, date=date(2025, 6, 2), check_in=time(9), check_out=time(17), status='Present'),
+        ])
+        totals = payroll_totals(date(2025, 5, 1), date(2025, 6, 30))
+
+        may = self.totals_for(self.alice, 2025, 5, totals)
+        self.assertEqual(may['days_present'], 3)
+        self.assertEqual(may['worked_seconds'], (7 * 60 + 15) * 60 + 9 * 3600)
+        self.assertEqual(may['late_seconds'], 15 * 60 + 3600)
+        self.assertEqual(may['early_leave_seconds'], 30 * 60)
+        self.assertEqual(may['overtime_seconds'], 3600)
+
+        june = self.totals_for(self.alice, 2025, 6, totals)
+        self.assertEqual((june['days_present'], june['worked_seconds'], june['overtime_seconds']), (1, 8 * 3600, 0))
+
+    def test_night_shift_crosses_midnight(self):
+        Attendance.objects.create(user=self.bob, date=date(2025, 5, 5), check_in=time(22, 10), check_out=time(5, 50), status='Present')
+        bob = self.totals_for(self.bob, 2025, 5, payroll_totals(date(2025, 5, 1), date(2025, 5, 31)))
+        self.assertEqual(bob['worked_seconds'], 7 * 3600 + 40 * 60)
+        self.assertEqual(bob['late_seconds'], 10 * 60)
+        self.assertEqual(bob['early_leave_seconds'], 10 * 60)
+        self.assertEqual(bob['overtime_seconds'], 0)
+
+    def test_matches_get_total_hours(self):
+        rows = Attendance.objects.bulk_create([
+            Attendance(user=self.carol, date=date(2025, 5, day), check_in=time(8, day), check_out=time(12 + day % 5, 7), status='Present')
+            for day in range(1, 21)
+        ])
+        carol = self.totals_for(self.carol, 2025, 5, payroll_totals(date(2025, 5, 1), date(2025, 5, 31), [self.carol.id]))
+
+        expected = 0
+        for row in rows:
+            hours, minutes, seconds = [int(part.split()[0]) for part in row.get_total_hours().split(', ')]
+            expected += hours * 3600 + minutes * 60 + seconds
+        self.assertEqual(carol['worked_seconds'], expected)
+        # No shift, so nothing counts as late or overtime
+        self.assertEqual((carol['late_seconds'], carol['overtime_seconds']), (0, 0))
+
+    def test_single_query_and_empty_range(self):
+        with self.assertNumQueries(1):
+            arrays = load_attendance(date(2020, 1, 1), date(2020, 12, 31))
+        self.assertEqual(monthly_totals(arrays), [])
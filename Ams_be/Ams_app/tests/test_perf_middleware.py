@@ -0,0 +1,34 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from Ams_app import perf
+
+User = get_user_model()
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', name='Admin', role='Admin', password='pass12345')
+        self.client.force_login(self.admin)
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('attendance_list'))
+        self.assertNotIn('Server-Timing', response)
+
+    @mock.patch.object(perf, 'ENABLED', True)
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('attendance_list'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'total;dur=[\d.]+, db;dur=[\d.]+;desc="[1-9]\d* queries", tpl;dur=[\d.]+')
+        self.assertGreater(float(timing.split('tpl;dur=')[1]), 0)
+
+    @mock.patch.object(perf, 'ENABLED', True)
+    @mock.patch.object(perf, 'SLOW_REQUEST_MS', 0)
+    def test_slow_requests_log_queries_with_explain(self):
+        with self.assertLogs('Ams_app.perf', level='WARNING') as logs:
+            self.client.get(reverse('attendance_list'))
+        message = logs.output[0]
+        self.assertIn('GET /attendance/list', message)
+        self.assertIn('SELECT', message)
+        self.assertNotIn('EXPLAIN failed', message)
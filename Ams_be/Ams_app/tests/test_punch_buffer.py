@@ -0,0 +1,126 @@
+import os
+import tempfile
+import time
+from datetime import datetime, time as clock
+from io import StringIO
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from Ams_app import punch_buffer
+from Ams_app.models import Attendance
+from Ams_app.punch_buffer import PunchBuffer
+from Ams_app.today import today_cache
+
+User = get_user_model()
+
+
+class PunchBufferTests(TestCase):
+    def setUp(self):
+        today_cache.clear()
+        self.employee = User.objects.create_user(email='emp@example.com', name='Employee', password='pass12345')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'punches.sqlite3')
+        # No flusher thread: the tests flush explicitly
+        self.buffer = PunchBuffer(self.path, autostart=False)
+        for patch in (
+            mock.patch.object(punch_buffer, 'ENABLED', True),
+            mock.patch.object(punch_buffer, '_buffer', self.buffer),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.today = timezone.localdate()
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.today, clock(hour, minute)))
+
+    def test_punches_are_acknowledged_before_they_reach_the_database(self):
+        attendance = punch_buffer.punch(self.employee.id, 'in', when=self.at(9))
+        self.assertEqual((attendance.check_in, attendance.status), (clock(9), 'Present'))
+        self.assertFalse(Attendance.objects.exists())
+
+        # Reads see the buffered punch; a second check-in is refused
+        self.assertEqual(punch_buffer.today_attendance(self.employee.id).check_in, clock(9))
+        self.assertIsNone(punch_buffer.punch(self.employee.id, 'in', when=self.at(9, 5)))
+        attendance = punch_buffer.punch(self.employee.id, when=self.at(17))
+        self.assertEqual(attendance.check_out, clock(17))
+
+        self.assertEqual(self.buffer.drain(), 2)
+        stored = Attendance.objects.get(user=self.employee)
+        self.assertEqual((stored.check_in, stored.check_out), (clock(9), clock(17)))
+        self.assertEqual(self.buffer.size(), 0)
+        self.assertIsNone(punch_buffer.punch(self.employee.id, when=self.at(18)))
+
+    def test_flush_racing_a_punch_does_not_let_a_duplicate_through(self):
+        punch_buffer.punch(self.employee.id, 'in', when=self.at(9))
+        append = self.buffer.append
+
+        def flushed_first(*args, **kwargs):
+            # The flusher writes and deletes the pending check-in just before the tap takes the lock
+            self.buffer.drain()
+            return append(*args, **kwargs)
+
+        with mock.patch.object(self.buffer, 'append', side_effect=flushed_first):
+            self.assertIsNone(punch_buffer.punch(self.employee.id, 'in', when=self.at(9, 5)))
+        self.assertEqual(self.buffer.size(), 0)
+        self.assertEqual(Attendance.objects.get(user=self.employee).check_in, clock(9))
+
+    def test_flush_between_the_read_and_the_lock_is_noticed(self):
+        punch_buffer.punch(self.employee.id, 'in', when=self.at(9))
+        reads = []
+
+        def load():
+            reads.append(Attendance.objects.filter(user=self.employee, date=self.today).first())
+            if len(reads) == 1:
+                # The first read happens outside the buffer's write lock, and
+                # the flusher writes and deletes the pending check-in right after it
+                self.assertFalse(self.buffer._db().in_transaction)
+                self.buffer.drain()
+            return reads[-1]
+
+        self.assertIsNone(self.buffer.append(self.employee.id, 'in', self.at(9, 5), load))
+        # The flush was noticed and the row read again
+        self.assertEqual(len(reads), 2)
+        self.assertEqual(Attendance.objects.get(user=self.employee).check_in, clock(9))
+        self.assertEqual(self.buffer.size(), 0)
+
+        # Without a flush in between the row is read once
+        reads.clear()
+        self.assertIsNotNone(self.buffer.append(
+            self.employee.id, 'out', self.at(18), lambda: reads.append(None) or Attendance.objects.get(user=self.employee)
+        ))
+        self.assertEqual(len(reads), 1)
+
+    def test_status_pages_read_buffered_punches(self):
+        self.client.force_login(self.employee)
+        self.client.post(reverse('attendance_check'), {'action': 'checkin'})
+        self.assertFalse(Attendance.objects.exists())
+
+        response = self.client.get(reverse('attendance_status'))
+        self.assertIsNotNone(response.context['checkin_time'])
+        response = self.client.get(reverse('attendance_check'))
+        self.assertEqual(response.context['status'], 'Present')
+
+    def test_unflushed_and_abandoned_punches_are_recovered(self):
+        punch_buffer.punch(self.employee.id, 'in', when=self.at(9))
+        # A flusher claims the punch and dies before writing it
+        self.buffer._claim(10)
+        self.assertEqual(self.buffer.flush(), 0)
+
+        # A fresh process over the same file picks it up once the lease ends
+        restarted = PunchBuffer(self.path, autostart=False)
+        with mock.patch.object(time, 'time', return_value=time.time() + punch_buffer.LEASE_SECONDS + 1):
+            call_command('flush_punch_buffer', path=self.path, stdout=StringIO())
+        self.assertEqual(Attendance.objects.get(user=self.employee).check_in, clock(9))
+        self.assertEqual(restarted.size(), 0)
+
+    def test_failed_flush_keeps_the_batch(self):
+        punch_buffer.punch(self.employee.id, 'in', when=self.at(9))
+        with mock.patch.object(punch_buffer, 'ingest_punches', side_effect=RuntimeError("database down")):
+            with self.assertRaises(RuntimeError):
+                self.buffer.flush()
+        self.assertEqual(self.buffer.drain(), 1)
+        self.assertTrue(Attendance.objects.filter(user=self.employee).exists())
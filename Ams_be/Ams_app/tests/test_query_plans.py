@@ -0,0 +1,107 @@
+import re
+from datetime import date, timedelta
+from django.db import connection
+from django.test import TestCase
+from Ams_app.models import Attendance, Holiday, LeaveRequest, Shift, User, UserShiftAssignment
+
+USERS = 300
+DAYS = 60
+START = date(2025, 1, 1)
+
+
+class QueryPlanTests(TestCase):
+    """The hot filters must be answered from an index, never a full table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shift = Shift.objects.create(name="Morning", start_time="09:00", end_time="17:00")
+        users = User.objects.bulk_create([
+            User(email=f'plan{i}@example.com', name=f'Plan User {i}') for i in range(USERS)
+        ])
+        cls.user = users[USERS // 2]
+
+        days = [START + timedelta(days=offset) for offset in range(DAYS)]
+        Attendance.objects.bulk_create([
+            Attendance(user=user, date=day, status='Absent' if day.day % 7 == 0 else 'Present')
+            for user in users for day in days
+        ], batch_size=2000)
+        UserShiftAssignment.objects.bulk_create([
+            UserShiftAssignment(user=user, shift=cls.shift, date=day)
+            for user in users for day in days
+        ], batch_size=2000)
+
+        statuses = ['Approved', 'Rejected', 'Pending', 'Approved', 'Rejected']
+        LeaveRequest.objects.bulk_create([
+            LeaveRequest(
+                employee=user, leave_type='Casual', reason='Seeded',
+                start_date=START + timedelta(days=3 * n), end_date=START + timedelta(days=3 * n + 1),
+                status=statuses[n % len(statuses)],
+            )
+            for user in users for n in range(20)
+        ], batch_size=2000)
+        Holiday.objects.bulk_create([
+            Holiday(name=f'Holiday {n}', start_date=START + timedelta(days=10 * n),
+                    end_date=START + timedelta(days=10 * n + 1), description='Seeded')
+            for n in range(30)
+        ])
+
+        # Give the planner real statistics
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index_name=None):
+        plan = queryset.explain()
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan', plan)
+        elif connection.vendor == 'sqlite':
+            self.assertIsNone(re.search(r'\bSCAN\b', plan), plan)
+        if index_name:
+            self.assertIn(index_name, plan)
+
+    def test_attendance_history_for_user(self):
+        end = START + timedelta(days=30)
+        # The list/report views
+        self.assertUsesIndex(Attendance.objects.filter(user=self.user, date__range=(START, end)))
+        # Fully covered by the index on PostgreSQL
+        self.assertUsesIndex(
+            Attendance.objects.filter(user=self.user, date__range=(START, end))
+            .values('date', 'status', 'check_in', 'check_out'),
+            'attendance_user_date_idx',
+        )
+
+    def test_attendance_by_status_and_date(self):
+        self.assertUsesIndex(
+            Attendance.objects.filter(status='Absent', date=START + timedelta(days=6)),
+            'attendance_status_date_idx',
+        )
+
+    def test_leave_overlap_check(self):
+        # The query LeaveRequest.clean() runs
+        self.assertUsesIndex(
+            LeaveRequest.objects.filter(
+                employee=self.user, status='Approved',
+                start_date__lte=START + timedelta(days=9), end_date__gte=START,
+            ).exclude(id=0),
+            'leave_emp_status_dates_idx',
+        )
+
+    def test_pending_leave_queue(self):
+        self.assertUsesIndex(
+            LeaveRequest.objects.filter(
+                status='Pending', start_date__lte=START + timedelta(days=9), end_date__gte=START,
+            ),
+            'leave_pending_dates_idx',
+        )
+
+    def test_shift_assignments_by_date(self):
+        day = START + timedelta(days=10)
+        self.assertUsesIndex(UserShiftAssignment.objects.filter(date=day), 'shift_assign_date_shift_idx')
+        self.assertUsesIndex(
+            UserShiftAssignment.objects.filter(date=day, shift=self.shift), 'shift_assign_date_shift_idx'
+        )
+
+    def test_holiday_overlap(self):
+        # Served by the unique indexes on start_date / end_date
+        self.assertUsesIndex(
+            Holiday.objects.filter(start_date__lte=START + timedelta(days=5), end_date__gte=START)
+        )
@@ -0,0 +1,100 @@
+from datetime import date, time
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from Ams_app.models import Attendance, DailyAttendanceSummary, Holiday, LeaveRequest
+from Ams_app.reconcile import reconcile_day
+from Ams_app.workdays import calendar
+
+User = get_user_model()
+
+MONDAY = date(2025, 5, 5)
+MAY_DAY = date(2025, 5, 1)  # Thursday, a Holiday below
+SATURDAY = date(2025, 5, 3)
+
+
+class ReconcileAttendanceTests(TestCase):
+    def setUp(self):
+        calendar.invalidate()
+        Holiday.objects.create(name="May Day", start_date=MAY_DAY, end_date=MAY_DAY, description="")
+        make = User.objects.create_user
+        self.worked = make(email='worked@example.com', name='Worked', password='pass12345')
+        self.on_leave = make(email='leave@example.com', name='Leave', password='pass12345')
+        self.missing = make(email='missing@example.com', name='Missing', password='pass12345')
+        self.opened = make(email='opened@example.com', name='Opened', password='pass12345')
+        self.marked_absent = make(email='absent@example.com', name='Absent', password='pass12345')
+        self.inactive = make(email='gone@example.com', name='Gone', password='pass12345')
+        self.inactive.is_active = False
+        self.inactive.save()
+
+        for employee in (self.on_leave, self.marked_absent):
+            LeaveRequest.objects.create(
+                employee=employee, leave_type='Sick', start_date=MAY_DAY, end_date=MONDAY, reason="Flu", status='Approved'
+            )
+        for day in (MONDAY, MAY_DAY):
+            Attendance.objects.create(user=self.worked, date=day, check_in=time(9), check_out=time(17), status='Present')
+            # Opened without a punch (the old attendance page did this on GET)
+            Attendance.objects.create(user=self.opened, date=day, status='Present')
+        Attendance.objects.create(user=self.marked_absent, date=MONDAY, status='Absent')
+
+    def statuses(self, day):
+        return dict(Attendance.objects.filter(date=day).values_list('user__email', 'status'))
+
+    def test_working_day(self):
+        result = reconcile_day(MONDAY)
+
+        self.assertEqual(self.statuses(MONDAY), {
+            'worked@example.com': 'Present',
+            'leave@example.com': 'On Leave',
+            'missing@example.com': 'Absent',
+            'opened@example.com': 'Absent',
+            'absent@example.com': 'On Leave',
+        })
+        self.assertEqual(result['inserted'], 2)
+        self.assertEqual(result['updated'], 2)
+        self.assertEqual(result['statuses'], {'Present': 1, 'On Leave': 2, 'Absent': 2})
+
+        summary = DailyAttendanceSummary.objects.get(date=MONDAY, shift=None)
+        self.assertEqual((summary.present_count, summary.absent_count, summary.on_leave_count), (1, 2, 2))
+
+    def test_holiday(self):
+        reconcile_day(MAY_DAY)
+        self.assertEqual(self.statuses(MAY_DAY), {
+            'worked@example.com': 'Present',
+            'leave@example.com': 'Holiday',
+            'missing@example.com': 'Holiday',
+            'opened@example.com': 'Holiday',
+            'absent@example.com': 'Holiday',
+        })
+
+    def test_weekend_is_skipped(self):
+        self.assertEqual(reconcile_day(SATURDAY)['inserted'], 0)
+        self.assertFalse(Attendance.objects.filter(date=SATURDAY).exists())
+
+    def test_rerun_changes_nothing(self):
+        reconcile_day(MONDAY)
+        result = reconcile_day(MONDAY)
+        self.assertEqual((result['inserted'], result['updated']), (0, 0))
+
+    def test_query_count_does_not_grow_with_users(self):
+        def queries():
+            Attendance.objects.filter(check_in__isnull=True).delete()
+            with CaptureQueriesContext(connection) as captured:
+                reconcile_day(MONDAY)
+            return len(captured)
+
+        queries()  # Loads the calendar year
+        few = queries()
+        User.objects.bulk_create([User(email=f'extra{index}@example.com', name='Extra') for index in range(200)])
+        self.assertEqual(queries(), few)
+        self.assertEqual(Attendance.objects.filter(date=MONDAY, status='Absent').count(), 202)
+
+    def test_command(self):
+        output = StringIO()
+        call_command('reconcile_attendance', start=MAY_DAY, end=SATURDAY, stdout=output)
+        self.assertIn("2025-05-01: inserted 3, updated 1 (Holiday 4, Present 1)", output.getvalue())
+        self.assertIn("2025-05-03: not a working day, skipped.", output.getvalue())
+        self.assertEqual(len(self.statuses(date(2025, 5, 2))), 5)
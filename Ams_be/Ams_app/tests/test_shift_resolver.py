@@ -0,0 +1,134 @@
+from datetime import date, datetime, time, timedelta
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from Ams_app.models import Attendance, Shift, ShiftRotation, UserShiftAssignment
+from Ams_app.payroll import payroll_totals
+from Ams_app.punches import ingest_punches, record_punch
+from Ams_app.worktime import backfill_work_seconds
+from Ams_app.shifts import effective_shift, effective_shift_id, resolve_shifts, shift_table
+
+User = get_user_model()
+
+ANCHOR = date(2025, 5, 5)
+
+
+class ShiftResolverTests(TestCase):
+    def setUp(self):
+        self.morning = Shift.objects.create(name="Morning", start_time="09:00", end_time="17:00")
+        self.night = Shift.objects.create(name="Night", start_time="22:00", end_time="06:00")
+        rotation = ShiftRotation.objects.create(
+            name="Ops", pattern=[self.morning.id, self.night.id, None], anchor_date=ANCHOR
+        )
+        self.rotating = User.objects.create_user(email='ops@example.com', name='Ops', password='pass12345', shift=self.morning)
+        self.rotating.rotation = rotation
+        self.rotating.save()
+        self.fixed = User.objects.create_user(email='fixed@example.com', name='Fixed', password='pass12345', shift=self.night)
+        self.unassigned = User.objects.create_user(email='none@example.com', name='None', password='pass12345')
+        UserShiftAssignment.objects.create(user=self.fixed, date=ANCHOR + timedelta(days=1), shift=self.morning)
+        UserShiftAssignment.objects.create(user=self.rotating, date=ANCHOR + timedelta(days=2), shift=self.morning)
+
+    def test_matches_single_lookups(self):
+        users = [self.rotating.id, self.fixed.id, self.unassigned.id]
+        days = [ANCHOR + timedelta(days=offset) for offset in range(-1, 7)]
+        resolved = resolve_shifts(users, days)
+
+        self.assertEqual(len(resolved), len(users) * len(days))
+        for (user_id, day), shift in resolved.items():
+            self.assertEqual(shift.id if shift else None, effective_shift_id(user_id, day), (user_id, day))
+        self.assertEqual(resolved[(self.fixed.id, ANCHOR + timedelta(days=1))], self.morning)
+        self.assertEqual(resolved[(self.rotating.id, ANCHOR + timedelta(days=2))], self.morning)
+        self.assertIsNone(resolved[(self.rotating.id, ANCHOR + timedelta(days=5))])
+        self.assertEqual(resolve_shifts([], days), {})
+        self.assertIsNone(resolve_shifts([0], [ANCHOR])[(0, ANCHOR)])
+
+    def test_constant_queries_for_a_month_of_many_users(self):
+        users = User.objects.bulk_create([
+            User(email=f'bulk{i}@example.com', name=f'Bulk {i}', shift=self.morning) for i in range(1000)
+        ])
+        user_ids = [user.id for user in users] + [self.rotating.id, self.fixed.id]
+        days = [date(2025, 5, 1) + timedelta(days=offset) for offset in range(31)]
+        shift_table.all()
+
+        # One query for the users, one for their assignments
+        with self.assertNumQueries(2):
+            resolved = resolve_shifts(user_ids, days)
+        self.assertEqual(len(resolved), 1002 * 31)
+        with self.assertNumQueries(2):
+            resolve_shifts(user_ids[:10], days[:3])
+
+    def test_shift_table_follows_changes(self):
+        shift_table.all()
+        with self.assertNumQueries(1):
+            self.assertEqual(effective_shift(self.fixed.id, ANCHOR), self.night)
+
+        self.night.name = "Late"
+        self.night.save()
+        self.assertEqual(effective_shift(self.fixed.id, ANCHOR).name, "Late")
+
+    def test_unknown_shift_ids_reload_the_table_once(self):
+        # A pattern pointing at a shift that no longer exists, written past the validator
+        ShiftRotation.objects.update(pattern=[self.morning.id, 0])
+        users = User.objects.bulk_create([
+            User(email=f'rot{i}@example.com', name=f'Rot {i}', rotation=self.rotating.rotation) for i in range(50)
+        ])
+        days = [ANCHOR + timedelta(days=offset) for offset in range(10)]
+        shift_table.all()
+
+        # The resolver's two queries and one reload that finds shift 0 still missing
+        with self.assertNumQueries(3):
+            resolved = resolve_shifts([user.id for user in users], days)
+        self.assertIsNone(resolved[(users[0].id, ANCHOR + timedelta(days=1))])
+        with self.assertNumQueries(2):
+            resolve_shifts([user.id for user in users], days)
+
+    def test_deleting_a_shift_clears_it_from_rotations(self):
+        only_nights = ShiftRotation.objects.create(name="Nights", pattern=[self.night.id, None], anchor_date=ANCHOR)
+        self.night.delete()
+
+        rotation = self.rotating.rotation
+        rotation.refresh_from_db()
+        self.assertEqual(rotation.pattern, [self.morning.id, None, None])
+        self.assertTrue(rotation.is_active)
+        only_nights.refresh_from_db()
+        self.assertEqual(only_nights.pattern, [None, None])
+        self.assertFalse(only_nights.is_active)
+
+    def test_punches_use_the_shift_worked_that_day(self):
+        # The rotation puts Ops on the night shift the day after the anchor, where 22:30 is 30 minutes late
+        night = ANCHOR + timedelta(days=1)
+        record_punch(self.rotating.id, 'in', when=timezone.make_aware(datetime.combine(night, time(22, 30))))
+        attendance = record_punch(self.rotating.id, 'out', when=timezone.make_aware(datetime.combine(night, time(23, 30))))
+        self.assertEqual(attendance.late_seconds, 30 * 60)
+
+        # Next night shift in the cycle
+        later = night + timedelta(days=3)
+        ingest_punches([
+            {'user': self.rotating.id, 'timestamp': f'{later}T22:30:00+05:30', 'direction': 'in'},
+            {'user': self.rotating.id, 'timestamp': f'{later}T23:30:00+05:30', 'direction': 'out'},
+        ])
+        self.assertEqual(Attendance.objects.get(user=self.rotating, date=later).late_seconds, 30 * 60)
+
+        Attendance.objects.filter(user=self.rotating).update(late_seconds=None, worked_seconds=None)
+        backfill_work_seconds()
+        self.assertEqual(Attendance.objects.get(user=self.rotating, date=night).late_seconds, 30 * 60)
+
+    def test_payroll_uses_the_shift_worked_that_day(self):
+        # Rotation puts Ops on the night shift the day after the anchor
+        Attendance.objects.create(
+            user=self.rotating, date=ANCHOR + timedelta(days=1), check_in=time(22, 30), check_out=time(6), status='Present'
+        )
+        totals = payroll_totals(ANCHOR, ANCHOR + timedelta(days=6), [self.rotating.id])
+        self.assertEqual(totals[0]['late_seconds'], 30 * 60)
+        self.assertEqual(totals[0]['overtime_seconds'], 0)
+
+    def test_allocation_page_lists_effective_shifts(self):
+        admin = User.objects.create_user(email='admin@example.com', name='Admin', role='Admin', password='pass12345')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('shift_allocate'))
+
+        listed = {row['user'].id: row['shift'] for row in response.context['assignments']}
+        today = response.context['today']
+        self.assertEqual(listed[self.fixed.id].id, effective_shift_id(self.fixed.id, today))
+        self.assertNotIn(self.unassigned.id, listed)
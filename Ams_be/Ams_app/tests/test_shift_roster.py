@@ -0,0 +1,105 @@
+from datetime import date, timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from Ams_app import rosters
+from Ams_app.models import Holiday, Shift, UserShiftAssignment
+from Ams_app.workdays import calendar
+
+User = get_user_model()
+
+MONDAY = date(2025, 5, 5)
+
+
+class ShiftRosterApiTests(APITestCase):
+    def setUp(self):
+        calendar.invalidate()
+        self.manager = User.objects.create_user(email='manager@example.com', name='Manager', role='Manager', password='pass12345')
+        self.staff = [
+            User.objects.create_user(email=f'staff{i}@example.com', name=f'Staff {i}', password='pass12345') for i in range(3)
+        ]
+        self.morning = Shift.objects.create(name="Morning", start_time="09:00", end_time="17:00")
+        self.evening = Shift.objects.create(name="Evening", start_time="14:00", end_time="22:00")
+        self.url = '/shift-assignments/roster/'
+        self.login(self.manager)
+
+    def login(self, user):
+        token = str(RefreshToken.for_user(user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def roster(self, **data):
+        payload = {
+            'users': [user.id for user in self.staff],
+            'start_date': MONDAY.isoformat(),
+            'end_date': (MONDAY + timedelta(days=6)).isoformat(),
+            'shifts': [self.morning.id],
+        }
+        payload.update(data)
+        return self.client.post(self.url, payload, format='json')
+
+    def test_assigns_and_reports_counts(self):
+        response = self.roster()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'created': 21, 'updated': 0, 'unchanged': 0})
+
+        response = self.roster(shifts=[self.morning.id, self.evening.id], days_per_shift=2)
+        self.assertEqual(response.data, {'created': 0, 'updated': 9, 'unchanged': 12})
+        shifts = list(
+            UserShiftAssignment.objects.filter(user=self.staff[0]).order_by('date').values_list('shift__name', flat=True)
+        )
+        self.assertEqual(shifts, ['Morning', 'Morning', 'Evening', 'Evening', 'Morning', 'Morning', 'Evening'])
+
+    def test_working_days_only(self):
+        Holiday.objects.create(name="Holiday", start_date=MONDAY, end_date=MONDAY, description="")
+        response = self.roster(working_days_only=True)
+        self.assertEqual(response.data['created'], 3 * 4)
+        self.assertFalse(UserShiftAssignment.objects.filter(date=MONDAY).exists())
+
+    def test_query_count_does_not_grow_with_roster_size(self):
+        many = User.objects.bulk_create([User(email=f'extra{i}@example.com', name='Extra') for i in range(40)])
+
+        def queries(users, shift):
+            with CaptureQueriesContext(connection) as captured:
+                response = self.roster(users=[user.id for user in users], shifts=[shift.id])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(captured)
+
+        self.assertEqual(queries(self.staff, self.morning), queries(many, self.evening))
+
+    def test_rejects_bad_rosters(self):
+        self.assertEqual(self.roster(users=[999999]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.roster(shifts=[]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.roster(end_date='2025-05-01').status_code, status.HTTP_400_BAD_REQUEST)
+        with mock.patch.object(rosters, 'MAX_ROSTER_ROWS', 20):
+            self.assertEqual(self.roster().status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(UserShiftAssignment.objects.exists())
+
+    def test_employee_cannot_post_roster(self):
+        self.login(self.staff[0])
+        self.assertEqual(self.roster().status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_single_assignment_for_a_user(self):
+        response = self.client.post('/shift-assignments/', {
+            'user': self.staff[1].id, 'date': MONDAY.isoformat(), 'shift_id': self.evening.id,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(UserShiftAssignment.objects.get().user, self.staff[1])
+
+
+class ShiftRosterFormTests(APITestCase):
+    def test_form_saves_roster(self):
+        admin = User.objects.create_user(email='admin@example.com', name='Admin', role='Admin', password='pass12345')
+        shift = Shift.objects.create(name="Morning", start_time="09:00", end_time="17:00")
+        self.client.force_login(admin)
+
+        response = self.client.post(reverse('shift_roster'), {
+            'users': [admin.id], 'shifts': [shift.id], 'days_per_shift': 1,
+            'start_date': MONDAY.isoformat(), 'end_date': (MONDAY + timedelta(days=2)).isoformat(),
+        }, follow=True)
+        self.assertContains(response, "Roster saved: 3 created, 0 updated, 0 unchanged.")
+        self.assertEqual(UserShiftAssignment.objects.count(), 3)
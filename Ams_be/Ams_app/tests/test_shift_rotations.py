@@ -0,0 +1,115 @@
+from datetime import date, timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from Ams_app.models import Shift, ShiftRotation, UserShiftAssignment
+from Ams_app.shifts import effective_shift_id
+
+User = get_user_model()
+
+ANCHOR = date(2025, 5, 5)
+
+
+class ShiftRotationTests(TestCase):
+    def setUp(self):
+        self.morning = Shift.objects.create(name="Morning", start_time="09:00", end_time="17:00")
+        self.night = Shift.objects.create(name="Night", start_time="22:00", end_time="06:00")
+        # Two mornings, a night, a day off
+        self.rotation = ShiftRotation.objects.create(
+            name="Ops", pattern=[self.morning.id, self.morning.id, self.night.id, None], anchor_date=ANCHOR
+        )
+        self.rotating = User.objects.create_user(email='ops@example.com', name='Ops', password='pass12345', shift=self.morning)
+        self.rotating.rotation = self.rotation
+        self.rotating.save()
+        self.fixed = User.objects.create_user(email='fixed@example.com', name='Fixed', password='pass12345', shift=self.night)
+
+    def test_rotation_cycles_from_anchor_date(self):
+        shifts = [effective_shift_id(self.rotating.id, ANCHOR + timedelta(days=offset)) for offset in range(6)]
+        self.assertEqual(shifts, [self.morning.id, self.morning.id, self.night.id, None, self.morning.id, self.morning.id])
+        # Far-off dates cost the same
+        self.assertEqual(effective_shift_id(self.rotating.id, ANCHOR + timedelta(days=4 * 10000 + 2)), self.night.id)
+        # Before the anchor date the default shift applies
+        self.assertEqual(effective_shift_id(self.rotating.id, ANCHOR - timedelta(days=1)), self.morning.id)
+
+    def test_assignment_overrides_rotation_and_default(self):
+        day_off = ANCHOR + timedelta(days=3)
+        UserShiftAssignment.objects.create(user=self.rotating, shift=self.night, date=day_off)
+        UserShiftAssignment.objects.create(user=self.fixed, shift=self.morning, date=day_off)
+        with self.assertNumQueries(1):
+            self.assertEqual(effective_shift_id(self.rotating.id, day_off), self.night.id)
+        self.assertEqual(effective_shift_id(self.fixed.id, day_off), self.morning.id)
+        self.assertEqual(effective_shift_id(self.fixed.id, ANCHOR), self.night.id)
+
+    def test_inactive_rotation_falls_back_to_default_shift(self):
+        self.rotation.is_active = False
+        self.rotation.save()
+        self.assertEqual(effective_shift_id(self.rotating.id, ANCHOR + timedelta(days=2)), self.morning.id)
+
+    def test_compaction_keeps_only_exceptions(self):
+        days = [ANCHOR + timedelta(days=offset) for offset in range(8)]
+        UserShiftAssignment.objects.bulk_create(
+            [UserShiftAssignment(user=self.fixed, shift=self.night, date=day) for day in days]
+            + [UserShiftAssignment(user=self.rotating, shift=self.morning, date=day) for day in days]
+        )
+        before = {(user.id, day): effective_shift_id(user.id, day) for user in (self.fixed, self.rotating) for day in days}
+
+        output = StringIO()
+        call_command('compact_shift_assignments', dry_run=True, stdout=output)
+        self.assertIn("12 redundant shift assignments found.", output.getvalue())
+        self.assertEqual(UserShiftAssignment.objects.count(), 16)
+
+        call_command('compact_shift_assignments', batch_size=5, stdout=output)
+        self.assertIn("Deleted 12 redundant shift assignments.", output.getvalue())
+        # Only the rotating user's night and day-off exceptions remain
+        self.assertEqual(
+            sorted(UserShiftAssignment.objects.values_list('date', flat=True)),
+            [days[2], days[3], days[6], days[7]],
+        )
+        after = {(user.id, day): effective_shift_id(user.id, day) for user in (self.fixed, self.rotating) for day in days}
+        self.assertEqual(after, before)
+
+
+class ShiftRotationApiTests(APITestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(email='manager@example.com', name='Manager', role='Manager', password='pass12345')
+        self.morning = Shift.objects.create(name="Morning", start_time="09:00", end_time="17:00")
+        token = str(RefreshToken.for_user(self.manager).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_create_rotation_and_set_members(self):
+        response = self.client.post('/shift-rotations/', {
+            'name': "Weekly", 'pattern': [self.morning.id] * 5 + [None, None], 'anchor_date': ANCHOR.isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        staff = User.objects.bulk_create([User(email=f'staff{i}@example.com', name='Staff') for i in range(3)])
+        url = f"/shift-rotations/{response.data['id']}/members/"
+        response = self.client.post(url, {'users': [user.id for user in staff]}, format='json')
+        self.assertEqual(response.data, {'members': 3, 'removed': 0})
+        response = self.client.post(url, {'users': [staff[0].id]}, format='json')
+        self.assertEqual(response.data, {'members': 1, 'removed': 2})
+        self.assertEqual(self.client.get('/shift-rotations/').data[0]['member_count'], 1)
+
+    def test_rejects_bad_patterns(self):
+        for pattern in ([], [None], [999999], "Morning", [True]):
+            response = self.client.post('/shift-rotations/', {
+                'name': "Bad", 'pattern': pattern, 'anchor_date': ANCHOR.isoformat(),
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, pattern)
+
+
+class EmployeeShiftPageTests(TestCase):
+    def test_employee_sees_rotation_shift(self):
+        night = Shift.objects.create(name="Night", start_time="22:00", end_time="06:00")
+        rotation = ShiftRotation.objects.create(name="Nights", pattern=[night.id], anchor_date=date(2020, 1, 1))
+        employee = User.objects.create_user(email='emp@example.com', name='Employee', password='pass12345')
+        employee.rotation = rotation
+        employee.save()
+
+        self.client.force_login(employee)
+        self.assertContains(self.client.get(reverse('shift_allocate')), "Night")
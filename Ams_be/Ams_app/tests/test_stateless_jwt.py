@@ -0,0 +1,134 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from Ams_app.authentication import ClaimsTokenObtainPairSerializer
+from Ams_app.models import Attendance, LeaveRequest, Shift
+
+User = get_user_model()
+
+
+class StatelessJWTTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.shift = Shift.objects.create(name="Day", start_time="09:00", end_time="17:00")
+        self.employee = User.objects.create_user(
+            email='emp@example.com', name='Employee', password='pass12345', shift=self.shift
+        )
+        self.manager = User.objects.create_user(email='mgr@example.com', name='Manager', role='Manager', password='pass12345')
+        self.admin = User.objects.create_user(email='admin@example.com', name='Admin', role='Admin', password='pass12345')
+        self.client = APIClient()
+
+    def obtain(self, email, password='pass12345'):
+        response = self.client.post(reverse('token_obtain_pair'), {'email': email, 'password': password})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def use(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_tokens_carry_claims(self):
+        access = AccessToken(self.obtain('emp@example.com')['access'])
+        self.assertEqual(access['role'], 'Employee')
+        self.assertEqual(access['shift'], self.shift.id)
+        self.assertTrue(access['is_active'])
+        self.assertEqual(access['ver'], 0)
+
+    def test_api_calls_do_not_load_the_user(self):
+        self.use(self.obtain('emp@example.com')['access'])
+        self.client.get('/attendances/')  # Caches the token version
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/attendances/')
+        self.assertEqual(response.status_code, 200)
+        user_table = User._meta.db_table
+        self.assertFalse([query['sql'] for query in queries if f'"{user_table}"' in query['sql']])
+
+    def test_role_comes_from_claims(self):
+        self.use(self.obtain('emp@example.com')['access'])
+        self.assertEqual(self.client.get(f'/attendances-report/{self.employee.id}/').status_code, 403)
+
+        self.use(self.obtain('mgr@example.com')['access'])
+        self.assertEqual(self.client.get(f'/attendances-report/{self.employee.id}/').status_code, 200)
+
+    def test_role_change_revokes_tokens(self):
+        tokens = self.obtain('emp@example.com')
+        self.use(tokens['access'])
+        self.assertEqual(self.client.get('/attendances/').status_code, 200)
+
+        self.employee.role = 'Manager'
+        self.employee.save()
+
+        self.assertEqual(self.client.get('/attendances/').status_code, 401)
+        response = self.client.post(reverse('token_refresh'), {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, 401)
+        # Logging in again gives a token with the new role
+        self.use(self.obtain('emp@example.com')['access'])
+        self.assertEqual(self.client.get(f'/attendances-report/{self.employee.id}/').status_code, 200)
+
+    def test_deactivation_and_password_change_revoke_tokens(self):
+        self.use(self.obtain('emp@example.com')['access'])
+        self.employee.set_password('new-pass-123')
+        self.employee.save()
+        self.assertEqual(self.client.get('/attendances/').status_code, 401)
+
+        self.use(self.obtain('emp@example.com', 'new-pass-123')['access'])
+        User.objects.get(id=self.employee.id).save()  # Unchanged: tokens stay valid
+        self.assertEqual(self.client.get('/attendances/').status_code, 200)
+
+        user = User.objects.get(id=self.employee.id)
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        self.assertEqual(self.client.get('/attendances/').status_code, 401)
+
+    def test_password_hash_upgrade_on_login_does_not_revoke_tokens(self):
+        md5 = 'django.contrib.auth.hashers.MD5PasswordHasher'
+        with self.settings(PASSWORD_HASHERS=[md5]):
+            self.employee.set_password('old-hash-123')
+            self.employee.save()
+            self.use(self.obtain('emp@example.com', 'old-hash-123')['access'])
+        with self.settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.PBKDF2PasswordHasher', md5]):
+            self.obtain('emp@example.com', 'old-hash-123')  # Rehashes the password with PBKDF2
+        self.assertTrue(User.objects.get(id=self.employee.id).password.startswith('pbkdf2_'))
+        self.assertEqual(self.client.get('/attendances/').status_code, 200)
+
+    def test_login_does_not_revoke_tokens(self):
+        self.use(self.obtain('emp@example.com')['access'])
+        self.obtain('emp@example.com')  # Updates last_login
+        self.assertEqual(self.client.get('/attendances/').status_code, 200)
+
+    def test_writes_use_the_token_user_id(self):
+        self.use(self.obtain('emp@example.com')['access'])
+        self.assertEqual(self.client.post('/attendances/').status_code, 201)
+        self.assertTrue(Attendance.objects.filter(user=self.employee).exists())
+
+        response = self.client.post('/leave-requests/', {
+            'leave_type': 'Sick', 'start_date': '2030-01-07', 'end_date': '2030-01-08', 'reason': 'Flu',
+        })
+        self.assertEqual(response.status_code, 201)
+        leave = LeaveRequest.objects.get()
+        self.assertEqual(leave.employee, self.employee)
+
+        self.use(self.obtain('admin@example.com')['access'])
+        self.assertEqual(self.client.post(f'/leave-requests/{leave.id}/approve/').status_code, 200)
+        leave.refresh_from_db()
+        self.assertEqual(leave.approved_by, self.admin)
+
+    def test_tokens_without_claims_still_work(self):
+        self.use(RefreshToken.for_user(self.employee).access_token)
+        self.assertEqual(self.client.get('/attendances/').status_code, 200)
+
+    async def test_async_views_check_claims(self):
+        access = ClaimsTokenObtainPairSerializer.get_token(self.employee).access_token
+        headers = {'Authorization': f'Bearer {access}'}
+        response = await self.async_client.post(reverse('async_attendance_punch'), headers=headers)
+        self.assertEqual(response.status_code, 201)
+
+        self.employee.role = 'Admin'
+        await self.employee.asave()
+        response = await self.async_client.get(reverse('async_attendance_today'), headers=headers)
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,74 @@
+from datetime import date
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from Ams_app.models import Attendance, DailyAttendanceSummary, Holiday, LeaveRequest, ShiftRotation, UserShiftAssignment
+from Ams_app.shifts import compact_assignments
+
+User = get_user_model()
+
+# 1 Dec 2025 - 31 Jan 2026: 45 weekdays, Christmas and Republic Day fall on weekdays
+START, END = date(2025, 12, 1), date(2026, 1, 31)
+WORKING_DAYS = 43
+
+
+class SyntheticDataCommandTests(TestCase):
+    def generate(self, **options):
+        output = StringIO()
+        options = dict({'users': 12, 'days': 62, 'end': END, 'seed': 7, 'chunk_users': 5, 'batch_size': 100}, **options)
+        call_command('generate_synthetic_data', stdout=output, **options)
+        return output.getvalue()
+
+    def test_generates_consistent_dataset(self):
+        output = self.generate()
+
+        self.assertIn("rows/s", output)
+        users = User.objects.filter(email__startswith='synthetic')
+        self.assertEqual(users.count(), 12)
+        self.assertTrue(users.first().check_password('synthetic-pass-123'))
+        self.assertEqual(
+            set(Holiday.objects.values_list('start_date', flat=True)), {date(2025, 12, 25), date(2026, 1, 26)}
+        )
+
+        # One attendance row per user and working day; assignments only for swapped days
+        self.assertEqual(Attendance.objects.count(), 12 * WORKING_DAYS)
+        self.assertEqual(ShiftRotation.objects.count(), 3)
+        self.assertTrue(users.filter(rotation__isnull=False).exists())
+        self.assertLess(UserShiftAssignment.objects.count(), 12 * WORKING_DAYS // 10)
+        self.assertEqual(compact_assignments(dry_run=True), 0)
+        self.assertFalse(Attendance.objects.filter(date__in=[date(2025, 12, 25), date(2026, 1, 26)]).exists())
+        self.assertFalse(Attendance.objects.filter(date__week_day__in=[1, 7]).exists())
+        self.assertFalse(Attendance.objects.filter(status='Present', check_in__isnull=True).exists())
+
+        # Every working day of an approved leave is recorded as On Leave
+        for leave in LeaveRequest.objects.filter(status='Approved'):
+            days = Attendance.objects.filter(user=leave.employee_id, date__range=(leave.start_date, leave.end_date))
+            self.assertEqual(set(days.values_list('status', flat=True)), {'On Leave'})
+        self.assertTrue(DailyAttendanceSummary.objects.filter(date__range=(START, END)).exists())
+
+    def test_rerun_continues_numbering_and_keeps_holidays(self):
+        self.generate(users=3, skip_summaries=True)
+        self.generate(users=2, method='bulk', skip_summaries=True)
+
+        self.assertEqual(User.objects.filter(email__startswith='synthetic').count(), 5)
+        self.assertTrue(User.objects.filter(email='synthetic4@example.com').exists())
+        self.assertEqual(Holiday.objects.count(), 2)
+        self.assertEqual(ShiftRotation.objects.count(), 3)
+        self.assertEqual(Attendance.objects.count(), 5 * WORKING_DAYS)
+
+    def test_same_seed_gives_same_data(self):
+        self.generate(users=2, prefix='a', skip_summaries=True)
+        self.generate(users=2, prefix='b', skip_summaries=True)
+
+        def statuses(prefix):
+            return list(
+                Attendance.objects.filter(user__email__startswith=prefix)
+                .order_by('user_id', 'date').values_list('status', 'check_in', 'check_out')
+            )
+        self.assertEqual(statuses('a'), statuses('b'))
+
+    def test_copy_needs_postgresql(self):
+        with self.assertRaises(CommandError):
+            self.generate(method='copy')
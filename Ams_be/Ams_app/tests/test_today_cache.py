@@ -0,0 +1,135 @@
+from datetime import time
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from Ams_app import today
+from Ams_app.models import Attendance
+from Ams_app.punches import record_punch
+from Ams_app.today import TodayCache, today_cache
+
+User = get_user_model()
+
+
+def attendance_queries(queries):
+    return [query['sql'] for query in queries if f'"{Attendance._meta.db_table}"' in query['sql']]
+
+
+class TodayCacheViewTests(TestCase):
+    def setUp(self):
+        today_cache.clear()
+        self.employee = User.objects.create_user(email='emp@example.com', name='Employee', password='pass12345')
+        self.client.force_login(self.employee)
+
+    def test_polling_status_reads_the_database_once(self):
+        misses = today_cache.misses
+        self.client.get(reverse('attendance_status'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('attendance_status'))
+        self.assertContains(response, "No record")
+        self.assertEqual(attendance_queries(queries), [])
+        self.assertEqual(today_cache.misses, misses + 1)
+
+    def test_punches_write_through(self):
+        self.client.get(reverse('attendance_status'))  # Caches "no record"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('attendance_check'), {'action': 'checkin'})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('attendance_status'))
+        self.assertEqual(attendance_queries(queries), [])
+        self.assertEqual(response.context['duration'], "Not completed")
+        self.assertIsNotNone(response.context['checkin_time'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('attendance_check'), {'action': 'checkout'})
+        response = self.client.get(reverse('attendance_status'))
+        self.assertRegex(response.context['duration'], r'^\d+h \d+m$')
+
+    def test_saved_and_deleted_rows_update_the_cache(self):
+        day = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance = Attendance.objects.create(
+                user=self.employee, date=day, check_in=time(9), check_out=time(17, 30), status='Present'
+            )
+        state = today_cache.get(self.employee.id, day, lambda: self.fail("should be cached"))
+        self.assertEqual(state.duration.total_seconds(), 8.5 * 3600)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance.delete()
+        self.assertIsNone(today_cache.get(self.employee.id, day, lambda: None))
+
+    def test_rolled_back_writes_never_reach_the_cache(self):
+        day = timezone.localdate()
+        other = User.objects.create_user(email='other@example.com', name='Other', password='pass12345')
+        with self.captureOnCommitCallbacks(execute=True), self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                record_punch(self.employee.id, 'in')
+                Attendance.objects.create(user=other, date=day, status='Absent')
+                raise RuntimeError("roll back")
+
+        self.assertIsNone(today_cache.get(self.employee.id, day, lambda: None))
+        self.assertIsNone(today_cache.get(other.id, day, lambda: None))
+
+    def test_hit_and_miss_counters_are_exported(self):
+        self.client.get(reverse('attendance_status'))
+        self.client.get(reverse('attendance_status'))
+        with mock.patch('Ams_app.metrics.SCRAPE_TOKEN', None), self.settings(DEBUG=True):
+            body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn(f'ams_cache_requests_total{{cache="today_attendance",result="hit"}} {today_cache.hits}', body)
+        self.assertIn(f'ams_cache_requests_total{{cache="today_attendance",result="miss"}} {today_cache.misses}', body)
+
+
+class TodayCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.day = timezone.localdate()
+
+    def row(self, user_id, check_in=time(9)):
+        return Attendance(user_id=user_id, date=self.day, check_in=check_in, status='Present')
+
+    def test_least_recently_used_users_are_dropped(self):
+        lru = TodayCache(max_entries=2, local_seconds=60)
+        lru.put(self.row(1))
+        lru.put(self.row(2))
+        lru.get(1, self.day, lambda: self.fail("should be cached"))
+        lru.put(self.row(3))
+
+        self.assertEqual(lru.get(1, self.day, lambda: None).check_in, time(9))
+        loads = []
+        lru.get(2, self.day, lambda: loads.append(2))
+        self.assertEqual(loads, [2])
+
+    def test_entries_expire(self):
+        lru = TodayCache(local_seconds=5)
+        lru.put(self.row(1))
+        with mock.patch('Ams_app.today.time.monotonic', return_value=10 ** 9):
+            self.assertIsNone(lru.get(1, self.day, lambda: None))
+
+    def test_load_does_not_overwrite_a_concurrent_punch(self):
+        lru = TodayCache(local_seconds=60)
+
+        def load():
+            lru.put(self.row(1, check_in=time(9, 5)))  # A punch lands while loading
+            return None
+
+        self.assertEqual(lru.get(1, self.day, load).check_in, time(9, 5))
+
+    def test_shared_backend_reaches_other_processes(self):
+        first = TodayCache(local_seconds=60, backend='default')
+        second = TodayCache(local_seconds=60, backend='default')
+        first.put(self.row(1))
+
+        state = second.get(1, self.day, lambda: self.fail("should come from the shared cache"))
+        self.assertEqual(state.check_in, time(9))
+        self.assertEqual(second.shared_hits, 1)
+
+    def test_disabled_always_loads(self):
+        with mock.patch.object(today, 'ENABLED', False):
+            lru = TodayCache(local_seconds=60)
+            lru.put(self.row(1))
+            self.assertIsNone(lru.get(1, self.day, lambda: None))
@@ -0,0 +1,79 @@
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from Ams_app.models import Attendance, DailyAttendanceSummary, Shift
+from Ams_app.punches import ingest_punches
+
+User = get_user_model()
+
+
+class WorkSecondsTests(TestCase):
+    def setUp(self):
+        self.morning = Shift.objects.create(name="Morning", start_time="09:00", end_time="17:00")
+        self.night = Shift.objects.create(name="Night", start_time="22:00", end_time="06:00")
+        self.alice = User.objects.create_user(email='alice@example.com', name='Alice', password='pass12345', shift=self.morning)
+        self.nina = User.objects.create_user(email='nina@example.com', name='Nina', password='pass12345', shift=self.night)
+        self.carol = User.objects.create_user(email='carol@example.com', name='Carol', password='pass12345')
+        self.day = date(2025, 5, 5)
+
+    def seconds(self, attendance):
+        attendance.refresh_from_db()
+        return attendance.worked_seconds, attendance.late_seconds, attendance.overtime_seconds
+
+    def test_stored_at_check_out(self):
+        attendance = Attendance.objects.create(user=self.alice, date=self.day, check_in=time(9, 20), status='Present')
+        self.assertEqual(self.seconds(attendance), (None, None, None))
+
+        attendance.check_out = time(18, 0)
+        attendance.save(update_fields=['check_out'])
+        self.assertEqual(self.seconds(attendance), (8 * 3600 + 40 * 60, 20 * 60, 40 * 60))
+        self.assertEqual(attendance.get_total_hours(), "8 hours, 40 minutes, 0 seconds")
+
+    def test_night_shift_and_no_shift(self):
+        night = Attendance.objects.create(user=self.nina, date=self.day, check_in=time(21, 50), check_out=time(7, 0), status='Present')
+        self.assertEqual(self.seconds(night), (9 * 3600 + 10 * 60, 0, 3600 + 10 * 60))
+
+        no_shift = Attendance.objects.create(user=self.carol, date=self.day, check_in=time(11), check_out=time(20), status='Present')
+        self.assertEqual(self.seconds(no_shift), (9 * 3600, 0, 0))
+
+    def test_bulk_punches_store_seconds(self):
+        def at(clock):
+            return timezone.make_aware(datetime.combine(self.day, clock)).isoformat()
+
+        ingest_punches([
+            {'user': self.alice.id, 'timestamp': at(time(9, 0)), 'direction': 'in'},
+            {'user': self.alice.id, 'timestamp': at(time(17, 30)), 'direction': 'out'},
+            {'user': self.carol.id, 'timestamp': at(time(9, 0)), 'direction': 'in'},
+        ])
+        self.assertEqual(self.seconds(Attendance.objects.get(user=self.alice)), (8 * 3600 + 30 * 60, 0, 30 * 60))
+        self.assertEqual(self.seconds(Attendance.objects.get(user=self.carol)), (None, None, None))
+
+    def test_backfill_command(self):
+        Attendance.objects.bulk_create([
+            Attendance(user=self.alice, date=self.day, check_in=time(9, 30), check_out=time(17), status='Present'),
+            Attendance(user=self.alice, date=self.day + timedelta(days=1), status='Absent'),
+        ])
+        output = StringIO()
+        call_command('backfill_work_seconds', batch_size=1, stdout=output)
+
+        self.assertIn("Stored worked seconds on 1 attendance rows.", output.getvalue())
+        attendance = Attendance.objects.get(date=self.day)
+        self.assertEqual(self.seconds(attendance), (7 * 3600 + 30 * 60, 30 * 60, 0))
+        summary = DailyAttendanceSummary.objects.get(date=self.day, shift=self.morning)
+        self.assertEqual(summary.worked_seconds, 7 * 3600 + 30 * 60)
+
+        call_command('backfill_work_seconds', stdout=output)
+        self.assertIn("Stored worked seconds on 0 attendance rows.", output.getvalue())
+
+    def test_attendance_list_reads_stored_seconds(self):
+        admin = User.objects.create_user(email='admin@example.com', name='Admin', role='Admin', password='pass12345')
+        attendance = Attendance.objects.create(user=self.alice, date=self.day, check_in=time(9), check_out=time(17), status='Present')
+        Attendance.objects.filter(pk=attendance.pk).update(worked_seconds=3600)
+
+        self.client.force_login(admin)
+        response = self.client.get(reverse('attendance_list'))
+        self.assertEqual(response.context['attendance_records'][0]['duration'], timedelta(hours=1))
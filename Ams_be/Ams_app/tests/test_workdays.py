@@ -0,0 +1,78 @@
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from Ams_app.forms import HolidayForm
+from Ams_app.models import Holiday
+from Ams_app.workdays import calendar
+
+
+class WorkdayCalendarTests(TestCase):
+    def setUp(self):
+        calendar.invalidate()
+        # Thursday 1 May to Friday 2 May 2025
+        self.may_day = Holiday.objects.create(
+            name="May Day", start_date=date(2025, 5, 1), end_date=date(2025, 5, 2), description="Public holiday"
+        )
+        # Spans the new year
+        self.winter = Holiday.objects.create(
+            name="Winter break", start_date=date(2025, 12, 31), end_date=date(2026, 1, 2), description="Office closed"
+        )
+
+    def test_weekends_and_holidays_are_not_working_days(self):
+        self.assertTrue(calendar.is_working_day(date(2025, 4, 30)))
+        self.assertFalse(calendar.is_working_day(date(2025, 5, 1)))
+        self.assertFalse(calendar.is_working_day(date(2025, 5, 3)))  # Saturday
+        self.assertFalse(calendar.is_working_day(date(2026, 1, 1)))
+        self.assertTrue(calendar.is_holiday(date(2025, 5, 2)))
+        self.assertFalse(calendar.is_holiday(date(2025, 5, 4)))  # Sunday
+
+    def test_working_days_between(self):
+        # 28 Apr - 9 May 2025: ten weekdays, two of them holidays
+        self.assertEqual(calendar.working_days_between(date(2025, 4, 28), date(2025, 5, 9)), 8)
+        # 29 Dec 2025 - 2 Jan 2026: five weekdays, three of them holidays
+        self.assertEqual(calendar.working_days_between(date(2025, 12, 29), date(2026, 1, 2)), 2)
+        self.assertEqual(calendar.working_days_between(date(2025, 5, 9), date(2025, 5, 1)), 0)
+
+    def test_holiday_overlaps(self):
+        self.assertEqual(calendar.holidays_overlapping(date(2025, 4, 25), date(2025, 5, 1)), [self.may_day.id])
+        self.assertEqual(calendar.holidays_overlapping(date(2025, 12, 1), date(2026, 3, 1)), [self.winter.id])
+        self.assertFalse(calendar.overlaps_holiday(date(2025, 5, 3), date(2025, 5, 30)))
+        self.assertFalse(calendar.overlaps_holiday(date(2025, 5, 1), date(2025, 5, 2), exclude_id=self.may_day.id))
+
+    def test_lookups_are_served_from_memory(self):
+        calendar.is_working_day(date(2025, 6, 2))
+        with self.assertNumQueries(0):
+            for day in range(1, 31):
+                calendar.is_working_day(date(2025, 6, day))
+            calendar.working_days_between(date(2025, 1, 1), date(2025, 12, 31))
+
+    def test_holiday_changes_invalidate_the_calendar(self):
+        self.assertTrue(calendar.is_working_day(date(2025, 8, 15)))
+        Holiday.objects.create(name="Independence Day", start_date=date(2025, 8, 15), end_date=date(2025, 8, 15), description="")
+        self.assertFalse(calendar.is_working_day(date(2025, 8, 15)))
+
+
+class HolidayOverlapTests(APITestCase):
+    def setUp(self):
+        calendar.invalidate()
+        manager = get_user_model().objects.create_user(
+            email='manager@example.com', name='Manager', role='Manager', password='pass12345'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(manager).access_token}')
+        calendar.is_working_day(date(2030, 8, 15))
+        # Written without signals, as another worker's save looks to this process's calendar
+        Holiday.objects.bulk_create([
+            Holiday(name="Independence Day", start_date=date(2030, 8, 15), end_date=date(2030, 8, 15), description="")
+        ])
+
+    def test_writes_check_the_database_not_the_cached_calendar(self):
+        self.assertTrue(calendar.is_working_day(date(2030, 8, 15)))
+        holiday = {'name': "Long weekend", 'start_date': '2030-08-15', 'end_date': '2030-08-16', 'description': ""}
+
+        response = self.client.post('/holidays/', holiday, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(HolidayForm(data=holiday).is_valid())
+        self.assertEqual(Holiday.objects.count(), 1)
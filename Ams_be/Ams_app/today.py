@@ -0,0 +1,176 @@
+# Ams_app/today.py
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+ENABLED = getattr(settings, 'AMS_TODAY_CACHE', True)
+# Users kept in each process (least recently used are dropped first)
+MAX_ENTRIES = getattr(settings, 'AMS_TODAY_CACHE_SIZE', 10000)
+# Optional CACHES alias shared by every worker (e.g. Redis). Without it each
+# process has its own copy and sees other workers' punches only once its
+# copy is older than LOCAL_SECONDS.
+BACKEND = getattr(settings, 'AMS_TODAY_CACHE_BACKEND', None)
+LOCAL_SECONDS = getattr(settings, 'AMS_TODAY_CACHE_LOCAL_SECONDS', 1 if BACKEND else 30)
+# Bounds staleness in the shared backend after writes that skip the cache
+# (queryset updates, other tools)
+SHARED_SECONDS = getattr(settings, 'AMS_TODAY_CACHE_SHARED_SECONDS', 600)
+
+_MISSING = object()
+
+
+# worked_seconds defaults to None so shared-cache values written before it existed still load
+class TodayState(namedtuple('TodayState', 'user_id date check_in check_out status worked_seconds', defaults=[None])):
+    """A user's attendance for one day, with the fields the views read from Attendance."""
+    __slots__ = ()
+
+    @property
+    def duration(self):
+        if self.check_in is None or self.check_out is None:
+            return None
+        if self.worked_seconds is not None:
+            return timedelta(seconds=self.worked_seconds)
+        # Still in the punch buffer
+        return datetime.combine(self.date, self.check_out) - datetime.combine(self.date, self.check_in)
+
+
+def _state(user_id, day, attendance):
+    if attendance is None:
+        return None
+    return TodayState(
+        user_id, day, attendance.check_in, attendance.check_out, attendance.status, attendance.worked_seconds
+    )
+
+
+class TodayCache:
+    """
+    Today's attendance per user: an in-process LRU in front of an optional
+    shared cache, in front of the database. Punches write their result
+    through (put), so polling reads don't query once a user is cached.
+    "No attendance yet" is cached too. Loads only fill empty slots, so a
+    load that raced with a punch can't overwrite the punch's state.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, local_seconds=LOCAL_SECONDS, backend=BACKEND):
+        self.max_entries = max_entries
+        self.local_seconds = local_seconds
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        return caches[self.backend] if self.backend else None
+
+    @staticmethod
+    def _shared_key(user_id, day):
+        return f'ams:today:{user_id}:{day.isoformat()}'
+
+    # ----- In-process LRU ----- #
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[1] >= self.local_seconds:
+                return _MISSING
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _local_set(self, key, state, replace=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if not replace and entry is not None and time.monotonic() - entry[1] < self.local_seconds:
+                return entry[0]
+            self._entries[key] = (state, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return state
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # ----- Reads ----- #
+    def get(self, user_id, day, load):
+        """
+        The TodayState of a user for a day (None when there is no attendance),
+        calling load() for the Attendance row (or None) on a miss.
+        """
+        if not ENABLED:
+            return _state(user_id, day, load())
+        key = (user_id, day)
+        state = self._local_get(key)
+        if state is not _MISSING:
+            self.hits += 1
+            return state
+        shared = self.shared
+        if shared is not None:
+            value = shared.get(self._shared_key(user_id, day), _MISSING)
+            if value is not _MISSING:
+                self.shared_hits += 1
+                return self._local_set(key, TodayState(*value) if value else None, replace=False)
+
+        self.misses += 1
+        state = _state(user_id, day, load())
+        if shared is not None:
+            shared.add(self._shared_key(user_id, day), tuple(state or ()), SHARED_SECONDS)
+        return self._local_set(key, state, replace=False)
+
+    async def aget(self, user_id, day, aload):
+        """get() for async views; aload is a coroutine function."""
+        if not ENABLED:
+            return _state(user_id, day, await aload())
+        key = (user_id, day)
+        state = self._local_get(key)
+        if state is not _MISSING:
+            self.hits += 1
+            return state
+        shared = self.shared
+        if shared is not None:
+            value = await shared.aget(self._shared_key(user_id, day), _MISSING)
+            if value is not _MISSING:
+                self.shared_hits += 1
+                return self._local_set(key, TodayState(*value) if value else None, replace=False)
+
+        self.misses += 1
+        state = _state(user_id, day, await aload())
+        if shared is not None:
+            await shared.aadd(self._shared_key(user_id, day), tuple(state or ()), SHARED_SECONDS)
+        return self._local_set(key, state, replace=False)
+
+    # ----- Write-through ----- #
+    def put(self, attendance):
+        """Store a user's attendance as just written. Rows for other days than today are skipped."""
+        if not ENABLED or attendance.date != timezone.localdate():
+            return
+        state = _state(attendance.user_id, attendance.date, attendance)
+        self._local_set((attendance.user_id, attendance.date), state)
+        shared = self.shared
+        if shared is not None:
+            shared.set(self._shared_key(attendance.user_id, attendance.date), tuple(state), SHARED_SECONDS)
+
+    async def aput(self, attendance):
+        if not ENABLED or attendance.date != timezone.localdate():
+            return
+        state = _state(attendance.user_id, attendance.date, attendance)
+        self._local_set((attendance.user_id, attendance.date), state)
+        shared = self.shared
+        if shared is not None:
+            await shared.aset(self._shared_key(attendance.user_id, attendance.date), tuple(state), SHARED_SECONDS)
+
+    def discard(self, user_id, day):
+        with self._lock:
+            self._entries.pop((user_id, day), None)
+        shared = self.shared
+        if shared is not None:
+            shared.delete(self._shared_key(user_id, day))
+
+
+today_cache = TodayCache()
@@ -1,12 +1,15 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from Ams_app import views
+from Ams_app import async_views, metrics, views
 from Ams_app.views import (
     UserViewSet,
     AttendanceViewSet,
     LeaveRequestViewSet,
     AttendanceReportViewSet,
+    AttendanceSummaryViewSet,
     ShiftViewSet,
+    UserShiftAssignmentViewSet,
+    ShiftRotationViewSet,
     HolidayViewSet,
 )
 
@@ -15,8 +18,11 @@ router = DefaultRouter()
 router.register(r'users', UserViewSet)
 router.register(r'attendances', AttendanceViewSet, basename='attendance')
 router.register(r'attendances-report', AttendanceReportViewSet, basename='attendance-report')
+router.register(r'attendances-summary', AttendanceSummaryViewSet, basename='attendance-summary')
 router.register(r'leave-requests', LeaveRequestViewSet, basename='leave-request')
 router.register(r'shifts', ShiftViewSet)
+router.register(r'shift-assignments', UserShiftAssignmentViewSet)
+router.register(r'shift-rotations', ShiftRotationViewSet)
 router.register(r'holidays', HolidayViewSet)
 
 urlpatterns = [
@@ -31,18 +37,28 @@ urlpatterns = [
     path('attendance/check/', views.attendance_check, name='attendance_check'),
     path('attendance/status/', views.attendance_status, name='attendance_status'),
     path('attendance/list',views.attendance_list,name='attendance_list'),
+    path('attendance/export/', views.attendance_export, name='attendance_export'),
+
+    # Async check-in path (run under ASGI for the morning punch burst)
+    path('async/attendances/punch/', async_views.attendance_punch, name='async_attendance_punch'),
+    path('async/attendances/today/', async_views.attendance_today, name='async_attendance_today'),
 
     path('leave/approve/<int:leave_id>/', views.approve_leave, name='approve_leave'),  # Approve leave
     path('leave/reject/<int:leave_id>/', views.reject_leave, name='reject_leave'),
+    path('leave/cancel/<int:leave_id>/', views.cancel_leave, name='cancel_leave'),
     path('leave/apply/', views.apply_leave, name='apply_leave'),
     path('leave/list/', views.leave_list, name='leave_list'),
 
     path('shift/add/',views.add_shift,name='add_shift'),
     path('shift/list/', views.shift_list, name='shift_list'),
     path('shift/allocate',views.allocate_shift,name='shift_allocate'),
+    path('shift/roster/', views.shift_roster, name='shift_roster'),
 
     path('holiday/', views.holiday_list, name='holiday_list'),
     path('holiday/add/', views.add_holiday, name='add_holiday'),
 
+    # Prometheus scrape target
+    path('metrics', metrics.metrics_view, name='metrics'),
+
 
 ] + router.urls
@@ -5,13 +5,49 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import serializers
 from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import Count
 from django.utils.timezone import now
-from .models import Attendance, User, LeaveRequest, Shift, UserShiftAssignment, Holiday
+from .models import Attendance, User, LeaveRequest, Shift, ShiftRotation, UserShiftAssignment, Holiday, DailyAttendanceSummary
 from .serializers import (
     AttendanceSerializer, LeaveRequestSerializer, ShiftSerializer,
-    UserShiftAssignmentSerializer, UserSerializer, HolidaySerializer
+    LeaveDecisionSerializer, UserShiftAssignmentSerializer, RosterSerializer, ShiftRotationSerializer, RotationMembersSerializer,
+    UserSerializer, HolidaySerializer,
+    DailyAttendanceSummarySerializer
 )
 from .permissions import IsAdminOrManager
+from .punches import ingest_punches, MAX_BATCH_SIZE
+from .leaves import decide_leaves, leave_balances
+from .rosters import assign_roster
+from .shifts import effective_shift, resolve_shifts
+from .metrics import PUNCHES
+from .punch_buffer import punch, today_attendance
+from .exports import export_rows, csv_response, xlsx_response
+from .pagination import KeysetPagination, AttendanceKeysetPagination
+
+
+def export_attendance(params):
+    """
+    Build the attendance export for query params start, end (YYYY-MM-DD,
+    default: the past 30 days), user, shift and output (csv or xlsx).
+    Raises ValueError for invalid params.
+    """
+    end_date = date.fromisoformat(params['end']) if params.get('end') else now().date()
+    start_date = date.fromisoformat(params['start']) if params.get('start') else end_date - timedelta(days=30)
+    if end_date < start_date:
+        raise ValueError("End date cannot be before start date.")
+    output = params.get('output', 'csv')
+    if output not in ('csv', 'xlsx'):
+        raise ValueError("Output must be csv or xlsx.")
+
+    user_id = int(params['user']) if params.get('user') else None
+    shift_id = int(params['shift']) if params.get('shift') else None
+
+    rows = export_rows(start_date, end_date, user_id=user_id, shift_id=shift_id)
+    filename = f"attendance_{start_date}_{end_date}"
+    if output == 'xlsx':
+        return xlsx_response(rows, filename)
+    return csv_response(rows, filename)
 
 
 # ----- User View ----- #
@@ -19,6 +55,7 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -32,32 +69,38 @@ class AttendanceViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     def list(self, request):
-        employee = request.user
         end_date = now().date()
         start_date = end_date - timedelta(days=30)
-        attendance_data = Attendance.objects.filter(user=employee, date__range=(start_date, end_date))
-        serializer = AttendanceSerializer(attendance_data, many=True)
-        return Response(serializer.data)
+        attendance_data = Attendance.objects.filter(user_id=request.user.id, date__range=(start_date, end_date))
+        paginator = AttendanceKeysetPagination()
+        page = paginator.paginate_queryset(attendance_data, request, view=self)
+        serializer = AttendanceSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def create(self, request):
-        employee = request.user
-        current_time = now().time()
-        today = date.today()
-
-        try:
-            attendance = Attendance.objects.get(user=employee, date=today)
-            if attendance.check_in and not attendance.check_out:
-                attendance.check_out = current_time
-                attendance.status = 'Checked-Out'
-            else:
-                return Response({"error": "Attendance already recorded for today"}, status=400)
-        except Attendance.DoesNotExist:
-            attendance = Attendance(user=employee, date=today, check_in=current_time, status='Checked-In')
-
-        attendance.mark_check_in()
-        attendance.save()
+        # Checks in, or checks out when there is an open check-in for today
+        attendance = punch(request.user.id)
+        if attendance is None:
+            return Response({"error": "Attendance already recorded for today"}, status=400)
         return Response({"message": "Attendance recorded successfully"}, status=201)
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsAdminOrManager])
+    def bulk(self, request):
+        # Batch of punches buffered by biometric readers / kiosks
+        events = request.data.get('events') if isinstance(request.data, dict) else None
+        if not isinstance(events, list) or not events:
+            return Response({"error": "Provide a non-empty 'events' list"}, status=400)
+        if len(events) > MAX_BATCH_SIZE:
+            return Response({"error": f"A batch can contain at most {MAX_BATCH_SIZE} events"}, status=400)
+
+        results = ingest_punches(events)
+        totals = {}
+        for result in results:
+            totals[result['result']] = totals.get(result['result'], 0) + 1
+            if result['result'] in ('created', 'updated'):
+                PUNCHES.inc(direction=result['direction'])
+        return Response({"totals": totals, "results": results}, status=200)
+
 
 # ----- Attendance Report Views (Admin/Manager only) ----- #
 class AttendanceReportViewSet(viewsets.ViewSet):
@@ -78,8 +121,46 @@ class AttendanceReportViewSet(viewsets.ViewSet):
         start_date = end_date - timedelta(days=30)
 
         attendance_data = Attendance.objects.filter(user=employee, date__range=(start_date, end_date))
-        serializer = AttendanceSerializer(attendance_data, many=True)
-        return Response(serializer.data)
+        paginator = AttendanceKeysetPagination()
+        page = paginator.paginate_queryset(attendance_data, request, view=self)
+        serializer = AttendanceSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        # /attendances-report/export/?start=&end=&user=&shift=&output=csv|xlsx
+        try:
+            return export_attendance(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+
+# ----- Daily Attendance Summary Views (Admin/Manager only) ----- #
+class AttendanceSummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = DailyAttendanceSummarySerializer
+    permission_classes = [IsAuthenticated, IsAdminOrManager]
+
+    def get_queryset(self):
+        # ?start=YYYY-MM-DD&end=YYYY-MM-DD&shift=<id>, defaults to the past 30 days
+        try:
+            end_date = date.fromisoformat(self.request.query_params.get('end', ''))
+        except ValueError:
+            end_date = now().date()
+        try:
+            start_date = date.fromisoformat(self.request.query_params.get('start', ''))
+        except ValueError:
+            start_date = end_date - timedelta(days=30)
+
+        summaries = DailyAttendanceSummary.objects.filter(
+            date__range=(start_date, end_date)
+        ).select_related('shift')
+        shift_id = self.request.query_params.get('shift')
+        if shift_id:
+            try:
+                summaries = summaries.filter(shift_id=int(shift_id))
+            except ValueError:
+                raise serializers.ValidationError({"error": "shift must be a number."})
+        return summaries
 
 
 # ----- Leave Request Views (All users access limited) ----- #
@@ -90,19 +171,20 @@ from rest_framework.response import Response
 class LeaveRequestViewSet(viewsets.ModelViewSet):
     serializer_class = LeaveRequestSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
         if user.role in ['Admin', 'Manager']:
             return LeaveRequest.objects.all()
-        return LeaveRequest.objects.filter(employee=user)
+        return LeaveRequest.objects.filter(employee_id=user.id)
 
     def perform_create(self, serializer):
-        serializer.save(employee=self.request.user)
+        serializer.save(employee_id=self.request.user.id)
 
     def perform_update(self, serializer):
         if self.request.user.role in ['Admin', 'Manager'] and self.request.data.get('status') == 'Approved':
-            serializer.save(approved_by=self.request.user)
+            serializer.save(approved_by_id=self.request.user.id)
         else:
             serializer.save()
 
@@ -110,7 +192,7 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
     def approve(self, request, pk=None):
         leave = self.get_object()
         leave.status = 'Approved'
-        leave.approved_by = request.user
+        leave.approved_by_id = request.user.id
         leave.save()
 
         serializer = self.get_serializer(leave)
@@ -120,12 +202,46 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
     def reject(self, request, pk=None):
         leave = self.get_object()
         leave.status = 'Rejected'
-        leave.approved_by = request.user
+        leave.approved_by_id = request.user.id
         leave.save()
 
         serializer = self.get_serializer(leave)
         return Response(serializer.data, status=200)
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsAdminOrManager])
+    def decide(self, request):
+        # {"ids": [...], "status": "Approved" | "Rejected"} for many pending requests at once
+        serializer = LeaveDecisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        outcomes = decide_leaves(serializer.validated_data['ids'], serializer.validated_data['status'], request.user)
+        return Response({
+            'results': [{'id': leave_id, 'outcome': outcome} for leave_id, outcome in outcomes.items()],
+        }, status=200)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        # Employees cancel their own requests; Admins and Managers any request
+        leave = self.get_object()
+        if leave.status not in ['Pending', 'Approved']:
+            return Response({"error": f"A {leave.status.lower()} leave request cannot be cancelled."}, status=400)
+        leave.status = 'Cancelled'
+        leave.save()
+
+        serializer = self.get_serializer(leave)
+        return Response(serializer.data, status=200)
+
+    @action(detail=False, methods=['get'])
+    def balance(self, request):
+        # ?year=YYYY (default: this year); Admins and Managers may add &employee=<id>
+        employee_id = request.user.id
+        try:
+            year = int(request.query_params.get('year', date.today().year))
+            if request.user.role in ['Admin', 'Manager'] and request.query_params.get('employee'):
+                employee_id = int(request.query_params['employee'])
+        except ValueError:
+            return Response({"error": "year and employee must be numbers."}, status=400)
+        return Response(leave_balances(employee_id, year))
+
 
 # ----- Shift Views (Admin/Manager only) ----- #
 class ShiftViewSet(viewsets.ModelViewSet):
@@ -139,14 +255,49 @@ class ShiftViewSet(viewsets.ModelViewSet):
 
 # ----- User Shift Assignment Views (Admin/Manager only) ----- #
 class UserShiftAssignmentViewSet(viewsets.ModelViewSet):
-    queryset = UserShiftAssignment.objects.all()
+    queryset = UserShiftAssignment.objects.select_related('shift')
     serializer_class = UserShiftAssignmentSerializer
     permission_classes = [IsAuthenticated, IsAdminOrManager]
+    pagination_class = KeysetPagination
+
+    @action(detail=False, methods=['post'])
+    def roster(self, request):
+        # A shift (or rotation) for many users over a date range in one call
+        serializer = RosterSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            counts = assign_roster(
+                data['users'], data['start_date'], data['end_date'], data['shifts'],
+                days_per_shift=data['days_per_shift'], working_days_only=data['working_days_only'],
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+        return Response(counts, status=200)
 
     # def get_queryset(self):
     #     return UserShiftAssignment.objects.all()
 
 
+# ----- Shift Rotation Views (Admin/Manager only) ----- #
+class ShiftRotationViewSet(viewsets.ModelViewSet):
+    queryset = ShiftRotation.objects.annotate(member_count=Count('members')).order_by('id')
+    serializer_class = ShiftRotationSerializer
+    permission_classes = [IsAuthenticated, IsAdminOrManager]
+
+    @action(detail=True, methods=['post'])
+    def members(self, request, pk=None):
+        # Set the whole membership with two UPDATEs, however many users
+        rotation = self.get_object()
+        serializer = RotationMembersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        users = serializer.validated_data['users']
+        with transaction.atomic():
+            removed = User.objects.filter(rotation=rotation).exclude(id__in=users).update(rotation=None)
+            User.objects.filter(id__in=users).update(rotation=rotation)
+        return Response({"members": len(set(users)), "removed": removed}, status=200)
+
+
 # ----- Holiday Views (Admin/Manager only) ----- #
 class HolidayViewSet(viewsets.ModelViewSet):
     queryset = Holiday.objects.all()
@@ -157,6 +308,7 @@ class HolidayViewSet(viewsets.ModelViewSet):
         start = serializer.validated_data['start_date']
         end = serializer.validated_data['end_date']
 
+        # Checked against the database, not the cached calendar, which may lag other workers
         if Holiday.objects.filter(start_date__lte=end, end_date__gte=start).exists():
             raise serializers.ValidationError("Holiday overlaps with an existing one.")
 
@@ -179,13 +331,13 @@ from django.contrib.auth import login,authenticate,logout,get_user_model
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
-from django.core.paginator import Paginator
-from django.shortcuts import render, redirect
-from django.http import HttpResponseForbidden
+from django.shortcuts import get_object_or_404, render, redirect
+from django.http import Http404, HttpResponseForbidden, HttpResponseBadRequest
 from django.views.decorators.http import require_POST
 from django.utils.timezone import now
 from .models import Attendance, LeaveRequest, Shift, UserShiftAssignment, Holiday,User, Shift
-from .forms import UserCreationForm,AttendanceForm,ShiftForm,LeaveRequestForm,HolidayForm
+from .forms import UserCreationForm,AttendanceForm,ShiftForm,LeaveRequestForm,HolidayForm,LeaveFilterForm,RosterForm
+from .pagination import KeysetPaginator, get_page_size
 
 # landing page view
 def landing_page(request):
@@ -259,39 +411,22 @@ def logout_user(request):
 @login_required
 def attendance_check(request):
     user = request.user
-    today = date.today()
-
-    # Try to get today’s attendance record
-    attendance, created = Attendance.objects.get_or_create(user=user, date=today)
 
     if request.method == 'POST':
         action = request.POST.get('action')
+        if action in ('checkin', 'checkout'):
+            punch(user.id, 'in' if action == 'checkin' else 'out')
 
-        if action == 'checkin' and not attendance.check_in:
-            attendance.check_in = datetime.now().time()
-            attendance.status = 'Present'
-            attendance.save()
-        elif action == 'checkout' and not attendance.check_out:
-            attendance.check_out = datetime.now().time()
-            attendance.save()
-
-    checkin_time = attendance.check_in
-    checkout_time = attendance.check_out
-
-    # Calculate duration only if both checkin and checkout are available
-    if checkin_time and checkout_time:
-        checkin_datetime = datetime.combine(today, checkin_time)
-        checkout_datetime = datetime.combine(today, checkout_time)
-        duration = checkout_datetime - checkin_datetime
-    else:
-        duration = None
+    # Today's state (with buffered punches) from the today cache; a punch above wrote it through
+    attendance = today_attendance(user.id)
 
     context = {
         'user': user,
-        'checkin_time': checkin_time,
-        'checkout_time': checkout_time,
-        'duration': duration,
-        'status': attendance.status,
+        'checkin_time': attendance.check_in if attendance else None,
+        'checkout_time': attendance.check_out if attendance else None,
+        # Only when both check-in and check-out are available
+        'duration': attendance.duration if attendance else None,
+        'status': attendance.status if attendance else None,
     }
 
     return render(request, 'ams_app/attendance/attendance_check.html', context)
@@ -300,18 +435,15 @@ def attendance_check(request):
 @login_required
 def attendance_status(request):
     user = request.user
-    today = date.today()
 
-    try:
-        attendance_record = Attendance.objects.get(user=user, date=today)
+    # Includes punches still waiting in the write-behind buffer; cached between punches
+    attendance_record = today_attendance(user.id)
+    if attendance_record is not None:
         checkin_time = attendance_record.check_in
         checkout_time = attendance_record.check_out
+        duration = attendance_record.duration
 
-        if checkin_time and checkout_time:
-            checkin_datetime = datetime.combine(today, checkin_time)
-            checkout_datetime = datetime.combine(today, checkout_time)
-            duration = checkout_datetime - checkin_datetime
-
+        if duration is not None:
             # Format duration to hours and minutes
             total_seconds = duration.total_seconds()
             hours = int(total_seconds // 3600)
@@ -319,7 +451,7 @@ def attendance_status(request):
             duration_str = f"{hours}h {minutes}m"
         else:
             duration_str = "Not completed"
-    except Attendance.DoesNotExist:
+    else:
         checkin_time = None
         checkout_time = None
         duration_str = "No record"
@@ -340,37 +472,45 @@ def attendance_list(request):
     if request.user.role not in ['Admin', 'Manager']:
         raise PermissionDenied
 
-    # Get all attendance records and order by date descending
-    attendance_records = Attendance.objects.select_related('user').order_by('-date')
-
-    # Create a Paginator object to paginate the attendance records
-    paginator = Paginator(attendance_records, 10)  # Show 10 records per page
-
-    # Get the page number from the request (default is 1)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    # Add duration manually to each record
-    records_with_duration = []
-    for record in page_obj.object_list:
-        duration = None
-        if record.check_in and record.check_out:
-            checkin_dt = datetime.combine(record.date, record.check_in)
-            checkout_dt = datetime.combine(record.date, record.check_out)
-            duration = checkout_dt - checkin_dt
-        records_with_duration.append({
+    # Newest first, one page at a time via ?cursor=...&page_size=...
+    paginator = KeysetPaginator(
+        Attendance.objects.select_related('user'), ('date', 'id'), get_page_size(request.GET)
+    )
+    try:
+        page, next_cursor, previous_cursor = paginator.page(request.GET.get('cursor'))
+    except ValueError:
+        raise Http404("Invalid page.")
+
+    # Worked time is stored at check-out
+    records_with_duration = [
+        {
             'record': record,
-            'duration': duration,
-        })
+            'duration': timedelta(seconds=record.worked_seconds) if record.worked_seconds is not None else None,
+        }
+        for record in page
+    ]
 
     context = {
         'attendance_records': records_with_duration,
-        'page_obj': page_obj,  # Add the page object to context
+        'next_cursor': next_cursor,
+        'previous_cursor': previous_cursor,
+        'page_size': paginator.page_size,
     }
 
     return render(request, 'ams_app/attendance/attendance_list.html', context)
 
 
+@login_required
+def attendance_export(request):
+    if request.user.role not in ['Admin', 'Manager']:
+        raise PermissionDenied
+
+    try:
+        return export_attendance(request.GET)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+
 # ----- Leave Request Views for templates ----- #
 def apply_leave(request):
     if request.method == "POST":
@@ -452,6 +592,22 @@ def reject_leave(request, leave_id):
     
     return redirect('leave_list')  # Redirect back to the leave list
 
+@login_required
+def cancel_leave(request, leave_id):
+    leave_request = get_object_or_404(LeaveRequest, id=leave_id)
+
+    # Employees cancel their own requests; Admins and Managers any request
+    if request.user != leave_request.employee and request.user.role not in ["Admin", "Manager"]:
+        messages.error(request, "You are not authorized to cancel this leave request.")
+    elif request.method != "POST" or leave_request.status not in ['Pending', 'Approved']:
+        messages.error(request, "This leave request cannot be cancelled.")
+    else:
+        leave_request.status = 'Cancelled'
+        leave_request.save()
+        messages.success(request, "Leave request cancelled successfully.")
+
+    return redirect('leave_list')
+
 
 @login_required
 def leave_list(request):
@@ -461,7 +617,29 @@ def leave_list(request):
     else:
         leaves = LeaveRequest.objects.filter(employee=user)  # Employees only see their own leave requests
 
-    return render(request, 'ams_app/leave/leave_list.html', {'leave_requests': leaves})  # Context updated to match template variable name
+    filter_form = LeaveFilterForm(request.GET)
+    if filter_form.is_valid():
+        leaves = filter_form.filter(leaves)
+
+    # One query for the page, employee names included, newest requests first
+    paginator = KeysetPaginator(leaves.select_related('employee'), ('id',), get_page_size(request.GET))
+    try:
+        page, next_cursor, previous_cursor = paginator.page(request.GET.get('cursor'))
+    except ValueError:
+        raise Http404("Invalid page.")
+
+    # Keep the filters when following the pagination links
+    filter_query = request.GET.copy()
+    filter_query.pop('cursor', None)
+
+    context = {
+        'leave_requests': page,  # Context updated to match template variable name
+        'filter_form': filter_form,
+        'filter_query': filter_query.urlencode(),
+        'next_cursor': next_cursor,
+        'previous_cursor': previous_cursor,
+    }
+    return render(request, 'ams_app/leave/leave_list.html', context)
 
 
 # ----- Shift Views for templates ----- #
@@ -503,15 +681,10 @@ User = get_user_model()
 def allocate_shift(request):
     today = date.today()
 
-    # If Employee, only show their own shift allocation
+    # If Employee, only show their own shift: explicit assignment, rotation or default
     if request.user.role == "Employee":
-        assignment = UserShiftAssignment.objects.filter(
-            user=request.user,
-            date=today
-        ).select_related('shift').first()
-
         context = {
-            'employee_shift': assignment,
+            'employee_shift': effective_shift(request.user.id, today),
             'today': today
         }
         return render(request, 'ams_app/shift/employee_shift.html', context)
@@ -537,11 +710,15 @@ def allocate_shift(request):
         messages.success(request, f"Shift '{shift.name}' allocated to {user.name} successfully!")
         return redirect('shift_allocate')
 
-    # Get only today's assignments
-    assignments = UserShiftAssignment.objects.filter(date=today).select_related('user', 'shift')
+    # Everyone's shift today, whether assigned, from a rotation or their default
+    users = list(User.objects.all())
+    shifts = resolve_shifts([user.id for user in users], [today])
+    assignments = [
+        {'user': user, 'shift': shifts[(user.id, today)]} for user in users if shifts[(user.id, today)]
+    ]
 
     context = {
-        'users': User.objects.all(),
+        'users': users,
         'shifts': Shift.objects.all(),
         'assignments': assignments,
         'today': today
@@ -549,6 +726,32 @@ def allocate_shift(request):
     return render(request, 'ams_app/shift/allocate_shift.html', context)
 
 
+@login_required
+def shift_roster(request):
+    if request.user.role not in ['Admin', 'Manager']:
+        raise PermissionDenied
+
+    if request.method == 'POST':
+        form = RosterForm(request.POST)
+        if form.is_valid():
+            data = form.cleaned_data
+            counts = assign_roster(
+                [user.id for user in data['users']], data['start_date'], data['end_date'],
+                [shift.id for shift in data['shifts']],
+                days_per_shift=data['days_per_shift'], working_days_only=data['working_days_only'],
+            )
+            messages.success(
+                request,
+                f"Roster saved: {counts['created']} created, {counts['updated']} updated, "
+                f"{counts['unchanged']} unchanged.",
+            )
+            return redirect('shift_roster')
+    else:
+        form = RosterForm()
+
+    return render(request, 'ams_app/shift/roster.html', {'form': form})
+
+
 # ----- Holiday Views for templates ----- #
 
 @login_required
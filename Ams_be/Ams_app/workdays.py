@@ -0,0 +1,121 @@
+# Ams_app/workdays.py
+
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from django.conf import settings
+from .models import Holiday
+
+# Weekday numbers (Monday = 0) that are never working days
+WEEKEND_DAYS = frozenset(getattr(settings, 'AMS_WEEKEND_DAYS', (5, 6)))
+# Seconds before a loaded year is re-read, so workers that missed a
+# Holiday signal (other processes) catch up on their own
+RELOAD_AFTER = getattr(settings, 'AMS_CALENDAR_TTL', 300)
+
+
+class _Year:
+    """One calendar year: a day-of-year bitmap plus prefix sums of working days."""
+    __slots__ = ('first_day', 'closed', 'working_before', 'starts', 'ends', 'reach', 'ids', 'loaded_at')
+
+    def __init__(self, year, holidays):
+        self.first_day = date(year, 1, 1)
+        days = (date(year + 1, 1, 1) - self.first_day).days
+        self.loaded_at = time.monotonic()
+
+        # closed[i] is 1 when day i of the year is a weekend or a holiday
+        self.closed = bytearray(days)
+        for offset in range(days):
+            if (self.first_day + timedelta(days=offset)).weekday() in WEEKEND_DAYS:
+                self.closed[offset] = 1
+        for _, start, end in holidays:
+            first = max((start - self.first_day).days, 0)
+            last = min((end - self.first_day).days, days - 1)
+            self.closed[first:last + 1] = b'\x01' * (last - first + 1)
+
+        # working_before[i] = working days in [Jan 1, day i)
+        self.working_before = array('H', [0]) * (days + 1)
+        for offset in range(days):
+            self.working_before[offset + 1] = self.working_before[offset] + (not self.closed[offset])
+
+        # Holidays as sorted interval arrays for overlap lookups
+        holidays = sorted(holidays, key=lambda holiday: holiday[1])
+        self.ids = [holiday_id for holiday_id, _, _ in holidays]
+        self.starts = [start for _, start, _ in holidays]
+        self.ends = [end for _, _, end in holidays]
+        # reach[i] = latest end among the first i + 1 holidays (sorted, for bisect)
+        self.reach = []
+        for end in self.ends:
+            self.reach.append(max(end, self.reach[-1]) if self.reach else end)
+
+
+class WorkdayCalendar:
+    """
+    In-process working-day calendar built from weekends and Holiday rows.
+
+    Each year is loaded with one query the first time it is needed and then
+    answered from memory. Holiday signals call invalidate() on changes.
+    """
+
+    def __init__(self):
+        self._years = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.lookups = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._years = {}
+
+    def _year(self, year):
+        self.lookups += 1
+        loaded = self._years.get(year)
+        if loaded is not None and time.monotonic() - loaded.loaded_at < RELOAD_AFTER:
+            return loaded
+
+        holidays = list(Holiday.objects.filter(
+            start_date__lte=date(year, 12, 31), end_date__gte=date(year, 1, 1)
+        ).values_list('id', 'start_date', 'end_date'))
+        loaded = _Year(year, holidays)
+        with self._lock:
+            self._years[year] = loaded
+            self.loads += 1
+        return loaded
+
+    def is_working_day(self, day):
+        year = self._year(day.year)
+        return not year.closed[(day - year.first_day).days]
+
+    def is_holiday(self, day):
+        """True when the day falls inside a Holiday (weekends don't count)."""
+        return bool(self.holidays_overlapping(day, day))
+
+    def working_days_between(self, start, end):
+        """Number of working days from start to end, both inclusive."""
+        total = 0
+        for year_number in range(start.year, end.year + 1):
+            year = self._year(year_number)
+            first = (max(start, year.first_day) - year.first_day).days
+            last = (min(end, date(year_number, 12, 31)) - year.first_day).days
+            if last >= first:
+                total += year.working_before[last + 1] - year.working_before[first]
+        return total
+
+    def holidays_overlapping(self, start, end):
+        """Ids of the holidays that share at least one day with [start, end]."""
+        found = []
+        for year_number in range(start.year, end.year + 1):
+            year = self._year(year_number)
+            first = bisect_left(year.reach, start)
+            last = bisect_right(year.starts, end)
+            for index in range(first, last):
+                if year.ends[index] >= start and year.ids[index] not in found:
+                    found.append(year.ids[index])
+        return found
+
+    def overlaps_holiday(self, start, end, exclude_id=None):
+        return any(holiday_id != exclude_id for holiday_id in self.holidays_overlapping(start, end))
+
+
+calendar = WorkdayCalendar()
@@ -0,0 +1,93 @@
+# Ams_app/worktime.py
+
+from django.db import connection, transaction
+from .models import Attendance
+from .shifts import ShiftResolver, shift_table, shift_times
+
+DAY_SECONDS = 24 * 3600
+HALF_DAY = DAY_SECONDS // 2
+
+WORKTIME_FIELDS = list(Attendance.WORKTIME_FIELDS)
+BACKFILL_BATCH_SIZE = 5000
+
+
+def clock_seconds(value):
+    """Seconds since midnight for a time."""
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def signed_gap(later, earlier):
+    """
+    later - earlier on a 24h clock, folded into [-12h, 12h) so night shifts
+    work. Takes plain ints or NumPy arrays of seconds since midnight.
+    """
+    return (later - earlier + HALF_DAY) % DAY_SECONDS - HALF_DAY
+
+
+def work_seconds(check_in, check_out, shift_start=None, shift_end=None):
+    """
+    Worked, late and overtime seconds of one day as a dict keyed by
+    WORKTIME_FIELDS, with the same rules as payroll.compute_row_metrics():
+    a check-out earlier than the check-in is the next day, and late/overtime
+    are zero without a shift. All None until both punches are in.
+    """
+    if check_in is None or check_out is None:
+        return dict.fromkeys(WORKTIME_FIELDS)
+    punched_in, punched_out = clock_seconds(check_in), clock_seconds(check_out)
+    worked = (punched_out - punched_in) % DAY_SECONDS
+    if shift_start is None or shift_end is None:
+        return {'worked_seconds': worked, 'late_seconds': 0, 'overtime_seconds': 0}
+
+    start, end = clock_seconds(shift_start), clock_seconds(shift_end)
+    return {
+        'worked_seconds': worked,
+        'late_seconds': max(signed_gap(punched_in, start), 0),
+        'overtime_seconds': max(worked - (end - start) % DAY_SECONDS, 0),
+    }
+
+
+def _update_sql():
+    # One parameterised UPDATE run with executemany(): bulk_update() spends
+    # far longer building its CASE expressions than the database spends writing
+    quote = connection.ops.quote_name
+    assignments = ", ".join(f"{quote(field)} = %s" for field in WORKTIME_FIELDS)
+    return f"UPDATE {quote(Attendance._meta.db_table)} SET {assignments} WHERE {quote('id')} = %s"
+
+
+def backfill_work_seconds(start_date=None, end_date=None, recompute=False, batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Fill worked/late/overtime seconds of complete Attendance rows between two
+    dates (either bound may be omitted) that don't have them yet, or of every
+    complete row with ``recompute``. Walks the rows by id in batches of one
+    read, the batch's shifts (see ShiftResolver) and one bulk update each.
+    Returns the number of rows written.
+    """
+    attendance = Attendance.objects.filter(check_in__isnull=False, check_out__isnull=False)
+    if start_date:
+        attendance = attendance.filter(date__gte=start_date)
+    if end_date:
+        attendance = attendance.filter(date__lte=end_date)
+    if not recompute:
+        attendance = attendance.filter(worked_seconds__isnull=True)
+
+    written, last_id = 0, 0
+    while True:
+        rows = list(
+            attendance.filter(id__gt=last_id).order_by('id').values_list(
+                'id', 'user_id', 'date', 'check_in', 'check_out'
+            )[:batch_size]
+        )
+        if not rows:
+            return written
+        last_id = rows[-1][0]
+        dates = [row[2] for row in rows]
+        resolver = ShiftResolver({row[1] for row in rows}, min(dates), max(dates))
+        params = [
+            [*work_seconds(
+                check_in, check_out, *shift_times(shift_table.get(resolver.shift_id(user_id, day)))
+            ).values(), row_id]
+            for row_id, user_id, day, check_in, check_out in rows
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(_update_sql(), params)
+        written += len(params)
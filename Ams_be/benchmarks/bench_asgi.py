@@ -0,0 +1,175 @@
+"""
+WSGI vs ASGI load benchmark for the check-in endpoints.
+
+A dependency-free asyncio HTTP/1.1 load driver: every client keeps one
+connection open and sends requests back to back for a fixed duration, with
+its own user's access token. Start the same code base under both servers on
+the same machine, e.g.
+
+    gunicorn Ams_be.wsgi -b 127.0.0.1:8000 -w 4 --threads 32
+    uvicorn Ams_be.asgi:application --port 8001 --workers 4
+
+then create tokens for benchmark users and compare:
+
+    python -m benchmarks.bench_asgi tokens --count 1000 --out tokens.txt
+    python -m benchmarks.bench_asgi run --tokens tokens.txt --clients 1000 \\
+        --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001 \\
+        --path /async/attendances/today/
+
+Use ``--path /async/attendances/punch/ --method POST`` for the punch burst
+(after the first two taps per user the endpoint answers 400, which still
+exercises the full read/conditional-write path). 1,000 clients need
+``ulimit -n`` well above 1,000. ``tokens --cleanup`` removes the users.
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.common import setup_django, summarize
+
+BENCH_EMAIL = 'bench-asgi-{}@example.com'
+
+
+def make_tokens(options):
+    """Create (or reuse) benchmark users in the configured database and write one access token per line."""
+    setup_django()
+    from Ams_app.models import User
+    from Ams_app.authentication import ClaimsTokenObtainPairSerializer
+
+    bench_users = User.objects.filter(email__startswith='bench-asgi-')
+    if options.cleanup:
+        deleted, _ = bench_users.delete()
+        print(f"Deleted {deleted} rows.")
+        return
+
+    emails = [BENCH_EMAIL.format(i) for i in range(options.count)]
+    existing = set(bench_users.values_list('email', flat=True))
+    User.objects.bulk_create(
+        [User(email=email, name=email.split('@')[0]) for email in emails if email not in existing],
+        batch_size=1000,
+    )
+    users = User.objects.filter(email__in=emails).order_by('id')
+    with open(options.out, 'w') as output:
+        for user in users:
+            output.write(f"{ClaimsTokenObtainPairSerializer.get_token(user).access_token}\n")
+    print(f"Wrote {len(emails)} tokens to {options.out}.")
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    length, close = 0, False
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'connection' and value.strip().lower() == 'close':
+            close = True
+    if length:
+        await reader.readexactly(length)
+    return status, close
+
+
+async def _client(host, port, request, deadline, latencies, statuses):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, close = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if close:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            statuses['error'] = statuses.get('error', 0) + 1
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _load(url, options, tokens):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    requests = [
+        (
+            f"{options.method} {options.path} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            f"Authorization: Bearer {tokens[i % len(tokens)]}\r\n"
+            "Content-Length: 0\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode()
+        for i in range(options.clients)
+    ]
+    latencies, statuses = [], {}
+    started = time.perf_counter()
+    deadline = started + options.duration
+    await asyncio.gather(*(
+        _client(host, port, request, deadline, latencies, statuses) for request in requests
+    ))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies)
+    result['requests_per_second'] = round(len(latencies) / elapsed, 1)
+    result['statuses'] = {str(status): count for status, count in sorted(statuses.items(), key=str)}
+    return result
+
+
+def run_load(options):
+    with open(options.tokens) as source:
+        tokens = [line.strip() for line in source if line.strip()]
+    if not tokens:
+        raise SystemExit("The tokens file is empty.")
+
+    report = {
+        'path': options.path, 'method': options.method,
+        'clients': options.clients, 'duration_s': options.duration, 'targets': {},
+    }
+    for target in options.target:
+        label, _, url = target.partition('=')
+        report['targets'][label] = asyncio.run(_load(url, options, tokens))
+
+    targets = list(report['targets'].values())
+    if len(targets) == 2 and targets[0]['requests_per_second']:
+        first, second = targets
+        report['throughput_ratio'] = round(second['requests_per_second'] / first['requests_per_second'], 2)
+        report['p99_ratio'] = round(second['p99_ms'] / first['p99_ms'], 2) if first['p99_ms'] else None
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    tokens = commands.add_parser('tokens', help="Create benchmark users and write their access tokens.")
+    tokens.add_argument('--count', type=int, default=1000)
+    tokens.add_argument('--out', default='tokens.txt')
+    tokens.add_argument('--cleanup', action='store_true', help="Delete the benchmark users instead.")
+
+    run = commands.add_parser('run', help="Drive load against one or more running servers.")
+    run.add_argument('--target', action='append', required=True, help="label=http://host:port (repeatable).")
+    run.add_argument('--tokens', required=True, help="File with one access token per line.")
+    run.add_argument('--path', default='/async/attendances/today/')
+    run.add_argument('--method', default='GET', choices=['GET', 'POST'])
+    run.add_argument('--clients', type=int, default=1000)
+    run.add_argument('--duration', type=float, default=30.0, help="Seconds per target.")
+
+    options = parser.parse_args()
+    if options.command == 'tokens':
+        make_tokens(options)
+    else:
+        run_load(options)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Payroll benchmark: per-row Attendance.get_total_hours vs the NumPy engine.
+
+Seeds users x days of attendance, then times the per-row method (one Python
+call per record, as the admin list and reports do) against
+``Ams_app.payroll.payroll_totals`` (a few queries, one vectorized pass).
+
+    python -m benchmarks.bench_payroll --users 1000 --days 30
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, time as clock, timedelta
+
+from benchmarks.common import setup_django, test_database
+
+
+def seed(options):
+    from Ams_app.models import Attendance, Shift, User
+
+    shift = Shift.objects.create(name='Bench', start_time='09:00', end_time='17:00')
+    users = User.objects.bulk_create([
+        User(email=f'bench{i}@example.com', name=f'Bench {i}', shift=shift) for i in range(options.users)
+    ])
+    rng = random.Random(options.seed)
+    first_day = date(2025, 1, 1)
+    rows = []
+    for user in users:
+        for offset in range(options.days):
+            check_in = clock(8 + rng.randrange(2), rng.randrange(60))
+            check_out = clock(16 + rng.randrange(3), rng.randrange(60))
+            rows.append(Attendance(
+                user=user, date=first_day + timedelta(days=offset),
+                check_in=check_in, check_out=check_out, status='Present',
+            ))
+    Attendance.objects.bulk_create(rows, batch_size=5000)
+    return first_day, first_day + timedelta(days=options.days - 1)
+
+
+def per_row(start, end):
+    """Monthly worked seconds the way callers do it today: get_total_hours per record."""
+    from Ams_app.models import Attendance
+
+    totals = {}
+    for record in Attendance.objects.filter(date__range=(start, end)):
+        hours, minutes, seconds = [int(part.split()[0]) for part in record.get_total_hours().split(', ')]
+        key = (record.user_id, record.date.year, record.date.month)
+        totals[key] = totals.get(key, 0) + hours * 3600 + minutes * 60 + seconds
+    return totals
+
+
+def run(options):
+    from Ams_app.payroll import compute_row_metrics, load_attendance, monthly_totals, payroll_totals
+
+    start, end = seed(options)
+    report = {'users': options.users, 'days': options.days, 'rows': options.users * options.days}
+
+    started = time.perf_counter()
+    legacy = per_row(start, end)
+    report['per_row_seconds'] = round(time.perf_counter() - started, 4)
+
+    started = time.perf_counter()
+    totals = payroll_totals(start, end)
+    report['vectorized_seconds'] = round(time.perf_counter() - started, 4)
+
+    arrays = load_attendance(start, end)
+    started = time.perf_counter()
+    compute_row_metrics(arrays)
+    monthly_totals(arrays)
+    report['vectorized_compute_only_seconds'] = round(time.perf_counter() - started, 4)
+
+    report['speedup'] = round(report['per_row_seconds'] / max(report['vectorized_seconds'], 1e-9), 1)
+    report['worked_seconds_match'] = legacy == {
+        (row['user_id'], row['year'], row['month']): row['worked_seconds'] for row in totals
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    options = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        report = run(options)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
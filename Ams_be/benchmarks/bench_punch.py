@@ -0,0 +1,147 @@
+"""
+Check-in/check-out benchmark: queries per punch and latency under concurrency.
+
+Compares the previous get/save based punch with the single-statement upsert
+in ``Ams_app.punches.record_punch``, then fires concurrent punches (including
+double taps for the same user) and checks that no duplicate rows appear.
+Query counts run in autocommit, so they include the on-commit work; the
+daily summary recount the punches trigger runs in the background and is
+timed on its own. Finally one bulk upload of --batch-events device events
+goes through ``ingest_punches`` and its statement count and wall time are
+reported.
+
+    python -m benchmarks.bench_punch --users 2000 --threads 32
+
+Concurrent runs need PostgreSQL; SQLite's shared in-memory test database
+only supports ``--threads 1``.
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import setup_django, test_database, summarize
+
+
+def legacy_punch(user):
+    """The punch as AttendanceViewSet.create used to record it."""
+    from django.utils.timezone import now
+    from Ams_app.models import Attendance
+
+    attendance, _ = Attendance.objects.get_or_create(user=user, date=now().date())
+    if not attendance.check_in:
+        attendance.check_in = now().time()
+        attendance.status = 'Present'
+        attendance.save()
+    elif not attendance.check_out:
+        attendance.check_out = now().time()
+        attendance.save()
+
+
+def count_queries(func, *args):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        func(*args)
+    return len(queries)
+
+
+def ingest_batch(users, size):
+    """One bulk upload of ``size`` events: a check-in and a check-out per user and day, on past days."""
+    from datetime import datetime, time as clock, timedelta
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.utils import timezone
+    from Ams_app.punches import ingest_punches
+
+    pairs = size // 2
+    first_day = timezone.localdate() - timedelta(days=pairs // len(users) + 1)
+    events = []
+    for i in range(pairs):
+        day = first_day + timedelta(days=i // len(users))
+        for direction, at in (('in', clock(9)), ('out', clock(18))):
+            events.append({
+                'user': users[i % len(users)].id,
+                'direction': direction,
+                'timestamp': timezone.make_aware(datetime.combine(day, at)).isoformat(),
+            })
+
+    started = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        results = ingest_punches(events)
+    return {
+        'events': len(events),
+        'statements': len(queries),
+        'seconds': round(time.perf_counter() - started, 3),
+        'errors': sum(result['result'] == 'error' for result in results),
+    }
+
+
+def run(options):
+    from django.db import connection, connections
+    from django.utils import timezone
+    from django.db.models import Count
+    from Ams_app.models import Attendance, User
+    from Ams_app.punches import record_punch
+    from Ams_app.summaries import refresh_daily_summaries
+
+    users = User.objects.bulk_create([
+        User(email=f'bench{i}@example.com', name=f'Bench {i}') for i in range(options.users)
+    ])
+
+    report = {'vendor': connection.vendor, 'users': options.users, 'threads': options.threads}
+    report['queries_per_punch'] = {
+        'legacy_check_in': count_queries(legacy_punch, users[0]),
+        'legacy_check_out': count_queries(legacy_punch, users[0]),
+        'upsert_check_in': count_queries(record_punch, users[1].id),
+        'upsert_check_out': count_queries(record_punch, users[1].id),
+    }
+    Attendance.objects.all().delete()
+
+    def punch(user_id):
+        started = time.perf_counter()
+        try:
+            record_punch(user_id, 'in')
+        finally:
+            connections.close_all()
+        return time.perf_counter() - started
+
+    # Every user taps twice at the same moment to provoke races
+    user_ids = [user.id for user in users for _ in range(2)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=options.threads) as pool:
+        latencies = list(pool.map(punch, user_ids))
+    elapsed = time.perf_counter() - started
+
+    report['concurrent_check_in'] = summarize(latencies)
+    report['concurrent_check_in']['punches_per_second'] = round(len(user_ids) / elapsed, 1)
+    report['duplicate_rows'] = (
+        Attendance.objects.values('user', 'date').annotate(n=Count('id')).filter(n__gt=1).count()
+    )
+    report['rows'] = Attendance.objects.count()
+
+    started = time.perf_counter()
+    report['summary_recount'] = {
+        'queries': count_queries(refresh_daily_summaries, timezone.localdate()),
+        'ms': round((time.perf_counter() - started) * 1000, 3),
+    }
+    report['ingest_batch'] = ingest_batch(users, options.batch_events)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--batch-events', type=int, default=10000)
+    options = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        report = run(options)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Shift resolver benchmark: per-pair lookups vs one batched resolve.
+
+Seeds users with default shifts, a weekly rotation for a share of them and
+a sprinkling of explicit assignments, then resolves the effective shift of
+every user on every day twice: once with ``effective_shift`` per (user,
+date) pair, as a report looping over users would, and once with
+``Ams_app.shifts.resolve_shifts``. Reports the wall time and query count of
+each and whether they agree.
+
+    python -m benchmarks.bench_shifts --users 1000 --days 31
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import setup_django, test_database
+
+
+def seed(options):
+    from Ams_app.models import Shift, ShiftRotation, User, UserShiftAssignment
+
+    shifts = [
+        Shift.objects.create(name='Morning', start_time='06:00', end_time='14:00'),
+        Shift.objects.create(name='Evening', start_time='14:00', end_time='22:00'),
+        Shift.objects.create(name='Night', start_time='22:00', end_time='06:00'),
+    ]
+    first_day = date(2025, 1, 1)
+    # A week of each shift, then a day off
+    pattern = [shift.id for shift in shifts for _ in range(7)] + [None]
+    rotation = ShiftRotation.objects.create(name='Bench', pattern=pattern, anchor_date=first_day)
+
+    rng = random.Random(options.seed)
+    users = User.objects.bulk_create([
+        User(
+            email=f'bench{i}@example.com', name=f'Bench {i}', shift=rng.choice(shifts),
+            rotation=rotation if rng.random() < options.rotating else None,
+        )
+        for i in range(options.users)
+    ])
+    days = [first_day + timedelta(days=offset) for offset in range(options.days)]
+    UserShiftAssignment.objects.bulk_create([
+        UserShiftAssignment(user=user, date=day, shift=rng.choice(shifts))
+        for user in users for day in days if rng.random() < options.overrides
+    ], batch_size=5000)
+    return [user.id for user in users], days
+
+
+def timed(function):
+    """Run function, returning (result, seconds, queries executed)."""
+    from django.db import connection
+
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+    return result, round(elapsed, 4), len(queries)
+
+
+def run(options):
+    from Ams_app.shifts import effective_shift, resolve_shifts, shift_table
+
+    user_ids, days = seed(options)
+    report = {'users': options.users, 'days': options.days, 'pairs': options.users * options.days}
+    # Both sides start from a loaded Shift table
+    shift_table.all()
+
+    per_pair, report['per_pair_seconds'], report['per_pair_queries'] = timed(lambda: {
+        (user_id, day): effective_shift(user_id, day) for user_id in user_ids for day in days
+    })
+    batched, report['batched_seconds'], report['batched_queries'] = timed(lambda: resolve_shifts(user_ids, days))
+
+    report['speedup'] = round(report['per_pair_seconds'] / max(report['batched_seconds'], 1e-9), 1)
+    report['results_match'] = per_pair == batched
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=31)
+    parser.add_argument('--rotating', type=float, default=0.3, help="Share of users on the rotation.")
+    parser.add_argument('--overrides', type=float, default=0.02, help="Share of (user, day) pairs with an assignment.")
+    parser.add_argument('--seed', type=int, default=1)
+    options = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        report = run(options)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""
+Benchmark suite over a seeded dataset, with regression checks.
+
+Seeds users x days of attendance, leaves, shifts and holidays (see
+benchmarks/seed.py) into a throwaway test database, then:
+
+1. micro-benchmarks: each key path is called --iterations times in-process
+   and timed (p50/p95/p99) with its query count;
+2. load: --concurrency threads, each with its own client and DB
+   connection, run a weighted mix of the same paths for --duration seconds.
+
+    python -m benchmarks.bench_suite --users 10000 --days 365 --output bench.json
+    python -m benchmarks.bench_suite --baseline bench.json --tolerance 0.25
+
+With --baseline the run exits with status 1 when a path's p95 grows by
+more than --tolerance or it runs more queries than in the baseline, so CI
+can fail the build. The load phase needs PostgreSQL for --concurrency > 1
+(SQLite's test database serialises writers).
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+
+from benchmarks.common import setup_django, test_database, summarize
+
+
+class Scenario:
+    """One key path. ``request(client, state)`` makes a single call and returns the response."""
+
+    def __init__(self, name, request, expected=(200,), weight=1):
+        self.name, self.request, self.expected, self.weight = name, request, expected, weight
+
+
+def build_scenarios(context):
+    from django.urls import reverse
+
+    employees = context['employee_ids']
+    admin_id = context['admin_id']
+
+    def checkin(client, state):
+        # Each user toggles in then out; cycle through enough users to keep most calls successful
+        user_id = employees[state.setdefault('next_user', 0) % len(employees)]
+        state['next_user'] += 1
+        return client.post('/attendances/', HTTP_AUTHORIZATION=f"Bearer {context['tokens'][user_id]}")
+
+    def attendance_report(client, state):
+        user_id = random.choice(employees)
+        return client.get(f'/attendances-report/{user_id}/', HTTP_AUTHORIZATION=f"Bearer {context['tokens'][admin_id]}")
+
+    def attendance_list(client, state):
+        return client.get(reverse('attendance_list'))
+
+    def attendance_list_deep(client, state):
+        return client.get(reverse('attendance_list'), {'cursor': context['deep_cursor']})
+
+    def leave_list(client, state):
+        return client.get(reverse('leave_list'), {'status': 'Pending'})
+
+    def allocate_shift_page(client, state):
+        return client.get(reverse('shift_allocate'))
+
+    def allocate_shift(client, state):
+        return client.post(reverse('shift_allocate'), {
+            'user_id': random.choice(employees), 'shift_id': random.choice(context['shift_ids']),
+        })
+
+    def token(client, state):
+        return client.post(reverse('token_obtain_pair'), {
+            'email': context['login_email'], 'password': context['password'],
+        })
+
+    return [
+        Scenario('checkin', checkin, expected=(201, 400), weight=10),
+        Scenario('attendance_report', attendance_report, weight=2),
+        Scenario('attendance_list', attendance_list, weight=2),
+        Scenario('attendance_list_deep', attendance_list_deep, weight=1),
+        Scenario('leave_list', leave_list, weight=2),
+        Scenario('allocate_shift_page', allocate_shift_page, weight=1),
+        Scenario('allocate_shift', allocate_shift, expected=(302,), weight=1),
+        Scenario('token', token, weight=1),
+    ]
+
+
+def prepare(options):
+    from django.urls import reverse
+    from Ams_app.authentication import ClaimsTokenObtainPairSerializer
+    from Ams_app.models import Shift, User
+    from benchmarks.seed import BENCH_PASSWORD, seed
+
+    started = time.perf_counter()
+    created = seed(options.users, options.days, rng_seed=options.seed, stdout=sys.stderr)
+    created['seed_seconds'] = round(time.perf_counter() - started, 1)
+
+    employee_ids = list(User.objects.filter(role='Employee').order_by('id').values_list('id', flat=True))
+    sample = employee_ids[:options.token_users]
+    tokens = {
+        user.id: str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+        for user in User.objects.filter(id__in=sample + [created['admin_id']])
+    }
+
+    # A cursor 50 pages into attendance_list, to show deep pages cost the same as page 1
+    client = admin_client(created['admin_id'])
+    cursor = None
+    for _ in range(50):
+        response = client.get(reverse('attendance_list'), {'cursor': cursor} if cursor else {})
+        cursor = response.context['next_cursor'] or cursor
+    return {
+        'created': created,
+        'admin_id': created['admin_id'],
+        'employee_ids': sample,
+        'tokens': tokens,
+        'shift_ids': list(Shift.objects.values_list('id', flat=True)),
+        'deep_cursor': cursor,
+        'login_email': User.objects.get(id=sample[0]).email,
+        'password': BENCH_PASSWORD,
+    }
+
+
+def admin_client(admin_id):
+    from django.test import Client
+    from Ams_app.models import User
+
+    client = Client()
+    client.force_login(User.objects.get(id=admin_id))
+    return client
+
+
+def micro(scenarios, context, iterations):
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    client = admin_client(context['admin_id'])
+    results = {}
+    for scenario in scenarios:
+        state = {}
+        # Each request resets the query log when it starts, so count right away
+        reset_queries()
+        with CaptureQueriesContext(connection) as captured:
+            response = scenario.request(client, state)
+        queries = len(captured)
+        if response.status_code not in scenario.expected:
+            raise SystemExit(f"{scenario.name}: unexpected status {response.status_code}")
+
+        latencies = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            scenario.request(client, state)
+            latencies.append(time.perf_counter() - started)
+        results[scenario.name] = dict(summarize(latencies), queries=queries)
+    return results
+
+
+def load(scenarios, context, concurrency, duration):
+    from django.db import connections
+
+    names = [scenario.name for scenario in scenarios]
+    weights = [scenario.weight for scenario in scenarios]
+    by_name = {scenario.name: scenario for scenario in scenarios}
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(number):
+        client = admin_client(context['admin_id'])
+        state = {'next_user': number * 1000}
+        rng = random.Random(number)
+        try:
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                try:
+                    ok = by_name[name].request(client, state).status_code in by_name[name].expected
+                except Exception:
+                    ok = False
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies[name].append(elapsed)
+                    errors[name] += not ok
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(samples) for samples in latencies.values())
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'requests_per_second': round(total / elapsed, 1),
+        'errors': sum(errors.values()),
+        'paths': {name: dict(summarize(latencies[name]), errors=errors[name]) for name in names if latencies[name]},
+    }
+
+
+def regressions(report, baseline, tolerance):
+    """Paths whose p95 grew by more than ``tolerance`` or whose query count went up."""
+    found = []
+    for name, current in report['micro'].items():
+        previous = baseline.get('micro', {}).get(name)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            found.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current['queries'] > previous['queries']:
+            found.append(f"{name}: queries {previous['queries']} -> {current['queries']}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--token-users', type=int, default=2000, help="Employees given tokens for the check-in path.")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=8, help="Load threads (0 skips the load phase).")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds of load.")
+    parser.add_argument('--output', help="Write the JSON report here.")
+    parser.add_argument('--baseline', help="Earlier JSON report to compare against.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed p95 growth (0.25 = 25%%).")
+    options = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    with test_database():
+        context = prepare(options)
+        scenarios = build_scenarios(context)
+        report = {
+            'vendor': connection.vendor,
+            'dataset': context['created'],
+            'micro': micro(scenarios, context, options.iterations),
+        }
+        if options.concurrency:
+            report['load'] = load(scenarios, context, options.concurrency, options.duration)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if options.output:
+        with open(options.output, 'w') as target:
+            target.write(output + '\n')
+
+    if options.baseline:
+        with open(options.baseline) as source:
+            found = regressions(report, json.load(source), options.tolerance)
+        if found:
+            print("Regressions:\n  " + "\n  ".join(found), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -46,6 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so it times everything below it; inactive unless AMS_PERF_MIDDLEWARE
+    'Ams_app.perf.PerformanceMiddleware',
+    # Latency/query/JWT metrics for /metrics (AMS_METRICS)
+    'Ams_app.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,7 +63,8 @@ ROOT_URLCONF = 'Ams_be.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates with render timing for the performance middleware
+        'BACKEND': 'Ams_app.perf.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'Ams_app/templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -73,6 +78,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'Ams_be.wsgi.application'
+ASGI_APPLICATION = 'Ams_be.asgi.application'
 
 
 # Database
@@ -139,15 +145,75 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'Ams_app.User'  # Use your app name and custom model name
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT with role/shift/active claims: no User query per request
+        'Ams_app.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
+# Default and maximum ?page_size= for paginated pages and API lists
+AMS_PAGE_SIZE = 50
+AMS_MAX_PAGE_SIZE = 500
+
+# Most assignments (users x days) a single roster request may write (see Ams_app/rosters.py)
+AMS_ROSTER_LIMIT = 200000
+
+# Working days of each leave type allowed per calendar year; types left out
+# (Lop) are unlimited (see Ams_app/leaves.py)
+AMS_LEAVE_ALLOWANCE = {'Casual': 12, 'Sick': 12}
+
+# Write-behind punch buffer for the morning spike (see Ams_app/punch_buffer.py).
+# Punches are acknowledged from a local SQLite queue and written in batches.
+AMS_PUNCH_BUFFER = False
+
+# Today's attendance per user, cached in each process and written through on
+# every punch (see Ams_app/today.py). Set AMS_TODAY_CACHE_BACKEND to a shared
+# CACHES alias when running several workers.
+AMS_TODAY_CACHE = True
+AMS_TODAY_CACHE_SIZE = 10000
+AMS_TODAY_CACHE_BACKEND = None
+
+# Per-request timings as Server-Timing headers (see Ams_app/perf.py); requests
+# slower than AMS_PERF_SLOW_MS log their slowest queries with EXPLAIN output
+AMS_PERF_MIDDLEWARE = False
+AMS_PERF_SLOW_MS = 500
+
+# Metrics served at /metrics to scrapers sending "Authorization: Bearer
+# $AMS_METRICS_TOKEN" (without a token, only with DEBUG on). With several
+# worker processes, point AMS_METRICS_DIR at a directory shared by the
+# workers (emptied on deploy)
+AMS_METRICS = True
+AMS_METRICS_DIR = os.environ.get('AMS_METRICS_DIR')
+AMS_METRICS_TOKEN = os.environ.get('AMS_METRICS_TOKEN')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'slow_requests.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'Ams_app.perf': {'handlers': ['slow_requests'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),  # or hours, minutes, etc.
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
+    'TOKEN_OBTAIN_SERIALIZER': 'Ams_app.authentication.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'Ams_app.authentication.ClaimsTokenRefreshSerializer',
+    'TOKEN_USER_CLASS': 'Ams_app.authentication.ClaimsUser',
 }
 
+# Token versions are cached this long (see Ams_app/authentication.py). Use a
+# shared CACHES backend in production so a revocation reaches every worker.
+AMS_TOKEN_VERSION_CACHE_SECONDS = 60
+